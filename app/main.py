@@ -2,22 +2,81 @@ from __future__ import annotations
 
 """FastAPI application exposing calculator evaluate endpoint."""
 
+from contextlib import asynccontextmanager
 from decimal import getcontext
+from typing import Any, Dict
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel, ValidationError
 
-from calc_core.transformer import EvalTransformer, CalcError
-from calc_core.parser import PARSER
-from .schemas import EvaluateRequest, EvaluateResponse
+from calc_core import CalcError, calculate_cached, calculate_many, calculate_traced, metrics, result_cache
+from calc_core.config import ADMIN_ENABLED, STREAM_IN_FLIGHT, STREAM_MAX_LINE
+from calc_core.executor import executor
+from calc_core.profiling import profiler
+from .schemas import (
+    BatchItem,
+    EvaluateBatchRequest,
+    EvaluateBatchResponse,
+    EvaluateRequest,
+    EvaluateResponse,
+    ProfileRequest,
+)
+from .streaming import NDJSONResponse, evaluate_lines, split_lines
 
-app = FastAPI(title="Calculator-MCP REST API", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    yield
+    executor.shutdown(wait=False)
+
+
+app = FastAPI(title="Calculator-MCP REST API", version="1.0.0", lifespan=lifespan)
+app.add_middleware(metrics.MetricsMiddleware)
+
+
+def _json(model: BaseModel, exclude_none: bool = False) -> JSONResponse:
+    """Encode *model* ourselves, so that the serialize stage can be timed."""
+    start = metrics.perf_counter_ns()
+    response = JSONResponse(model.model_dump(exclude_none=exclude_none))
+    metrics.SERIALIZE.observe_ns(metrics.perf_counter_ns() - start)
+    return response
 
 
 @app.get("/healthz")
 async def healthz():
-    """Liveness/readiness probe."""
+    """Liveness/readiness probe, with calculation pool and result cache gauges."""
+
+    return {
+        "status": "ok",
+        "executor": executor.stats()._asdict(),
+        "result_cache": result_cache.info()._asdict(),
+    }
 
-    return {"status": "ok"}
+
+@app.get("/metrics")
+async def metrics_handler():
+    """Counters, gauges and stage latency histograms in the Prometheus text format."""
+
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+async def _evaluate(req: EvaluateRequest) -> EvaluateResponse:
+    """Evaluate *req* in the worker pool; CalcError propagates."""
+
+    metrics.TOOL_CALLS.inc("calc.evaluate")
+    trace = None
+    try:
+        if req.trace:
+            result, trace = await executor.run(
+                calculate_traced, req.expr, precision=req.precision, **(req.variables or {})
+            )
+        else:
+            result = await executor.run(calculate_cached, req.expr, precision=req.precision, **(req.variables or {}))
+    except CalcError as ce:
+        metrics.record_error(ce)
+        raise
+    return EvaluateResponse(result=str(result), precision=req.precision or getcontext().prec, trace=trace)
 
 
 @app.post("/evaluate", response_model=EvaluateResponse)
@@ -25,11 +84,103 @@ async def evaluate(req: EvaluateRequest):
     """Evaluate an expression and return high-precision result."""
 
     try:
-        transformer = EvalTransformer(req.variables)
-        tree = PARSER.parse(req.expr)
-        result = transformer.transform(tree)  # type: ignore[arg-type]
-        return EvaluateResponse(result=str(result), precision=getcontext().prec)
+        return _json(await _evaluate(req), exclude_none=True)
     except CalcError as ce:
         raise HTTPException(status_code=400, detail=str(ce))
     except Exception as exc:  # noqa: BLE001
         raise HTTPException(status_code=400, detail="Invalid expression") from exc
+
+
+async def _evaluate_line(number: int, line: bytes) -> Dict[str, Any]:
+    """One line of ``/evaluate/stream``: its EvaluateResponse, or an error, tagged with the line number."""
+
+    try:
+        req = EvaluateRequest.model_validate_json(line)
+    except ValidationError as exc:
+        return {"line": number, "error": f"Invalid request: {exc.errors()[0]['msg']}"}
+    try:
+        response = await _evaluate(req)
+    except CalcError as ce:
+        return {"line": number, "error": str(ce)}
+    except Exception:  # noqa: BLE001
+        return {"line": number, "error": "Invalid expression"}
+    return {"line": number, **response.model_dump(exclude_none=True)}
+
+
+@app.post("/evaluate/stream")
+async def evaluate_stream(
+    request: Request,
+    in_flight: int = Query(default=STREAM_IN_FLIGHT, ge=1, le=max(1, STREAM_IN_FLIGHT)),
+):
+    """Evaluate newline-delimited JSON ``EvaluateRequest`` objects as they arrive.
+
+    Answers one line each (``{"line": n, "result": ..., "precision": ...}``
+    or ``{"line": n, "error": ...}``) in completion order, with at most
+    ``in_flight`` evaluations outstanding; see :mod:`app.streaming`.
+    """
+
+    lines = split_lines(request.stream(), STREAM_MAX_LINE)
+    return NDJSONResponse(evaluate_lines(lines, _evaluate_line, in_flight))
+
+
+@app.post("/evaluate/batch", response_model=EvaluateBatchResponse)
+async def evaluate_batch(req: EvaluateBatchRequest):
+    """Evaluate one expression over many variable rows; row errors are reported inline."""
+
+    if (req.rows is None) == (req.columns is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of 'rows' or 'columns'")
+    metrics.TOOL_CALLS.inc("calc.evaluate_many")
+    try:
+        outcomes = await executor.run(
+            calculate_many,
+            req.expr,
+            req.rows if req.rows is not None else req.columns,
+            precision=req.precision,
+        )
+    except CalcError as ce:
+        metrics.record_error(ce)
+        raise HTTPException(status_code=400, detail=str(ce))
+    results = []
+    for o in outcomes:
+        if isinstance(o, CalcError):
+            metrics.record_error(o)
+            results.append(BatchItem(error=str(o)))
+        else:
+            results.append(BatchItem(result=str(o)))
+    return _json(EvaluateBatchResponse(results=results, precision=req.precision or getcontext().prec))
+
+
+# ---------------------------------------------------------------------------
+# Admin (CALC_ADMIN=1 only)
+# ---------------------------------------------------------------------------
+
+def _require_admin() -> None:
+    if not ADMIN_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+@app.post("/admin/profile")
+async def start_profile(req: ProfileRequest):
+    """Profile the next ``requests`` calculations; the file path is in the answer."""
+
+    _require_admin()
+    try:
+        return profiler.start(req.requests, req.kind, req.interval_ms / 1000)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@app.get("/admin/profile")
+async def profile_status():
+    """State of the current (or last) profiling session."""
+
+    _require_admin()
+    return profiler.status()
+
+
+@app.delete("/admin/profile")
+async def stop_profile():
+    """End the profiling session now and write what has been collected."""
+
+    _require_admin()
+    return profiler.stop()
@@ -2,31 +2,112 @@ from __future__ import annotations
 
 """Pydantic models for REST API."""
 
-from decimal import Decimal
-from typing import Dict, Optional
+from decimal import Decimal, InvalidOperation
+from typing import Annotated, Any, Dict, List, Literal, Optional, Union
 
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, StrictInt, validator
+
+from calc_core.config import MAX_PRECISION
+
+def _to_decimal(value: Any) -> Decimal:
+    """``Decimal(str(value))``; a ValueError (HTTP 422) for anything that is not a number."""
+    if isinstance(value, (dict, list, bool)) or value is None:
+        raise ValueError(f"expected a number, got {value!r}")
+    try:
+        return Decimal(str(value))
+    except InvalidOperation:
+        raise ValueError(f"invalid number {value!r}") from None
+
+
+# Same rule as calc_core._resolve_precision: a digit count (never a bool) or "float64".
+Precision = Optional[Union[Annotated[StrictInt, Field(ge=1, le=MAX_PRECISION)], Literal["float64"]]]
 
 
 class EvaluateRequest(BaseModel):
     """Request body for `/evaluate`."""
 
     expr: str = Field(..., description="Expression to evaluate")
-    variables: Optional[Dict[str, Decimal]] = Field(
+    variables: Optional[Dict[str, Union[Decimal, List[Decimal]]]] = Field(
         default=None,
-        description="Optional mapping of variable names to numeric values",
+        description="Optional mapping of variable names to numeric values or lists of numbers",
+    )
+    precision: Precision = Field(
+        default=None,
+        description="Significant digits for this request (default 34), or 'float64'",
+    )
+    trace: bool = Field(
+        default=False,
+        description="Also return a trace of where the time went (bypasses the result cache)",
     )
 
     # Ensure all Decimal values created with str() for precision safety
     @validator("variables", pre=True)
     def _convert_vars(cls, v):  # noqa: N805
-        if v is None:
-            return None
-        return {k: Decimal(str(val)) for k, val in v.items()}
+        if not isinstance(v, dict):
+            return v  # None, or rejected by the field type
+        return {k: [_to_decimal(x) for x in val] if isinstance(val, list) else _to_decimal(val) for k, val in v.items()}
 
 
 class EvaluateResponse(BaseModel):
     """Successful evaluation response."""
 
     result: str
-    precision: int
+    precision: Union[int, str]
+    trace: Optional[Dict[str, Any]] = None  # only when requested
+
+
+class EvaluateBatchRequest(BaseModel):
+    """Request body for `/evaluate/batch`: one expression, many variable bindings.
+
+    Supply exactly one of ``rows`` (a list of variable mappings) or
+    ``columns`` (variable name -> list of values, all the same length).
+    """
+
+    expr: str = Field(..., description="Expression to evaluate for every row")
+    rows: Optional[List[Dict[str, Decimal]]] = Field(
+        default=None,
+        description="Row-oriented variable bindings",
+    )
+    columns: Optional[Dict[str, List[Decimal]]] = Field(
+        default=None,
+        description="Column-oriented variable bindings",
+    )
+    precision: Precision = Field(
+        default=None,
+        description="Significant digits for every row (default 34), or 'float64' "
+                    "to trade Decimal precision for vectorized NumPy speed",
+    )
+
+    @validator("rows", pre=True)
+    def _convert_rows(cls, v):  # noqa: N805
+        if not isinstance(v, list) or not all(isinstance(row, dict) for row in v):
+            return v  # None, or rejected by the field type
+        return [{k: _to_decimal(val) for k, val in row.items()} for row in v]
+
+    @validator("columns", pre=True)
+    def _convert_columns(cls, v):  # noqa: N805
+        if not isinstance(v, dict) or not all(isinstance(col, list) for col in v.values()):
+            return v  # None, or rejected by the field type
+        return {k: [_to_decimal(val) for val in col] for k, col in v.items()}
+
+
+class BatchItem(BaseModel):
+    """Outcome of one row: either ``result`` or ``error`` is set."""
+
+    result: Optional[str] = None
+    error: Optional[str] = None
+
+
+class EvaluateBatchResponse(BaseModel):
+    """Per-row results of a batch evaluation, in input order."""
+
+    results: List[BatchItem]
+    precision: Union[int, str]
+
+
+class ProfileRequest(BaseModel):
+    """Request body for `POST /admin/profile`: profile the next N calculations."""
+
+    requests: int = Field(..., ge=1, description="Number of calculations to profile")
+    kind: Literal["cprofile", "sampling"] = "cprofile"
+    interval_ms: float = Field(default=1.0, description="Sampling interval (kind 'sampling')")
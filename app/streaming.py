@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+"""Newline-delimited JSON streaming for ``POST /evaluate/stream``.
+
+The request body is read incrementally and split into lines; each
+non-blank line is one ``EvaluateRequest`` and produces one output line as
+soon as its evaluation completes (so answers come in completion order,
+tagged with the 1-based input ``line`` they answer).
+
+Memory stays bounded whatever the input size:
+
+* at most ``in_flight`` lines are being evaluated or waiting to be sent;
+  no further input is read until one of them has been written out;
+* output is produced by a generator, so a client that reads slowly
+  suspends it at ``yield`` -- which stops both reading and evaluating
+  (backpressure in both directions);
+* a line longer than ``max_line`` bytes is answered with an error and
+  skipped without being buffered.
+"""
+
+import asyncio
+import json
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+Line = Tuple[int, bytes, Optional[str]]  # (line number, content, error)
+Evaluate = Callable[[int, bytes], Awaitable[Dict[str, object]]]
+
+
+async def split_lines(chunks: AsyncIterator[bytes], max_line: int) -> AsyncIterator[Line]:
+    """Yield ``(number, line, None)`` per non-blank line of *chunks*, or an error for overlong lines."""
+    buffer = bytearray()
+    number = 1
+    skipping = False  # inside a line that is already too long
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end < 0:
+                if not skipping:
+                    buffer += chunk[start:]
+                    if len(buffer) > max_line:
+                        yield number, b"", f"Line too long (limit {max_line} bytes)"
+                        buffer.clear()
+                        skipping = True
+                break
+            if not skipping:
+                buffer += chunk[start:end]
+                if len(buffer) > max_line:
+                    yield number, b"", f"Line too long (limit {max_line} bytes)"
+                elif buffer.strip():
+                    yield number, bytes(buffer), None
+            buffer.clear()
+            skipping = False
+            number += 1
+            start = end + 1
+    if buffer.strip() and not skipping:
+        yield number, bytes(buffer), None
+
+
+async def evaluate_lines(lines: AsyncIterator[Line], evaluate: Evaluate, in_flight: int) -> AsyncIterator[bytes]:
+    """Run *evaluate* on every line, at most *in_flight* at once; yield encoded answers as they complete."""
+    pending: Set[asyncio.Future] = set()
+    reading: Optional[asyncio.Future] = None
+    exhausted = False
+    try:
+        while True:
+            if reading is None and not exhausted and len(pending) < in_flight:
+                reading = asyncio.ensure_future(lines.__anext__())
+            if reading is None and not pending:
+                return
+            waiting = pending | {reading} if reading is not None else pending
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+            if reading in done:
+                try:
+                    number, line, error = reading.result()
+                except StopAsyncIteration:
+                    exhausted = True
+                else:
+                    if error is None:
+                        pending.add(asyncio.ensure_future(evaluate(number, line)))
+                    else:
+                        pending.add(asyncio.ensure_future(_error(number, error)))
+                reading = None
+            for task in done & pending:
+                pending.discard(task)
+                yield (json.dumps(task.result()) + "\n").encode()
+    finally:
+        # Client gone (or a failure): stop reading and drop unfinished work.
+        for task in pending | ({reading} if reading is not None else set()):
+            task.cancel()
+
+
+async def _error(number: int, message: str) -> Dict[str, object]:
+    return {"line": number, "error": message}
+
+
+class NDJSONResponse(StreamingResponse):
+    """A streaming response whose body generator itself reads the request.
+
+    Starlette's StreamingResponse also listens for ``http.disconnect`` on
+    ``receive`` while streaming, which would swallow the request body this
+    endpoint is still reading; the body reader notices a disconnect
+    itself (``request.stream()`` raises ``ClientDisconnect``).
+    """
+
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+
+
+__all__ = ["NDJSONResponse", "evaluate_lines", "split_lines"]
@@ -0,0 +1,242 @@
+"""Micro-benchmarks for the calculation core, stage by stage.
+
+Workloads are the valid cases of the YAML corpora under ``tests/`` plus
+synthetic ones (long sums, deep nesting, trig-heavy, variable-heavy,
+integer-heavy, high precision).  Each workload is timed per stage:
+
+* ``tokenize``  -- :func:`calc_core.pratt.tokenize`
+* ``parse``     -- :func:`calc_core.compiler.parse` (text to AST, ``--parser``)
+* ``transform`` -- AST to :class:`CompiledExpression` (optimize, cost, compile)
+* ``evaluate``  -- ``CompiledExpression.evaluate`` at the workload's precision
+* ``quantize``  -- ``calc_core._quantize`` of the results
+* ``calculate`` -- :func:`calc_core.calculate` end to end (expression cache warm,
+  including the exact integer tier for ``integer_heavy``'s int variables)
+
+A sample runs a stage over the whole workload enough times to take at
+least ``--min-time``; per-operation times (one expression) are reported as
+ops/s of the median and p50/p90/p99 over ``--samples`` samples.
+Constant subexpressions are folded once per precision, so ``evaluate`` of
+a variable-free expression measures the cached path, as in production.
+
+Usage (from the repository root)::
+
+    python benchmarks/core_suite.py --save benchmarks/baseline.json
+    python benchmarks/core_suite.py --baseline benchmarks/baseline.json --threshold 0.15
+
+With ``--baseline`` the run exits with status 1 if any stage's median is
+more than ``--threshold`` (a fraction) slower than in the baseline.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+from decimal import Decimal, localcontext
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import yaml  # noqa: E402
+
+from calc_core import CalcError, PRECISION, _quantize, calculate, pratt  # noqa: E402
+from calc_core.compiler import CompiledExpression, parse  # noqa: E402
+from calc_core.transformer import _coerce_variables  # noqa: E402
+
+
+class Item(NamedTuple):
+    expr: str
+    variables: Dict[str, object]  # as passed to calculate()
+    precision: int
+
+
+# --------------------------------------------------------------------------
+# Workloads
+# --------------------------------------------------------------------------
+
+def yaml_items() -> List[Item]:
+    """Every YAML case that evaluates without error at the default precision."""
+    items = []
+    for file in sorted((ROOT / "tests").glob("*.yaml")):
+        data = yaml.safe_load(file.read_text())
+        entries = data if isinstance(data, list) else [e for section in data.values() for e in section]
+        for entry in entries:
+            if not isinstance(entry, dict) or "expr" not in entry:
+                continue
+            try:
+                variables = _coerce_variables(entry.get("vars") or {})
+                calculate(entry["expr"], **variables)
+            except CalcError:
+                continue
+            items.append(Item(entry["expr"], variables, PRECISION))
+    return items
+
+
+def synthetic_workloads() -> Dict[str, List[Item]]:
+    d = Decimal
+    variables = {f"x{i}": d(i) / 7 + 1 for i in range(60)}
+    return {
+        "long_sums": [
+            Item("+".join(f"{i}.5" for i in range(n)), {}, PRECISION) for n in (50, 200, 450)
+        ] + [Item("+".join(f"x{i % 60}*{i}" for i in range(300)), variables, PRECISION)],
+        "deep_nesting": [
+            Item("sqrt(" * 100 + "x0+2" + ")" * 100, variables, PRECISION),
+            Item("(" * 200 + "x1" + "*1.5+1)" * 200, variables, PRECISION),
+            Item("(((((((((x2+1)*2-3)/4)^2+5)*6)-7)/8)^2+9)*10)", variables, PRECISION),
+        ],
+        "trig_heavy": [
+            Item("sin(x)*cos(x)+tan(x/3)", {"x": d("0.7")}, PRECISION),
+            Item("sin(x)^2+cos(x)^2", {"x": d("12345.678")}, PRECISION),
+            Item("sin(x*1e5)+cos(pi/7)", {"x": d("3.3")}, PRECISION),
+            Item("atan(x)+asin(x/2)+acos(x/3)", {"x": d("0.5")}, PRECISION),
+        ],
+        "variable_heavy": [
+            Item("*".join(f"x{i}" for i in range(0, 60, 2)) + "/" + "*".join(f"x{i}" for i in range(1, 60, 2)),
+                 variables, PRECISION),
+            Item("+".join(f"x{i}^2" for i in range(60)), variables, PRECISION),
+            Item("sqrt(x3*x4+x5)-log(x6,x7)+exp(x8/x9)", variables, PRECISION),
+        ],
+        # Native int variables, as JSON clients send them: calculate() takes
+        # the exact integer tier (calc_core.exact); `evaluate` stays Decimal.
+        "integer_heavy": [
+            Item("x^3 + 2*x^2 - 5*x + 7", {"x": 12}, PRECISION),
+            Item("(a+b)*(a-b)/4 + a*b", {"a": 1234, "b": 56}, PRECISION),
+            Item("x*y - (x+y)^2 + abs(x-y)", {"x": 31, "y": -17}, PRECISION),
+            Item("+".join(f"x{i % 10}*{i}" for i in range(100)), {f"x{i}": i for i in range(10)}, PRECISION),
+            Item("5+4-3+2-1", {}, PRECISION),
+            Item("8*7/14*2", {}, PRECISION),
+        ],
+        "high_precision": [
+            Item("sqrt(x)*exp(1)/log(10)", {"x": d(2)}, 500),
+            Item("x^y", {"x": d(2), "y": d("0.5")}, 500),
+            Item("sin(x)+cos(x)", {"x": d("1.25")}, 300),
+            Item("(1+1/x)^x", {"x": d(10) ** 12}, 1000),
+        ],
+    }
+
+
+# --------------------------------------------------------------------------
+# Stages
+# --------------------------------------------------------------------------
+
+def stages(items: Sequence[Item], parser: str) -> Dict[str, Callable[[], object]]:
+    trees = [parse(i.expr, parser) for i in items]
+    compiled = [CompiledExpression(i.expr, t) for i, t in zip(items, trees)]
+    coerced = [_coerce_variables(i.variables) for i in items]
+
+    def evaluate_all() -> list:
+        out = []
+        for item, c, variables in zip(items, compiled, coerced):
+            with localcontext() as ctx:
+                ctx.prec = item.precision
+                out.append(c.evaluate(variables))
+        return out
+
+    values = evaluate_all()
+
+    def quantize_all() -> None:
+        for item, value in zip(items, values):
+            with localcontext() as ctx:
+                ctx.prec = item.precision
+                _quantize(value)
+
+    return {
+        "tokenize": lambda: [pratt.tokenize(i.expr) for i in items],
+        "parse": lambda: [parse(i.expr, parser) for i in items],
+        "transform": lambda: [CompiledExpression(i.expr, t) for i, t in zip(items, trees)],
+        "evaluate": evaluate_all,
+        "quantize": quantize_all,
+        "calculate": lambda: [calculate(i.expr, precision=i.precision, **i.variables) for i in items],
+    }
+
+
+def measure(fn: Callable[[], object], ops: int, samples: int, min_time: float) -> Dict[str, float]:
+    """Time *fn* (which performs *ops* operations) and summarize per-op microseconds."""
+    start = time.perf_counter()
+    fn()
+    once = time.perf_counter() - start
+    loops = max(1, math.ceil(min_time / max(once, 1e-9)))
+    per_op = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        per_op.append((time.perf_counter() - start) / (loops * ops) * 1e6)
+    per_op.sort()
+
+    def pct(p: float) -> float:
+        return per_op[min(len(per_op) - 1, round(p / 100 * (len(per_op) - 1)))]
+
+    median = statistics.median(per_op)
+    return {"ops_per_s": 1e6 / median, "median_us": median, "p50_us": pct(50), "p90_us": pct(90), "p99_us": pct(99)}
+
+
+# --------------------------------------------------------------------------
+# Baselines
+# --------------------------------------------------------------------------
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float) -> List[str]:
+    """Return a description of every result slower than *baseline* by more than *threshold*."""
+    regressions = []
+    for key, current in results.items():
+        before = baseline.get(key)
+        if before is None:
+            continue
+        ratio = current["median_us"] / before["median_us"]
+        if ratio > 1 + threshold:
+            regressions.append(f"{key}: {before['median_us']:.2f} us -> {current['median_us']:.2f} us "
+                               f"({(ratio - 1) * 100:+.0f}%)")
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=15)
+    parser.add_argument("--min-time", type=float, default=0.005, help="seconds per sample (default 0.005)")
+    parser.add_argument("--parser", choices=("pratt", "lark"), default="pratt")
+    parser.add_argument("--workload", action="append", help="only these workloads (repeatable)")
+    parser.add_argument("--save", type=Path, help="write results as a JSON baseline")
+    parser.add_argument("--baseline", type=Path, help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="allowed slowdown of the median, as a fraction (default 0.15)")
+    args = parser.parse_args(argv)
+
+    workloads = {"yaml": yaml_items(), **synthetic_workloads()}
+    if args.workload:
+        workloads = {name: workloads[name] for name in args.workload}
+
+    results: Dict[str, Dict[str, float]] = {}
+    print(f"{'workload/stage':<28}{'ops/s':>12}{'p50 us':>11}{'p90 us':>11}{'p99 us':>11}")
+    for name, items in workloads.items():
+        for stage, fn in stages(items, args.parser).items():
+            key = f"{name}/{stage}"
+            results[key] = r = measure(fn, len(items), args.samples, args.min_time)
+            print(f"{key:<28}{r['ops_per_s']:>12,.0f}{r['p50_us']:>11.2f}{r['p90_us']:>11.2f}{r['p99_us']:>11.2f}")
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        meta = {"python": platform.python_version(), "machine": platform.machine(),
+                "parser": args.parser, "created": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        args.save.write_text(json.dumps({"meta": meta, "results": results}, indent=2) + "\n")
+        print(f"saved {args.save}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nno regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
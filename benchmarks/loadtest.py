@@ -0,0 +1,317 @@
+"""Closed-loop load generator for the REST, MCP HTTP and MCP stdio servers.
+
+``--concurrency`` workers each send a request, wait for the answer and
+send the next, for ``--duration`` seconds per level.  Requests are drawn
+from the YAML cases under ``tests/`` (``--mix valid`` or ``all``, which
+includes the cases that are expected to fail).  Sweeping several
+concurrency levels (``--concurrency 1,4,16,64``) shows where throughput
+stops growing and latency starts to climb.
+
+Transports and targets:
+
+* ``rest``  -- ``POST /evaluate`` on ``app.main:app``
+* ``mcp``   -- JSON-RPC ``tools/call`` on ``server.main:app``
+* ``stdio`` -- framed JSON-RPC to a ``stdio_server.py`` subprocess
+  (``--concurrency`` is the number of pipelined, unanswered requests)
+
+HTTP transports run ``--target inprocess`` (an ASGI transport in this
+process: no sockets, but client and server share one CPU) or
+``--target localhost`` (``--url`` of a running server, or a uvicorn
+subprocess started on a free port).
+
+Outcomes are counted as ``ok``, ``error`` (an error answer from the
+server, e.g. a calculation error) or ``failed`` (5xx, transport errors,
+timeouts).  Repeated requests are answered by the result cache;
+``--unique`` adds a distinct unused variable to every request to defeat it.
+
+Usage (from the repository root)::
+
+    python benchmarks/loadtest.py mcp --concurrency 1,8,32 --duration 5
+    python benchmarks/loadtest.py stdio --concurrency 1,16 --unique
+    python benchmarks/loadtest.py rest --target localhost --url http://127.0.0.1:8000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import random
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+import yaml
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+OK, ERROR, FAILED = "ok", "error", "failed"
+
+
+class Case(NamedTuple):
+    expr: str
+    variables: Dict[str, Any]
+
+
+def load_mix(mix: str) -> List[Case]:
+    """YAML cases as request templates; ``valid`` drops the expected failures."""
+    cases = []
+    for file in sorted((ROOT / "tests").glob("*.yaml")):
+        data = yaml.safe_load(file.read_text())
+        sections = {"": data} if isinstance(data, list) else data
+        for section, entries in sections.items():
+            for entry in entries:
+                if not isinstance(entry, dict) or "expr" not in entry:
+                    continue
+                if mix == "valid" and (section == "errors" or "error" in entry):
+                    continue
+                variables = {k: str(v) for k, v in (entry.get("vars") or {}).items()}
+                cases.append(Case(entry["expr"], variables))
+    return cases
+
+
+# --------------------------------------------------------------------------
+# Clients: send one case, return its outcome
+# --------------------------------------------------------------------------
+
+class HttpClient:
+    """``rest`` or ``mcp`` over an httpx AsyncClient (ASGI or real sockets)."""
+
+    def __init__(self, transport: str, client: Any) -> None:
+        self.transport = transport
+        self.client = client
+        self._ids = itertools.count()
+
+    async def send(self, case: Case) -> str:
+        if self.transport == "rest":
+            response = await self.client.post("/evaluate", json={"expr": case.expr, "variables": case.variables})
+            if response.status_code == 200:
+                return OK
+            return ERROR if response.status_code < 500 else FAILED
+        message = {"jsonrpc": "2.0", "id": next(self._ids), "method": "tools/call",
+                   "params": {"name": "calc.evaluate",
+                              "arguments": {"expr": case.expr, "variables": case.variables}}}
+        response = await self.client.post("/", json=message)
+        if response.status_code >= 500:
+            return FAILED
+        return OK if "result" in response.json() else ERROR
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class StdioClient:
+    """Pipelined requests to a stdio server subprocess, matched by id."""
+
+    def __init__(self, proc: asyncio.subprocess.Process) -> None:
+        self.proc = proc
+        self._ids = itertools.count()
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._reader = asyncio.create_task(self._read())
+
+    @classmethod
+    async def start(cls) -> "StdioClient":
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, "stdio_server.py", cwd=ROOT, limit=1 << 24,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+        return cls(proc)
+
+    async def _read(self) -> None:
+        stdout = self.proc.stdout
+        while True:
+            header = await stdout.readline()
+            if not header:
+                break
+            if not header.lower().startswith(b"content-length:"):
+                continue
+            length = int(header.split(b":")[1])
+            await stdout.readline()
+            response = json.loads(await stdout.readexactly(length))
+            future = self._pending.pop(response.get("id"), None)
+            if future is not None and not future.done():
+                future.set_result(response)
+        for future in self._pending.values():
+            future.set_exception(ConnectionError("stdio server exited"))
+
+    async def send(self, case: Case) -> str:
+        request_id = next(self._ids)
+        message = {"jsonrpc": "2.0", "id": request_id, "method": "tools/call",
+                   "params": {"name": "calc.evaluate",
+                              "arguments": {"expr": case.expr, "variables": case.variables}}}
+        body = json.dumps(message).encode()
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self.proc.stdin.write(b"Content-Length: %d\r\n\r\n" % len(body) + body)
+        await self.proc.stdin.drain()
+        response = await future
+        return OK if "result" in response else ERROR
+
+    async def close(self) -> None:
+        self.proc.stdin.close()
+        await self.proc.wait()
+        self._reader.cancel()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def open_client(transport: str, target: str, url: Optional[str], log_level: str = "WARNING"):
+    """Return (client, cleanup callable or None)."""
+    if transport == "stdio":
+        client = await StdioClient.start()
+        await client.send(Case("1", {}))  # wait for startup
+        return client, None
+
+    import httpx
+
+    module = "app.main:app" if transport == "rest" else "server.main:app"
+    if target == "inprocess":
+        import importlib
+
+        mod_name, attr = module.split(":")
+        app = getattr(importlib.import_module(mod_name), attr)
+        # The server's request logging would interleave with the report.
+        logging.getLogger().setLevel(log_level)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://inprocess")
+        return HttpClient(transport, client), None
+
+    server = None
+    if url is None:
+        port = _free_port()
+        url = f"http://127.0.0.1:{port}"
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", module, "--port", str(port), "--log-level", "warning"],
+            cwd=ROOT,
+        )
+        deadline = time.monotonic() + 20
+        while True:
+            try:
+                httpx.get(f"{url}/healthz", timeout=1).raise_for_status()
+                break
+            except httpx.HTTPError:
+                if server.poll() is not None or time.monotonic() > deadline:
+                    server.kill()
+                    raise SystemExit(f"could not start {module} with uvicorn (is it installed?)")
+                time.sleep(0.1)
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    client = HttpClient(transport, httpx.AsyncClient(base_url=url, limits=limits, timeout=30))
+
+    def cleanup() -> None:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    return client, cleanup
+
+
+# --------------------------------------------------------------------------
+# Load loop
+# --------------------------------------------------------------------------
+
+class Level(NamedTuple):
+    concurrency: int
+    requests: int
+    seconds: float
+    latencies: List[float]
+    counts: Dict[str, int]
+
+    def percentile(self, p: float) -> float:
+        ordered = sorted(self.latencies)
+        if not ordered:
+            return float("nan")
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+async def run_level(client, cases: Sequence[Case], concurrency: int, duration: float,
+                    unique: bool, seed: int) -> Level:
+    rng = random.Random(seed)
+    serial = itertools.count()
+    latencies: List[float] = []
+    counts = {OK: 0, ERROR: 0, FAILED: 0}
+    stop = time.perf_counter() + duration
+
+    async def worker() -> None:
+        while time.perf_counter() < stop:
+            case = rng.choice(cases)
+            if unique:
+                case = Case(case.expr, {**case.variables, "_loadtest": str(next(serial))})
+            start = time.perf_counter()
+            try:
+                outcome = await asyncio.wait_for(client.send(case), timeout=30)
+            except Exception:  # noqa: BLE001 - every transport failure counts the same
+                outcome = FAILED
+            latencies.append(time.perf_counter() - start)
+            counts[outcome] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return Level(concurrency, len(latencies), time.perf_counter() - started, latencies, counts)
+
+
+async def run(args: argparse.Namespace) -> List[Level]:
+    cases = load_mix(args.mix)
+    client, cleanup = await open_client(args.transport, args.target, args.url, args.server_log_level)
+    levels = []
+    try:
+        await run_level(client, cases, max(args.concurrency), args.warmup, args.unique, seed=0)
+        for i, concurrency in enumerate(args.concurrency):
+            levels.append(await run_level(client, cases, concurrency, args.duration, args.unique, seed=i + 1))
+    finally:
+        await client.close()
+        if cleanup:
+            cleanup()
+    return levels
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("transport", choices=("rest", "mcp", "stdio"))
+    parser.add_argument("--target", choices=("inprocess", "localhost"), default="inprocess",
+                        help="for rest/mcp (default inprocess)")
+    parser.add_argument("--url", help="base URL of a running server (--target localhost)")
+    parser.add_argument("--concurrency", type=lambda s: [int(c) for c in s.split(",")], default=[1, 8, 32],
+                        help="comma-separated levels (default 1,8,32)")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per level (default 5)")
+    parser.add_argument("--warmup", type=float, default=1.0, help="seconds before measuring (default 1)")
+    parser.add_argument("--mix", choices=("valid", "all"), default="valid")
+    parser.add_argument("--unique", action="store_true", help="defeat the result cache")
+    parser.add_argument("--server-log-level", default="WARNING",
+                        help="root log level of an in-process server (default WARNING)")
+    parser.add_argument("--json", type=Path, help="also write the results as JSON")
+    args = parser.parse_args(argv)
+    if args.transport == "stdio" and args.target != "inprocess":
+        parser.error("--target applies to rest and mcp only")
+
+    levels = asyncio.run(run(args))
+
+    print(f"{args.transport} ({'stdio subprocess' if args.transport == 'stdio' else args.target}), "
+          f"mix={args.mix}{', unique' if args.unique else ''}")
+    print(f"{'conc':>5}{'requests':>10}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'error %':>9}{'failed %':>10}")
+    rows = []
+    for level in levels:
+        rps = level.requests / level.seconds
+        p50, p95, p99 = (level.percentile(p) * 1e3 for p in (50, 95, 99))
+        total = max(level.requests, 1)
+        error_pct = level.counts[ERROR] / total * 100
+        failed_pct = level.counts[FAILED] / total * 100
+        print(f"{level.concurrency:>5}{level.requests:>10}{rps:>10.0f}{p50:>9.2f}{p95:>9.2f}{p99:>9.2f}"
+              f"{error_pct:>9.2f}{failed_pct:>10.2f}")
+        rows.append({"concurrency": level.concurrency, "requests": level.requests, "rps": rps,
+                     "p50_ms": p50, "p95_ms": p95, "p99_ms": p99, **level.counts})
+    if args.json:
+        args.json.write_text(json.dumps({"transport": args.transport, "target": args.target,
+                                         "mix": args.mix, "unique": args.unique, "levels": rows}, indent=2) + "\n")
+    return 1 if any(level.counts[FAILED] for level in levels) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""Per-request cost of MCP request/response body logging.
+
+Simulates the logging a transport does for one ``tools/call`` round trip
+(request body, response body) and reports the time spent on the request
+path for each configuration:
+
+* ``off``      -- bodies not logged (WARNING level)
+* ``eager``    -- the previous style: f-string bodies, synchronous handler
+* ``queued``   -- :func:`server.logs.configure_logging` + :func:`log_body`
+* ``sampled``  -- as ``queued`` with ``--sample`` of requests logging bodies
+* ``json``     -- as ``queued`` with the JSON formatter
+
+``drain`` is the time until the background writer has flushed everything,
+i.e. the total work; the request path only pays ``per request``.
+
+Usage (from the repository root)::
+
+    python benchmarks/logging_overhead.py --requests 20000 --sample 0.1
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from server import logs  # noqa: E402
+
+logger = logging.getLogger("bench")
+
+
+def _bodies(i: int):
+    request = {"jsonrpc": "2.0", "id": i, "method": "tools/call",
+               "params": {"name": "calc.evaluate",
+                          "arguments": {"expr": "x*y+1", "variables": {"x": i, "y": 3}}}}
+    response = {"jsonrpc": "2.0", "id": i,
+                "result": {"content": [{"type": "text", "text": str(i * 3 + 1)}]}}
+    return request, response
+
+
+def _eager(count: int, sink) -> float:
+    root = logging.getLogger()
+    handler = logging.StreamHandler(sink)
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    root.handlers[:] = [handler]
+    root.setLevel(logging.INFO)
+    start = time.perf_counter()
+    for i in range(count):
+        request, response = _bodies(i)
+        logger.info(f"MCP-REQUEST-BODY: {request}")
+        logger.info(f"MCP-RESPONSE-BODY: {response}")
+    elapsed = time.perf_counter() - start
+    root.removeHandler(handler)
+    return elapsed
+
+
+def _queued(count: int, sink, rate: float, fmt: str, level: int = logging.INFO):
+    logs.BODY_SAMPLE_RATE = rate
+    logs.LOG_FORMAT = fmt
+    logs.configure_logging(stream=sink, level=level)
+    start = time.perf_counter()
+    for i in range(count):
+        request, response = _bodies(i)
+        if logs.sample():
+            logs.log_body(logger, "MCP-REQUEST-BODY", request)
+            logs.log_body(logger, "MCP-RESPONSE-BODY", response)
+    elapsed = time.perf_counter() - start
+    logs.stop_logging()
+    return elapsed, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--sample", type=float, default=0.1)
+    args = parser.parse_args()
+    n = args.requests
+
+    with open(os.devnull, "w") as sink:
+        rows = [
+            ("off", _queued(n, sink, 1.0, "text", logging.WARNING)),
+            ("eager", (_eager(n, sink),) * 2),
+            ("queued", _queued(n, sink, 1.0, "text")),
+            (f"sampled {args.sample:g}", _queued(n, sink, args.sample, "text")),
+            ("json", _queued(n, sink, 1.0, "json")),
+        ]
+    print(f"{'mode':<14}{'per request':>14}{'drain':>12}")
+    for name, (path, total) in rows:
+        print(f"{name:<14}{path / n * 1e6:>11.2f} us{total:>10.2f} s")
+
+
+if __name__ == "__main__":
+    main()
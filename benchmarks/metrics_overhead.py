@@ -0,0 +1,75 @@
+"""Per-event cost of recording metrics.
+
+Times each recording primitive of :mod:`calc_core.metrics` in a tight
+loop, against an empty loop of the same shape:
+
+* ``counter``   -- ``TOOL_CALLS.inc(tool)``
+* ``gauge``     -- ``IN_FLIGHT.inc()`` + ``IN_FLIGHT.dec()`` (two events)
+* ``histogram`` -- ``observe_ns`` of a precomputed duration
+* ``timed``     -- two ``perf_counter_ns()`` calls plus ``observe_ns``,
+  i.e. what an instrumented stage pays in total
+* ``render``    -- one ``/metrics`` scrape (not per event)
+
+Usage (from the repository root)::
+
+    python benchmarks/metrics_overhead.py --events 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from calc_core import calculate, metrics  # noqa: E402
+
+
+def _loop(events: int, fn) -> float:
+    """Seconds for *events* calls of *fn*."""
+    start = time.perf_counter()
+    for _ in range(events):
+        fn()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    counter, gauge, stage = metrics.TOOL_CALLS, metrics.IN_FLIGHT, metrics.EVALUATE
+    clock = metrics.perf_counter_ns
+
+    def timed() -> None:
+        start = clock()
+        stage.observe_ns(clock() - start)
+
+    def in_and_out() -> None:
+        gauge.inc()
+        gauge.dec()
+
+    cases = {
+        "counter": (lambda: counter.inc("calc.evaluate"), 1),
+        "gauge": (in_and_out, 2),
+        "histogram": (lambda: stage.observe_ns(12_345), 1),
+        "timed": (timed, 1),
+    }
+    empty = _loop(args.events, lambda: None)
+    print(f"{'event':<12}{'ns/event':>10}")
+    for name, (fn, per_call) in cases.items():
+        elapsed = _loop(args.events, fn)
+        print(f"{name:<12}{(elapsed - empty) / (args.events * per_call) * 1e9:>10.0f}")
+
+    for i in range(200):
+        calculate(f"x*{i}", x=1)
+    runs = 200
+    start = time.perf_counter()
+    for _ in range(runs):
+        metrics.render()
+    print(f"{'render':<12}{(time.perf_counter() - start) / runs * 1e6:>10.0f} us/scrape")
+
+
+if __name__ == "__main__":
+    main()
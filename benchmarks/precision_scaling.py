@@ -0,0 +1,97 @@
+"""How the cost of constants and elementary functions scales with digits.
+
+For each precision, times :mod:`calc_core.fixedpoint` (binary-splitting
+constants, AGM ``ln``, Newton ``exp``, ``isqrt`` square roots) against the
+libmpdec functions it replaces, plus ``calculate()`` end to end for a few
+expressions of ``x`` (``sin`` reduces its argument with the cached pi;
+variable-free expressions would be folded once per precision).  Constants
+are timed cold: the fixed-point caches are cleared before every sample.
+Columns are the best of ``--repeat`` runs, in milliseconds; libmpdec is
+skipped where a single call would exceed ``--libmpdec-limit`` digits (it
+takes seconds at 10,000 digits).  ``LN_DIGITS``, ``EXP_DIGITS`` and
+``SQRT_DIGITS`` in ``calc_core/fixedpoint.py`` are the crossovers this
+reports.
+
+Usage (from the repository root)::
+
+    python benchmarks/precision_scaling.py --digits 100 300 1000 3000 10000
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from decimal import Decimal, localcontext
+from pathlib import Path
+from typing import Callable, Optional, Sequence
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from calc_core import calculate, fixedpoint  # noqa: E402
+
+X = Decimal("1.2345678901234567")
+EXPRESSIONS = ("sqrt(x)", "exp(x)", "log(x)", "sin(x)", "sin(x*10000)", "x^1.5")
+
+
+def best(fn: Callable[[], object], repeat: int, setup: Callable[[], None] = lambda: None) -> float:
+    """Fastest of *repeat* runs of *fn*, in milliseconds."""
+    times = []
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1e3
+
+
+def at(digits: int, fn: Callable[[], object]) -> Callable[[], object]:
+    def run() -> object:
+        with localcontext() as ctx:
+            ctx.prec = digits
+            return fn()
+    return run
+
+
+def functions(digits: int, repeat: int, limit: int) -> None:
+    pairs = (
+        ("ln", fixedpoint.ln, Decimal.ln),
+        ("exp", fixedpoint.exp, Decimal.exp),
+        ("sqrt", fixedpoint.sqrt, Decimal.sqrt),
+    )
+    for name, fast, slow in pairs:
+        ours = best(at(digits, lambda: fast(X)), repeat)
+        theirs: Optional[float] = None
+        if digits <= limit or name == "sqrt":
+            theirs = best(at(digits, lambda: slow(X)), repeat)
+        report(digits, name, ours, theirs)
+    for name in ("pi", "e", "ln2", "ln10"):
+        ours = best(lambda: fixedpoint.constant_value(name, digits), repeat, setup=fixedpoint._best.clear)
+        report(digits, name, ours, None)
+
+
+def report(digits: int, name: str, ours: float, theirs: Optional[float]) -> None:
+    if theirs is None:
+        print(f"{digits:>8} {name:<14}{ours:>12.3f}{'-':>12}{'':>9}")
+    else:
+        print(f"{digits:>8} {name:<14}{ours:>12.3f}{theirs:>12.3f}{theirs / ours:>8.1f}x")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--digits", type=int, nargs="+", default=[50, 100, 300, 1000, 3000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--libmpdec-limit", type=int, default=3000,
+                        help="largest precision at which libmpdec ln/exp are timed (default 3000)")
+    args = parser.parse_args(argv)
+
+    print(f"{'digits':>8} {'operation':<14}{'fixed ms':>12}{'libmpdec ms':>12}{'speedup':>9}")
+    for digits in args.digits:
+        functions(digits, args.repeat, args.libmpdec_limit)
+        for expr in EXPRESSIONS:
+            ms = best(lambda: calculate(expr, precision=digits, x=X), args.repeat)
+            print(f"{digits:>8} {expr:<14}{ms:>12.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""Cold-start latency of the stdio MCP server.
+
+Each run launches ``stdio_server.py`` as a fresh subprocess (as an agent
+does at the start of every session), sends ``initialize`` immediately and
+then a first ``tools/call``, and records the time from spawn to each
+response.  ``python -c pass`` is timed the same way as the floor set by the
+interpreter itself.
+
+Usage (from the repository root)::
+
+    python benchmarks/stdio_startup.py --runs 15
+    python benchmarks/stdio_startup.py --runs 15 --max-initialize-ms 150  # fail if slower
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _frame(message: dict) -> bytes:
+    body = json.dumps(message).encode("utf-8")
+    return b"Content-Length: %d\r\n\r\n" % len(body) + body
+
+
+def _read_frame(stream) -> dict:
+    length = None
+    while True:
+        line = stream.readline()
+        if not line:
+            raise RuntimeError("server exited before responding")
+        line = line.strip()
+        if not line and length is not None:
+            return json.loads(stream.read(length))
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":")[1])
+
+
+INITIALIZE = {"jsonrpc": "2.0", "id": 1, "method": "initialize",
+              "params": {"protocolVersion": "2025-06-18", "capabilities": {}}}
+CALL = {"jsonrpc": "2.0", "id": 2, "method": "tools/call",
+        "params": {"name": "calc.evaluate", "arguments": {"expr": "sqrt(2)*sin(pi/7)"}}}
+
+
+def run_once() -> Tuple[float, float]:
+    """Return (ms to initialize response, ms to first tools/call response)."""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "stdio_server.py"], cwd=ROOT,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+    )
+    try:
+        proc.stdin.write(_frame(INITIALIZE))
+        proc.stdin.flush()
+        _read_frame(proc.stdout)
+        initialized = time.perf_counter()
+        proc.stdin.write(_frame(CALL))
+        proc.stdin.flush()
+        response = _read_frame(proc.stdout)
+        called = time.perf_counter()
+        if "result" not in response:
+            raise RuntimeError(f"tools/call failed: {response}")
+    finally:
+        proc.stdin.close()
+        proc.wait()
+    return (initialized - start) * 1e3, (called - start) * 1e3
+
+
+def interpreter_floor() -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return (time.perf_counter() - start) * 1e3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--max-initialize-ms", type=float, default=None,
+                        help="exit with status 1 if the median time to initialize exceeds this")
+    args = parser.parse_args()
+
+    run_once()  # populate OS file caches and the parser table cache
+    samples: List[Tuple[float, float]] = [run_once() for _ in range(args.runs)]
+    floor = statistics.median(interpreter_floor() for _ in range(args.runs))
+    init = statistics.median(s[0] for s in samples)
+    call = statistics.median(s[1] for s in samples)
+    print(f"python -c pass        {floor:8.1f} ms")
+    print(f"initialize response   {init:8.1f} ms")
+    print(f"first tools/call      {call:8.1f} ms")
+    if args.max_initialize_ms is not None and init > args.max_initialize_ms:
+        sys.exit(f"initialize took {init:.1f} ms > {args.max_initialize_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
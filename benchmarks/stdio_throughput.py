@@ -0,0 +1,108 @@
+"""Throughput/latency of the stdio MCP transport: concurrent vs. blocking loop.
+
+Starts ``stdio_server.py`` as a subprocess, writes all requests at once (a
+pipelining client) and timestamps each response as it arrives.  Every
+``--slow-every``-th request is an expensive high-precision power, so the
+blocking loop shows head-of-line blocking while the asyncio transport keeps
+answering the cheap ones.
+
+Usage (from the repository root)::
+
+    python benchmarks/stdio_throughput.py --requests 400 --slow-every 20
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _frame(message: dict) -> bytes:
+    body = json.dumps(message).encode("utf-8")
+    return b"Content-Length: %d\r\n\r\n" % len(body) + body
+
+
+def _requests(count: int, slow_every: int) -> List[dict]:
+    messages = []
+    for i in range(count):
+        if slow_every and i % slow_every == 0:
+            arguments = {"expr": "x^y", "variables": {"x": 2, "y": "0.5"}, "precision": 600}
+        else:
+            arguments = {"expr": "x*y+1", "variables": {"x": i, "y": 3}}
+        messages.append({
+            "jsonrpc": "2.0",
+            "id": i,
+            "method": "tools/call",
+            "params": {"name": "calc.evaluate", "arguments": arguments},
+        })
+    return messages
+
+
+def _read_responses(stream, count: int, arrived: Dict[int, float]) -> None:
+    while len(arrived) < count:
+        header = stream.readline()
+        if not header:
+            return
+        if not header.lower().startswith(b"content-length:"):
+            continue
+        length = int(header.split(b":")[1])
+        stream.readline()
+        response = json.loads(stream.read(length))
+        arrived[response["id"]] = time.perf_counter()
+
+
+def run(mode: List[str], messages: List[dict]) -> Dict[str, float]:
+    proc = subprocess.Popen(
+        [sys.executable, "stdio_server.py", *mode],
+        cwd=ROOT,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    # Warm up imports and caches before timing.
+    proc.stdin.write(_frame({"jsonrpc": "2.0", "id": "warm", "method": "tools/call",
+                             "params": {"name": "calc.evaluate", "arguments": {"expr": "1"}}}))
+    proc.stdin.flush()
+    warm: Dict[int, float] = {}
+    _read_responses(proc.stdout, 1, warm)
+
+    arrived: Dict[int, float] = {}
+    reader = threading.Thread(target=_read_responses, args=(proc.stdout, len(messages), arrived))
+    reader.start()
+    started = time.perf_counter()
+    proc.stdin.write(b"".join(_frame(m) for m in messages))
+    proc.stdin.flush()
+    reader.join()
+    elapsed = time.perf_counter() - started
+    proc.stdin.close()
+    proc.wait()
+
+    latencies = sorted((t - started) * 1000 for t in arrived.values())
+    return {
+        "requests_per_s": len(arrived) / elapsed,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--slow-every", type=int, default=20, help="0 disables slow requests")
+    args = parser.parse_args()
+    messages = _requests(args.requests, args.slow_every)
+    for label, mode in (("blocking", ["--blocking"]), ("asyncio", [])):
+        stats = run(mode, messages)
+        print(f"{label:9s} " + "  ".join(f"{k}={v:.1f}" for k, v in stats.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,27 @@ Provides `calculate(expr: str) -> Decimal` as public API.
 """
 from __future__ import annotations
 
-from decimal import Decimal, getcontext
+from decimal import Decimal, getcontext, localcontext
+from typing import Any, Dict, Iterator, List, Mapping, Sequence, Tuple, Union
 
-from .errors import CalcError
-from .parser import PARSER
-from .transformer import EvalTransformer
+from .cache import (
+    MISS,
+    CacheInfo,
+    ExpressionCache,
+    ResultCache,
+    ResultCacheInfo,
+    expression_cache,
+    result_cache,
+)
+from .compiler import CompiledExpression, parse
+from .config import MAX_PRECISION
+from .cost import check_work, estimate
+from .errors import BudgetExceeded, CalcError
+from .exact import evaluate_exact
+from .lists import Vector
+from .metrics import EVALUATE, REGISTRY, perf_counter_ns
+from .trace import Trace
+from .transformer import _coerce_variables
 
 # High precision (34 significant digits similar to IEEE 128-bit)
 PRECISION = 34
@@ -16,15 +32,34 @@ getcontext().prec = PRECISION
 
 MAX_ADJ_EXP = 999  # match test expectations (10^1000 should error)
 
+FLOAT64 = "float64"
 
-def _quantize(value: Decimal) -> Decimal:
-    """Normalize result and enforce magnitude limits.
+Precision = Union[int, str, None]
+
+
+def _resolve_precision(precision: Precision) -> int | str:
+    """Validate *precision*: None -> PRECISION, an int digit count, or FLOAT64."""
+    if precision is None:
+        return PRECISION
+    if precision == FLOAT64:
+        return FLOAT64
+    if isinstance(precision, int) and not isinstance(precision, bool) and 1 <= precision <= MAX_PRECISION:
+        return precision
+    raise CalcError(
+        f"Unsupported precision {precision!r}; expected 1..{MAX_PRECISION} digits or '{FLOAT64}'"
+    )
+
+
+def _quantize(value: Decimal | Vector) -> Decimal | Vector:
+    """Normalize result and enforce magnitude limits (elementwise for lists).
 
     Raises
     ------
     CalcError
         If the exponent magnitude exceeds MAX_ADJ_EXP.
     """
+    if type(value) is Vector:
+        return value.map(_quantize)
     if value.is_infinite():
         raise CalcError("Overflow")
     if value != 0 and abs(value.adjusted()) > MAX_ADJ_EXP:
@@ -32,28 +67,312 @@ def _quantize(value: Decimal) -> Decimal:
     return value.normalize()
 
 
-def calculate(expr: str, /, **variables) -> Decimal:
+def _evaluate(compiled: CompiledExpression, variables: Mapping[str, object]) -> Decimal | Vector:
+    if compiled.exact is not None:
+        value = evaluate_exact(compiled, variables)
+        if value is not None:
+            return value
+    return _quantize(compiled.evaluate(_coerce_variables(variables)))
+
+
+def calculate(expr: str, /, *, precision: Precision = None, **variables) -> Decimal | Vector | float:
     """Parse and evaluate the mathematical expression.
 
     Parameters
     ----------
     expr : str
         The mathematical expression to evaluate.
+    precision : int | "float64", optional
+        Significant digits for this call (default :data:`PRECISION`), or
+        ``"float64"`` to evaluate with NumPy doubles and return a ``float``.
     **variables : dict[str, Decimal]
-        Variables to substitute into the expression.
+        Variables to substitute into the expression.  A list or tuple of
+        numbers makes a list variable; expressions using lists evaluate to
+        a :class:`~calc_core.lists.Vector` unless reduced (``sum(v)``).
 
     Raises
     ------
     CalcError
-        On syntax or evaluation error.
+        On syntax or evaluation error; :class:`BudgetExceeded` (a subclass)
+        if the expression is estimated to be too expensive to evaluate
+        (see :mod:`calc_core.cost`).
+
+    Notes
+    -----
+    The compiled form of *expr* is kept in :data:`expression_cache`, so
+    repeated calls with the same text skip parsing entirely.
+
+    Decimal contexts are stored in a context variable, so a non-default
+    precision applies only to this call: concurrent threads and asyncio
+    tasks never observe each other's setting.
     """
+    prec = _resolve_precision(precision)
+    return _calculate(compile_expression(expr), prec, variables)
+
+
+def _calculate(compiled: CompiledExpression, prec: int | str, variables: Mapping[str, object]) -> Decimal | Vector | float:
+    start = perf_counter_ns()
     try:
-        tree = PARSER.parse(expr)
-        raw = EvalTransformer(variables=variables).transform(tree)
-        return _quantize(raw)
+        return _calculate_at(compiled, prec, variables)
+    finally:
+        EVALUATE.observe_ns(perf_counter_ns() - start)
+
+
+def _list_width(variables: Mapping[str, object]) -> int:
+    """Length of the longest list-valued variable (1 if there is none)."""
+    return max((len(v) for v in variables.values() if isinstance(v, (list, tuple))), default=1)
+
+
+def _calculate_at(compiled: CompiledExpression, prec: int | str, variables: Mapping[str, object]) -> Decimal | Vector | float:
+    if prec == FLOAT64:
+        from .vectorized import _NO_LISTS, evaluate_float64
+
+        if any(isinstance(v, (list, tuple)) for v in variables.values()):
+            raise CalcError(_NO_LISTS)
+
+        (value,) = evaluate_float64(compiled, {k: [v] for k, v in variables.items()}, size=1).to_list()
+        if isinstance(value, CalcError):
+            raise value
+        return value
+    try:
+        check_work(compiled.cost, prec, _list_width(variables) if variables else 1)
+        ctx = getcontext()
+        if ctx.prec == prec:
+            return _evaluate(compiled, variables)
+        # Also covers threads that start from decimal.DefaultContext (28 digits).
+        with localcontext(ctx) as local:
+            local.prec = prec
+            return _evaluate(compiled, variables)
     except CalcError:
         raise
     except Exception as exc:  # pragma: no cover
         raise CalcError(str(exc)) from exc
 
-__all__ = ["calculate", "CalcError", "PRECISION"]
+
+def calculate_cached(expr: str, /, *, precision: Precision = None, **variables) -> Decimal | Vector | float:
+    """:func:`calculate` through :data:`result_cache`.
+
+    Repeats of the same expression (up to whitespace and redundant signs),
+    precision and variable values are answered from the cache, including
+    repeats of a :class:`CalcError`.  Syntax errors are only reused for the
+    exact same text, since their messages point into it.
+    """
+    prec = _resolve_precision(precision)
+    key = result_cache.key(expr, prec, _coerce_variables(variables))
+    if key is None:
+        return calculate(expr, precision=prec, **variables)
+    value = result_cache.lookup(key, expr)
+    if value is not MISS:
+        return value
+    try:
+        compiled = compile_expression(expr)
+    except CalcError as ce:
+        result_cache.store(key, error=ce, text=expr)
+        raise
+    try:
+        value = _calculate(compiled, prec, variables)
+    except CalcError as ce:
+        result_cache.store(key, error=ce)
+        raise
+    result_cache.store(key, value)
+    return value
+
+
+def calculate_traced(
+    expr: str, /, *, precision: Precision = None, **variables
+) -> Tuple[Decimal | Vector | float, Dict[str, Any]]:
+    """:func:`calculate`, returning a trace of where the time went as well.
+
+    The caches are bypassed, so every stage runs and is timed: parse,
+    compile, evaluate, quantize and total.  The trace also reports tree size
+    and depth (as parsed and as optimized), the estimated work, per-function
+    call counts and times, and the trig series lengths (see
+    :class:`calc_core.trace.Trace`).  Tracing slows evaluation down; use it
+    to investigate a slow expression, not on every request.
+
+    Raises
+    ------
+    CalcError
+        As :func:`calculate`.
+    """
+    trace = Trace()
+    with trace.activate(), trace.stage("total"):
+        prec = _resolve_precision(precision)
+        try:
+            with trace.stage("parse"):
+                tree = parse(expr)
+            with trace.stage("compile"):
+                compiled = CompiledExpression(expr, tree, instrument=trace.wrap_call)
+        except CalcError:
+            raise
+        except Exception as exc:
+            raise CalcError(str(exc)) from exc
+        parsed = estimate(tree)
+        trace.info.update(
+            precision=prec,
+            nodes=parsed.nodes,
+            depth=parsed.depth,
+            optimized_nodes=compiled.cost.nodes,
+            optimized_depth=compiled.cost.depth,
+        )
+        if prec == FLOAT64:
+            with trace.stage("evaluate"):
+                value = _calculate_at(compiled, prec, variables)
+        else:
+            trace.info["estimated_work"] = round(compiled.cost.work(prec), 3)
+            check_work(compiled.cost, prec, _list_width(variables))
+            try:
+                with localcontext() as ctx:
+                    ctx.prec = prec
+                    env = _coerce_variables(variables)
+                    with trace.stage("evaluate"):
+                        raw = compiled.evaluate(env)
+                    with trace.stage("quantize"):
+                        value = _quantize(raw)
+            except CalcError:
+                raise
+            except Exception as exc:  # pragma: no cover
+                raise CalcError(str(exc)) from exc
+    return value, trace.as_dict()
+
+
+def compile_expression(expr: str) -> CompiledExpression:
+    """Return the cached compiled form of *expr*.
+
+    Raises
+    ------
+    CalcError
+        If *expr* is not syntactically valid.
+    """
+    try:
+        return expression_cache.get(expr)
+    except CalcError:
+        raise
+    except Exception as exc:
+        raise CalcError(str(exc)) from exc
+
+
+@REGISTRY.add_collector
+def _cache_metrics():
+    """Hit, miss and eviction counters of both caches, read at render time."""
+    for prefix, info in (("calc_expression_cache", expression_cache.info()), ("calc_result_cache", result_cache.info())):
+        yield f"{prefix}_hits_total", "counter", "Lookups answered from the cache.", [("", {}, info.hits)]
+        yield f"{prefix}_misses_total", "counter", "Lookups not found in the cache.", [("", {}, info.misses)]
+        yield f"{prefix}_evictions_total", "counter", "Entries dropped to stay within maxsize.", [("", {}, info.evictions)]
+        yield f"{prefix}_size", "gauge", "Entries currently cached.", [("", {}, info.currsize)]
+        lookups = info.hits + info.misses
+        yield f"{prefix}_hit_ratio", "gauge", "Hits / lookups since start.", [("", {}, info.hits / lookups if lookups else 0.0)]
+    info = result_cache.info()
+    yield "calc_result_cache_error_hits_total", "counter", "Hits that re-raised a cached error.", [("", {}, info.error_hits)]
+    yield "calc_result_cache_expirations_total", "counter", "Entries dropped after their TTL.", [("", {}, info.expirations)]
+
+
+Rows = Union[Sequence[Mapping[str, object]], Mapping[str, Sequence[object]]]
+
+
+def _iter_rows(rows_or_columns: Rows) -> Iterator[Mapping[str, object]]:
+    """Yield one variable mapping per row from row- or column-oriented input."""
+    if isinstance(rows_or_columns, Mapping):
+        lengths = {len(col) for col in rows_or_columns.values()}
+        if len(lengths) > 1:
+            raise CalcError("All variable columns must have the same length")
+        names = list(rows_or_columns)
+        columns = [rows_or_columns[n] for n in names]
+        for i in range(lengths.pop() if lengths else 0):
+            yield {n: col[i] for n, col in zip(names, columns)}
+    else:
+        yield from rows_or_columns
+
+
+def calculate_many(
+    expr: str,
+    rows_or_columns: Rows,
+    /,
+    *,
+    precision: Precision = None,
+) -> List[Union[Decimal, float, CalcError]]:
+    """Evaluate one expression over many variable bindings.
+
+    The expression is parsed and compiled once; each row is then evaluated
+    independently, so a failing row does not stop the batch.
+
+    Parameters
+    ----------
+    expr : str
+        The mathematical expression to evaluate.
+    rows_or_columns : list[dict] | dict[str, list]
+        Either a sequence of variable mappings (one per row) or a mapping of
+        variable name to a column of values; all columns must be equally long.
+    precision : int | "float64", optional
+        Significant digits for every row (default :data:`PRECISION`), or
+        ``"float64"`` to evaluate all rows at once with vectorized NumPy
+        operations and yield floats; error rules are the same per row.
+
+    Returns
+    -------
+    list[Decimal | float | CalcError]
+        One entry per row, in input order: the result, or the error raised
+        while evaluating that row.
+
+    Raises
+    ------
+    CalcError
+        If *expr* has a syntax error, exceeds the evaluation budget, or the
+        columns differ in length.
+    """
+    prec = _resolve_precision(precision)
+    compiled = compile_expression(expr)
+    start = perf_counter_ns()
+    try:
+        return _calculate_many(compiled, rows_or_columns, prec)
+    finally:
+        EVALUATE.observe_ns(perf_counter_ns() - start)
+
+
+def _calculate_many(
+    compiled: CompiledExpression, rows_or_columns: Rows, prec: int | str
+) -> List[Union[Decimal, float, CalcError]]:
+    if prec == FLOAT64:
+        from .vectorized import columns_from_rows, evaluate_float64
+
+        if isinstance(rows_or_columns, Mapping):
+            return evaluate_float64(compiled, rows_or_columns).to_list()
+        return evaluate_float64(compiled, columns_from_rows(rows_or_columns), size=len(rows_or_columns)).to_list()
+
+    check_work(compiled.cost, prec)
+    results: List[Union[Decimal, CalcError]] = []
+    with localcontext() as ctx:
+        ctx.prec = prec
+        for row in _iter_rows(rows_or_columns):
+            try:
+                width = _list_width(row)
+                if width > 1:
+                    check_work(compiled.cost, prec, width)
+                results.append(_evaluate(compiled, row))
+            except CalcError as ce:
+                results.append(ce)
+            except Exception as exc:  # noqa: BLE001
+                results.append(CalcError(str(exc)))
+    return results
+
+
+__all__ = [
+    "calculate",
+    "calculate_cached",
+    "calculate_traced",
+    "calculate_many",
+    "compile_expression",
+    "BudgetExceeded",
+    "CalcError",
+    "CacheInfo",
+    "CompiledExpression",
+    "ExpressionCache",
+    "ResultCache",
+    "ResultCacheInfo",
+    "Vector",
+    "expression_cache",
+    "result_cache",
+    "FLOAT64",
+    "MAX_PRECISION",
+    "PRECISION",
+]
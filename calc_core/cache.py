@@ -0,0 +1,302 @@
+"""Bounded, thread-safe LRU caches: compiled expressions and results."""
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from decimal import Decimal
+from typing import Any, Hashable, Iterable, Mapping, NamedTuple, Optional, Tuple
+
+from .compiler import CompiledExpression, compile_expression
+from .config import EXPR_CACHE_SIZE, RESULT_CACHE_SIZE, RESULT_CACHE_TTL
+from .errors import CalcError
+from .lists import Vector
+
+
+class CacheInfo(NamedTuple):
+    """Snapshot of cache statistics (mirrors ``functools`` ``cache_info``)."""
+
+    hits: int
+    misses: int
+    evictions: int
+    currsize: int
+    maxsize: int
+
+
+class ExpressionCache:
+    """LRU mapping of expression text to :class:`CompiledExpression`.
+
+    Compilation happens outside the lock, so a slow parse never blocks
+    lookups of other expressions; if two threads miss on the same text at
+    once, both compile and the first stored entry wins.
+    """
+
+    def __init__(self, maxsize: int = EXPR_CACHE_SIZE) -> None:
+        if maxsize < 0:
+            raise ValueError("maxsize must be >= 0")
+        self._maxsize = maxsize
+        self._data: OrderedDict[str, CompiledExpression] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, expr: str) -> CompiledExpression:
+        """Return the compiled form of *expr*, compiling it on a miss.
+
+        Raises
+        ------
+        Exception
+            Whatever the parser raises for invalid input; failures are not cached.
+        """
+        with self._lock:
+            compiled = self._data.get(expr)
+            if compiled is not None:
+                self._data.move_to_end(expr)
+                self._hits += 1
+                return compiled
+            self._misses += 1
+
+        compiled = compile_expression(expr)
+        if self._maxsize == 0:
+            return compiled
+
+        with self._lock:
+            existing = self._data.get(expr)
+            if existing is not None:
+                return existing
+            self._data[expr] = compiled
+            while len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+                self._evictions += 1
+        return compiled
+
+    def warm(self, exprs: Iterable[str]) -> int:
+        """Pre-compile *exprs*; return how many were valid.
+
+        Invalid expressions are skipped so a stale warm-up list cannot
+        prevent startup.
+        """
+        count = 0
+        for expr in exprs:
+            try:
+                self.get(expr)
+            except Exception:  # noqa: BLE001 - syntax errors are skipped
+                continue
+            count += 1
+        return count
+
+    def clear(self) -> None:
+        """Drop all entries and reset statistics."""
+        with self._lock:
+            self._data.clear()
+            self._hits = self._misses = self._evictions = 0
+
+    def resize(self, maxsize: int) -> None:
+        """Change the capacity, evicting least recently used entries if needed."""
+        if maxsize < 0:
+            raise ValueError("maxsize must be >= 0")
+        with self._lock:
+            self._maxsize = maxsize
+            while len(self._data) > maxsize:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def info(self) -> CacheInfo:
+        """Return current hit/miss/eviction counters."""
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._evictions, len(self._data), self._maxsize)
+
+    def __contains__(self, expr: object) -> bool:
+        with self._lock:
+            return expr in self._data
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+# Process-wide cache used by `calc_core.calculate` and the servers.
+expression_cache = ExpressionCache()
+
+
+# ---------------------------------------------------------------------------
+# Result cache
+# ---------------------------------------------------------------------------
+
+# Mirrors the lexer in parser.py: NUMBER, FUNC (CNAME), ignored WS_INLINE,
+# and any other single character verbatim.
+_TOKEN = re.compile(r"[ \t]+|([0-9]+(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?|[A-Za-z_][A-Za-z0-9_]*|.)", re.S)
+# Tokens after which a sign sequence is a (grammatical) unary prefix.
+_SIGN_CONTEXT = {None, "(", "[", ",", "+", "-"}
+_OPERAND = re.compile(r"[0-9A-Za-z_(\[]")
+
+
+@lru_cache(maxsize=4096)
+def canonical_expression(expr: str) -> str:
+    """Return a whitespace-insensitive form of *expr* with sign runs collapsed.
+
+    Expressions with the same canonical form build the same tree: whitespace
+    only separates tokens, and a run of unary signs reduces to its parity
+    exactly as ``signed`` in the tree builder does (``--x`` and ``+x``
+    become ``x``, ``+-x`` becomes ``-x``).  Sign runs the grammar rejects
+    (``2*--3``) are kept verbatim so they still fail.
+    """
+    tokens = [t for t in _TOKEN.findall(expr) if t]
+    out: list[str] = []
+    prev: Optional[str] = None
+    i = 0
+    while i < len(tokens):
+        tok = tokens[i]
+        if tok in ("+", "-") and prev in _SIGN_CONTEXT:
+            j = i
+            while j < len(tokens) and tokens[j] in ("+", "-"):
+                j += 1
+            if j < len(tokens) and _OPERAND.match(tokens[j]):
+                if tokens[i:j].count("-") % 2:
+                    out.append("-")
+                prev = tokens[j - 1]
+                i = j
+                continue
+        out.append(tok)
+        prev = tok
+        i += 1
+    return " ".join(out)
+
+
+class ResultCacheInfo(NamedTuple):
+    """Snapshot of :class:`ResultCache` statistics.
+
+    ``error_hits`` counts the hits (included in ``hits``) that re-raised a
+    cached :class:`CalcError`.
+    """
+
+    hits: int
+    error_hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    currsize: int
+    maxsize: int
+    ttl: float
+
+
+class _Entry(NamedTuple):
+    expires: float
+    value: Any
+    error: Optional[Tuple[type, tuple]]
+    # Set for syntax errors, whose messages quote positions in the raw text.
+    text: Optional[str]
+
+
+MISS = object()
+
+
+class ResultCache:
+    """LRU + TTL cache of evaluation outcomes, including :class:`CalcError`\\ s.
+
+    Keys come from :meth:`key`: the canonical expression, the precision and
+    the variable values compared as Decimals (``1``, ``1.0`` and ``"1.00"``
+    are the same key).  Failures are cached as the error class and
+    arguments and re-raised as a fresh exception on each hit.
+    """
+
+    def __init__(self, maxsize: int = RESULT_CACHE_SIZE, ttl: float = RESULT_CACHE_TTL) -> None:
+        if maxsize < 0:
+            raise ValueError("maxsize must be >= 0")
+        if ttl < 0:
+            raise ValueError("ttl must be >= 0")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = self._error_hits = self._misses = 0
+        self._evictions = self._expirations = 0
+
+    @staticmethod
+    def key(expr: str, precision: int | str, variables: Mapping[str, Decimal | Vector]) -> Optional[Hashable]:
+        """Return the cache key, or None if the call must not be cached (NaN values)."""
+        items = []
+        for name, value in variables.items():
+            if type(value) is Vector:
+                if any(x.is_nan() for x in value):
+                    return None
+                items.append((name, value, tuple(x.is_signed() for x in value)))
+                continue
+            if value.is_nan():
+                return None
+            # -0 and 0 compare equal but can print differently.
+            items.append((name, value, value.is_signed()))
+        items.sort(key=lambda item: item[0])
+        return canonical_expression(expr), precision, tuple(items)
+
+    def lookup(self, key: Hashable, expr: str) -> Any:
+        """Return the cached value for *key*, raise its cached error, or return :data:`MISS`."""
+        if not self.maxsize:
+            return MISS
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and self.ttl and entry.expires <= time.monotonic():
+                del self._data[key]
+                self._expirations += 1
+                entry = None
+            if entry is None or (entry.text is not None and entry.text != expr):
+                self._misses += 1
+                return MISS
+            self._data.move_to_end(key)
+            self._hits += 1
+            if entry.error is not None:
+                self._error_hits += 1
+        if entry.error is not None:
+            cls, args = entry.error
+            raise cls(*args)
+        return entry.value
+
+    def store(self, key: Hashable, value: Any = None, error: Optional[CalcError] = None,
+              text: Optional[str] = None) -> None:
+        """Cache *value*, or *error* if given; *text* ties the entry to that exact input."""
+        if not self.maxsize:
+            return
+        expires = time.monotonic() + self.ttl
+        saved = (type(error), error.args) if error is not None else None
+        with self._lock:
+            self._data[key] = _Entry(expires, value, saved, text)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries and reset statistics."""
+        with self._lock:
+            self._data.clear()
+            self._hits = self._error_hits = self._misses = 0
+            self._evictions = self._expirations = 0
+
+    def info(self) -> ResultCacheInfo:
+        """Return current hit/miss/eviction/expiration counters."""
+        with self._lock:
+            return ResultCacheInfo(
+                self._hits, self._error_hits, self._misses, self._evictions,
+                self._expirations, len(self._data), self.maxsize, self.ttl,
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+# Process-wide result cache used by `calc_core.calculate_cached`.
+result_cache = ResultCache()
+
+__all__ = [
+    "CacheInfo",
+    "ExpressionCache",
+    "ResultCache",
+    "ResultCacheInfo",
+    "canonical_expression",
+    "expression_cache",
+    "result_cache",
+]
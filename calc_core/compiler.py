@@ -0,0 +1,322 @@
+"""Compile expression ASTs into reusable Python closures.
+
+A compiled expression is a tree of closures mirroring the AST; evaluating it
+is a handful of direct calls with no parsing or tree walking.  Semantics
+(including error messages and evaluation order) follow
+:class:`calc_core.transformer.EvalTransformer` exactly.
+
+:class:`CompiledExpression` compiles the tree produced by
+:func:`calc_core.optimizer.optimize`: variable-free subtrees are evaluated
+once per precision and shared subtrees once per call.
+"""
+from __future__ import annotations
+
+import operator
+from decimal import Decimal, getcontext
+from typing import Callable, Dict, FrozenSet, Mapping, Optional
+
+from . import lists, pratt
+from .config import PARSER
+from .constants import constant
+from .cost import check_structure, estimate
+from .errors import CalcError
+from .metrics import COMPILE, PARSE, perf_counter_ns
+from .nodes import AstBuilder, BinOp, Call, Name, Neg, Node, Num, Pos, Vec, postorder
+from .optimizer import analyze, optimize
+from .parser import get_parser
+from .transformer import CONSTANTS, _FUNCS, _log
+
+Env = Mapping[str, Decimal]
+Evaluator = Callable[[Env], Decimal]
+# Wraps the closure of each function call, e.g. Trace.wrap_call: (name, fn) -> fn.
+Instrument = Callable[[str, Evaluator], Evaluator]
+
+_AST_BUILDER = AstBuilder()
+
+
+def parse_lark(expr: str) -> Node:
+    """Parse *expr* with the Lark grammar and lower it to an AST."""
+    return _AST_BUILDER.transform(get_parser().parse(expr))
+
+
+def parse(expr: str, parser: str = PARSER) -> Node:
+    """Parse *expr* into an AST with the configured front end (``CALC_PARSER``).
+
+    Both front ends accept the same language and build equal trees; only
+    their syntax error messages differ.
+    """
+    if parser == "lark":
+        return parse_lark(expr)
+    return pratt.parse(expr)
+
+
+def free_names(node: Node) -> FrozenSet[str]:
+    """Return identifiers in *node* that must be supplied as variables."""
+    names: set[str] = set()
+    stack = [node]
+    while stack:
+        n = stack.pop()
+        if isinstance(n, Name):
+            if n.id not in CONSTANTS:
+                names.add(n.id)
+        elif isinstance(n, BinOp):
+            stack.extend((n.left, n.right))
+        elif isinstance(n, (Neg, Pos)):
+            stack.append(n.operand)
+        elif isinstance(n, Call):
+            stack.extend(n.args)
+        elif isinstance(n, Vec):
+            stack.extend(n.items)
+    return frozenset(names)
+
+
+# ---------- node compilers ----------
+
+def _compile_name(node: Name) -> Evaluator:
+    name = node.id
+    if name in CONSTANTS:
+        # Resolved per call: the value depends on the active precision.
+        return lambda env: constant(name)
+
+    def lookup(env: Env) -> Decimal:
+        try:
+            return env[name]
+        except KeyError:
+            raise CalcError(f"Unknown identifier '{name}'") from None
+
+    return lookup
+
+
+def _compile_binop(node: BinOp, compile_child: Callable[[Node], Evaluator]) -> Evaluator:
+    left = compile_child(node.left)
+    right = compile_child(node.right)
+    op = node.op
+    if op == "+":
+        return lambda env: left(env) + right(env)
+    if op == "-":
+        return lambda env: left(env) - right(env)
+    if op == "*":
+        return lambda env: left(env) * right(env)
+    if op == "/":
+        def div(env: Env) -> Decimal:
+            a = left(env)
+            b = right(env)
+            if b == 0:
+                raise CalcError("Division by zero")
+            return a / b
+        return div
+    if op == "^":
+        exponent = node.right
+        raise_ = lists.power
+        if isinstance(exponent, Num) and exponent.value == exponent.value.to_integral_value():
+            raise_ = operator.pow  # x^2: never the fixed-point path, skip its checks
+
+        def pow_(env: Env) -> Decimal:
+            a = left(env)
+            b = right(env)
+            try:
+                return raise_(a, b)
+            except (OverflowError, ValueError):
+                raise CalcError("Power overflow")
+        return pow_
+    raise CalcError(f"Unknown operator '{op}'")
+
+
+def _compile_call(node: Call, compile_child: Callable[[Node], Evaluator]) -> Evaluator:
+    name = node.name
+    args = [compile_child(a) for a in node.args]
+
+    Vector = lists.Vector
+    if name == "log":
+        if len(args) == 1:
+            (x,) = args
+
+            def log(env: Env) -> Decimal:
+                v = x(env)
+                return v.map(_log) if type(v) is Vector else _log(v)
+            return log
+        if len(args) == 2:
+            x, base = args
+            return lambda env: lists.apply(_log, x(env), base(env))
+        message = "log() takes 1 or 2 arguments"
+    elif name in lists.REDUCTIONS:
+        reduce = lists.reduce
+        if args:
+            return lambda env: reduce(name, [a(env) for a in args])
+        message = f"{name}() takes at least 1 argument"
+    elif len(args) != 1:
+        message = f"{name}() takes exactly 1 argument"
+    elif name not in _FUNCS:
+        message = f"Unknown function '{name}'"
+    else:
+        func = _FUNCS[name]
+        (x,) = args
+
+        def call(env: Env) -> Decimal:
+            v = x(env)
+            return v.map(func) if type(v) is Vector else func(v)
+        return call
+
+    # Arguments are still evaluated first so that error precedence matches
+    # the bottom-up EvalTransformer.
+    def invalid(env: Env) -> Decimal:
+        for a in args:
+            a(env)
+        raise CalcError(message)
+
+    return invalid
+
+
+def _compile(node: Node, compile_child: Callable[[Node], Evaluator]) -> Evaluator:
+    """Compile one node, delegating its children to *compile_child*."""
+    if isinstance(node, Num):
+        value = node.value
+        return lambda env: value
+    if isinstance(node, Name):
+        return _compile_name(node)
+    if isinstance(node, BinOp):
+        return _compile_binop(node, compile_child)
+    if isinstance(node, Neg):
+        operand = compile_child(node.operand)
+        return lambda env: -operand(env)
+    if isinstance(node, Pos):
+        operand = compile_child(node.operand)
+        return lambda env: +operand(env)
+    if isinstance(node, Call):
+        return _compile_call(node, compile_child)
+    if isinstance(node, Vec):
+        if any(isinstance(item, Vec) for item in node.items):
+            raise CalcError("Lists cannot be nested")
+        items = [compile_child(item) for item in node.items]
+        make_vector = lists.make_vector
+        return lambda env: make_vector([item(env) for item in items])
+    raise TypeError(f"Unsupported node {node!r}")
+
+
+def compile_node(node: Node) -> Evaluator:
+    """Compile an AST node into a closure ``f(variables) -> Decimal``."""
+    # Children before parents, so deep trees do not recurse while compiling.
+    done: Dict[int, Evaluator] = {}
+    for n in postorder(node):
+        done[id(n)] = _compile(n, lambda child: done[id(child)])
+    return done[id(node)]
+
+
+def _folded(fn: Evaluator) -> Evaluator:
+    """Evaluate a variable-free closure once per precision.
+
+    Errors are not cached, so e.g. ``1/0`` keeps raising on every call.
+    """
+    values: Dict[int, Decimal] = {}
+
+    def constant_value(env: Env) -> Decimal:
+        prec = getcontext().prec
+        try:
+            return values[prec]
+        except KeyError:
+            value = values[prec] = fn(env)
+            return value
+
+    return constant_value
+
+
+def _shared(fn: Evaluator, slot: int) -> Evaluator:
+    """Evaluate a repeated subexpression once per call, keeping it in *env*."""
+
+    def shared_value(env: Dict) -> Decimal:
+        try:
+            return env[slot]
+        except KeyError:
+            value = env[slot] = fn(env)
+            return value
+
+    return shared_value
+
+
+class _OptimizingCompiler:
+    """Compile an optimized tree, folding constants and sharing subtrees."""
+
+    def __init__(self, tree: Node, instrument: Optional[Instrument] = None) -> None:
+        self.analysis = analyze(tree)
+        self.instrument = instrument
+        self.slots = 0
+        self._done: Dict[int, Evaluator] = {}
+        # Unfolded closures of variable-free nodes, used inside folded parents.
+        self._plain: Dict[int, Evaluator] = {}
+
+    def _compile_traced(self, node: Node, compile_child: Callable[[Node], Evaluator]) -> Evaluator:
+        fn = _compile(node, compile_child)
+        if self.instrument is not None and isinstance(node, Call):
+            fn = self.instrument(node.name, fn)
+        return fn
+
+    def _compile_one(self, node: Node) -> None:
+        key = id(node)
+        if key in self.analysis.pure:
+            fn = self._plain[key] = self._compile_traced(node, lambda child: self._plain[id(child)])
+            self._done[key] = fn if isinstance(node, (Num, Name)) else _folded(fn)
+            return
+        fn = self._compile_traced(node, lambda child: self._done[id(child)])
+        if not isinstance(node, Name) and self.analysis.refcounts.get(key, 0) > 1:
+            fn = _shared(fn, self.slots)
+            self.slots += 1
+        self._done[key] = fn
+
+    def compile(self, tree: Node) -> Evaluator:
+        """Compile children before parents, so deep trees do not recurse here."""
+        for node in postorder(tree):
+            self._compile_one(node)
+        return self._done[id(tree)]
+
+
+class CompiledExpression:
+    """A parsed and compiled expression, safe to share between threads.
+
+    *instrument*, if given, wraps the closure of every function call (see
+    :meth:`calc_core.trace.Trace.wrap_call`); such expressions are built
+    per traced request and never cached.
+    """
+
+    __slots__ = ("expr", "tree", "optimized", "names", "cost", "float64", "exact", "_fn", "_slots")
+
+    def __init__(self, expr: str, tree: Node, instrument: Optional[Instrument] = None) -> None:
+        self.expr = expr
+        # `tree` is the parse as written; `optimized` is what gets compiled.
+        self.tree = tree
+        self.optimized = optimize(tree)
+        self.names = free_names(tree)
+        # Size limits are enforced here; per-precision work at each call.
+        self.cost = estimate(self.optimized)
+        check_structure(self.cost)
+        # Lowered NumPy program, built on first float64 use (see vectorized.py).
+        self.float64 = None
+        # Native-int programs per precision, built on first use (see exact.py);
+        # None once the expression is known to always need Decimal.
+        self.exact = {} if instrument is None else None
+        compiler = _OptimizingCompiler(self.optimized, instrument)
+        self._fn = compiler.compile(self.optimized)
+        self._slots = compiler.slots
+
+    def evaluate(self, variables: Env) -> Decimal:
+        """Evaluate with already-coerced Decimal *variables* (unquantized)."""
+        if self._slots:
+            # Shared subexpressions are memoized in a per-call copy.
+            return self._fn(dict(variables))
+        return self._fn(variables)
+
+    def __repr__(self) -> str:
+        return f"CompiledExpression({self.expr!r})"
+
+
+def compile_expression(expr: str) -> CompiledExpression:
+    """Parse and compile *expr* without consulting any cache."""
+    start = perf_counter_ns()
+    tree = parse(expr)
+    parsed = perf_counter_ns()
+    compiled = CompiledExpression(expr, tree)
+    PARSE.observe_ns(parsed - start)
+    COMPILE.observe_ns(perf_counter_ns() - parsed)
+    return compiled
+
+
+__all__ = ["CompiledExpression", "compile_expression", "compile_node", "free_names", "parse", "parse_lark"]
@@ -0,0 +1,95 @@
+"""Runtime settings read from ``CALC_*`` environment variables."""
+from __future__ import annotations
+
+import os
+
+
+def env_int(name: str, default: int) -> int:
+    """Return the integer value of environment variable *name* or *default*."""
+    raw = os.environ.get(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        return int(raw)
+    except ValueError as exc:
+        raise ValueError(f"{name} must be an integer, got {raw!r}") from exc
+
+
+# Maximum number of compiled expressions kept by the default cache.
+EXPR_CACHE_SIZE = env_int("CALC_EXPR_CACHE_SIZE", 1024)
+
+# Upper bound for per-request `precision` (significant digits).
+MAX_PRECISION = env_int("CALC_MAX_PRECISION", 10_000)
+
+
+def env_float(name: str, default: float) -> float:
+    """Return the float value of environment variable *name* or *default*."""
+    raw = os.environ.get(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        return float(raw)
+    except ValueError as exc:
+        raise ValueError(f"{name} must be a number, got {raw!r}") from exc
+
+
+def env_choice(name: str, default: str, choices: tuple[str, ...]) -> str:
+    """Return environment variable *name* (lower-cased) if it is one of *choices*."""
+    raw = os.environ.get(name)
+    if raw is None or not raw.strip():
+        return default
+    value = raw.strip().lower()
+    if value not in choices:
+        raise ValueError(f"{name} must be one of {', '.join(choices)}, got {raw!r}")
+    return value
+
+
+# Where the servers run calculations: a "thread" or "process" pool, or
+# "inline" on the event loop (debugging only: slow expressions block it).
+EXECUTOR_KIND = env_choice("CALC_EXECUTOR", "thread", ("thread", "process", "inline"))
+
+# Worker count for the calculation pool; 0 picks a default for the pool kind.
+EXECUTOR_WORKERS = env_int("CALC_EXECUTOR_WORKERS", 0)
+
+# Evaluation budgets enforced by calc_core.cost (see there for the units).
+MAX_NODES = env_int("CALC_MAX_NODES", 10_000)
+MAX_DEPTH = env_int("CALC_MAX_DEPTH", 500)
+MAX_WORK = env_int("CALC_MAX_WORK", 1_000_000)
+
+# Result cache in front of evaluation (calc_core.calculate_cached): maximum
+# entries (0 disables it) and seconds an entry stays valid (0: no expiry).
+RESULT_CACHE_SIZE = env_int("CALC_RESULT_CACHE_SIZE", 4096)
+RESULT_CACHE_TTL = env_float("CALC_RESULT_CACHE_TTL", 300.0)
+
+# Serialized LALR tables for calc_core.parser: a file path, empty for Lark's
+# per-user temp file, or "off" to build the tables in every process.
+PARSER_CACHE = os.environ.get("CALC_PARSER_CACHE", "").strip()
+
+# Parser front end: "pratt" (calc_core.pratt, hand-written) or "lark".
+PARSER = env_choice("CALC_PARSER", "pratt", ("pratt", "lark"))
+
+# Admin operations (calc_core.profiling: profile the next N requests) are
+# only exposed by the servers when CALC_ADMIN=1; profiles are written to
+# CALC_PROFILE_DIR (default: a "calc-profiles" directory in the temp dir).
+ADMIN_ENABLED = env_int("CALC_ADMIN", 0) != 0
+PROFILE_DIR = os.environ.get("CALC_PROFILE_DIR", "").strip()
+
+# POST /evaluate/stream (app.main): evaluations in flight per stream (a
+# request may ask for fewer with ?in_flight=N) and the longest accepted
+# input line, in bytes.
+STREAM_IN_FLIGHT = env_int("CALC_STREAM_IN_FLIGHT", 16)
+STREAM_MAX_LINE = env_int("CALC_STREAM_MAX_LINE", 1 << 20)
+
+# Calculation sessions (calc_core.sessions): live sessions kept (the least
+# recently used is evicted beyond this), formulas per session, and seconds
+# of inactivity after which a session expires (0: never).
+SESSION_MAX = env_int("CALC_SESSION_MAX", 256)
+SESSION_MAX_FORMULAS = env_int("CALC_SESSION_MAX_FORMULAS", 1000)
+SESSION_TTL = env_float("CALC_SESSION_TTL", 1800.0)
+
+# Numerical solvers (calc_core.solvers: calc.solve, calc.integrate,
+# calc.sum): root-finding iterations and integration subdivisions, terms of
+# a sum, and wall-clock seconds per call.
+SOLVER_MAX_ITER = env_int("CALC_SOLVER_MAX_ITER", 10_000)
+SOLVER_MAX_TERMS = env_int("CALC_SOLVER_MAX_TERMS", 1_000_000)
+SOLVER_TIMEOUT = env_float("CALC_SOLVER_TIMEOUT", 10.0)
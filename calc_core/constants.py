@@ -0,0 +1,84 @@
+"""Mathematical constants computed on demand and memoized per precision.
+
+Every entry point may run at its own decimal precision, so constants are
+functions of the digit count rather than fixed literals.  Each value is
+computed once per precision and then served from a cache.  The digits
+come from binary-splitting series in :mod:`calc_core.fixedpoint`
+(Chudnovsky for pi), so even 10,000-digit constants take milliseconds.
+"""
+from __future__ import annotations
+
+from decimal import Decimal, getcontext
+from functools import lru_cache
+from typing import Callable, Dict, Tuple
+
+from . import fixedpoint
+
+# Named constants carry a few digits beyond the working precision so that
+# expressions such as ``pi/2`` are correctly rounded; at the default 34
+# digits this reproduces the historic 40-digit literals.
+CONSTANT_GUARD = 6
+
+# ---------- pi ----------
+
+_pi_best: Tuple[int, Decimal] = (0, Decimal(0))
+
+
+def _pi_digits(digits: int) -> Decimal:
+    """pi to at least *digits* digits.
+
+    The most precise value computed so far is kept, so argument reduction
+    for large trig arguments (which asks for many different digit counts)
+    does not recompute pi every time.
+    """
+    global _pi_best
+    have, value = _pi_best
+    if digits > have:
+        target = max(digits + digits // 4, 64)
+        value = fixedpoint.constant_value("pi", target + 5)
+        _pi_best = (target, value)
+    return value
+
+
+@lru_cache(maxsize=256)
+def pi(digits: int) -> Decimal:
+    """pi rounded to *digits* significant digits."""
+    return fixedpoint.constant_value("pi", digits)
+
+
+@lru_cache(maxsize=256)
+def e(digits: int) -> Decimal:
+    """e rounded to *digits* significant digits."""
+    return fixedpoint.constant_value("e", digits)
+
+
+@lru_cache(maxsize=256)
+def ln2(digits: int) -> Decimal:
+    """ln(2) rounded to *digits* significant digits."""
+    return fixedpoint.constant_value("ln2", digits)
+
+
+@lru_cache(maxsize=256)
+def ln10(digits: int) -> Decimal:
+    """ln(10) rounded to *digits* significant digits."""
+    return fixedpoint.constant_value("ln10", digits)
+
+
+_NAMED: Dict[str, Callable[[int], Decimal]] = {"pi": pi, "e": e}
+
+
+def constant(name: str) -> Decimal:
+    """Value of the named constant for the active context precision."""
+    return _NAMED[name](getcontext().prec + CONSTANT_GUARD)
+
+
+def ln(x: Decimal) -> Decimal:
+    """Natural log at the current precision, memoized for the common bases 2 and 10."""
+    if x == 10:
+        return ln10(getcontext().prec)
+    if x == 2:
+        return ln2(getcontext().prec)
+    return fixedpoint.ln(x)
+
+
+__all__ = ["CONSTANT_GUARD", "constant", "e", "ln", "ln10", "ln2", "pi"]
@@ -0,0 +1,286 @@
+"""Static cost estimate used to reject pathological expressions early.
+
+Before an expression is evaluated its (optimized) tree is measured:
+
+* ``nodes`` and ``depth`` — checked once, when the expression is compiled;
+* ``work`` — an estimate of evaluation time, as a function of the requested
+  precision, checked on every call.
+
+Work is measured in units of roughly one microsecond of a typical core.
+Each operation has a base cost at the default 34 digits and grows as
+``(prec / 34) ** k`` with the series length and digit-multiplication cost
+of the operation; ``sqrt``, ``exp`` and ``log`` switch to a second such law
+above the precision where :mod:`calc_core.fixedpoint` takes over from
+libmpdec.  Trigonometric argument reduction additionally costs
+``O(d**2)`` where ``d`` grows with the magnitude of the argument; that
+magnitude comes from log10 bounds propagated through the tree.  Arguments
+whose magnitude depends on variables are checked when the function runs
+(:func:`check_trig_argument`).
+
+Operations on lists are charged once per element: list literals have a
+known length, list-valued variables are accounted for by the ``width``
+passed to :func:`check_work`.
+
+Over-budget expressions raise :class:`~calc_core.errors.BudgetExceeded`
+(message prefix ``BudgetExceeded:``).  Limits come from
+``CALC_MAX_NODES``, ``CALC_MAX_DEPTH`` and ``CALC_MAX_WORK``.
+"""
+from __future__ import annotations
+
+import math
+from collections import Counter
+from decimal import Decimal, getcontext
+from typing import Dict, Tuple
+
+from . import constants, fixedpoint
+from .config import MAX_DEPTH, MAX_NODES, MAX_WORK
+from .constants import _NAMED as _CONSTANTS
+from .errors import BudgetExceeded
+from .lists import REDUCTIONS
+from .nodes import BinOp, Call, Name, Neg, Node, Num, Pos, Vec, children, postorder
+
+_BASE_PREC = 34
+_LOG10_2 = math.log10(2)
+_LOG10_PI = math.log10(math.pi)
+
+Law = Tuple[float, float]  # (base cost at 34 digits, precision exponent)
+
+# Laws calibrated on CPython's libmpdec.  Cheap float-backed functions are
+# charged like arithmetic.
+_ARITH = (1.0, 1.0)
+_INT_POW = (2.0, 1.0)
+_POW = (160.0, 1.7)
+_CALL_COSTS: Dict[str, Law] = {
+    "sqrt": (5.0, 1.4),
+    "exp": (26.0, 1.9),
+    "log": (65.0, 1.7),
+    "sin": (27.0, 1.45),
+    "cos": (27.0, 1.45),
+    "tan": (27.0, 1.45),
+}
+# From these precisions on, the laws of the calc_core.fixedpoint
+# implementations, fitted between 1,000 and 10,000 digits.
+_FAST_CALL_COSTS: Dict[str, Tuple[int, Law]] = {
+    "sqrt": (fixedpoint.SQRT_DIGITS, (0.35, 1.7)),
+    "exp": (fixedpoint.EXP_DIGITS, (8.5, 1.85)),
+    "log": (fixedpoint.LN_DIGITS, (10.0, 1.75)),
+}
+_FAST_POW = (fixedpoint.EXP_DIGITS, (18.0, 1.8))
+_TRIG = ("sin", "cos", "tan")
+_REDUCTION_COST = 9e-5  # per squared digit of the reduction precision
+_PI_COST = 0.005  # per digit**1.7 (Chudnovsky), when pi must first be extended
+
+
+def reduction_work(prec: int, log10_x: float) -> float:
+    """Work to reduce a trig argument of magnitude ``10**log10_x`` (see trig._reduce).
+
+    Includes computing pi to the required digits unless a long enough value
+    is already cached, so the estimate drops once pi has been extended.
+    """
+    digits = 2 * (prec + 10) + max(0.0, log10_x)
+    work = _REDUCTION_COST * digits * digits
+    if digits > constants._pi_best[0]:
+        target = digits * 1.25  # see constants._pi_digits
+        work += _PI_COST * target ** 1.7
+    return work
+
+
+def _log10_abs(value: Decimal) -> float:
+    if not value:
+        return -math.inf
+    if not value.is_finite():
+        return math.inf
+    exp = value.adjusted()
+    return exp + math.log10(float(value.copy_abs().scaleb(-exp)))
+
+
+def _exp10(x: float) -> float:
+    return math.inf if x > 308 else 10.0 ** x
+
+
+def _exact_log10(node: Node) -> float | None:
+    """log10|value| for literals and named constants, else None."""
+    if isinstance(node, Num):
+        return _log10_abs(node.value)
+    if isinstance(node, Name) and node.id in _CONSTANTS:
+        return _LOG10_PI
+    return None
+
+
+def _bound(node: Node, bounds: Dict[int, float]) -> float:
+    """Upper bound of log10|value| of *node*, given bounds of its children.
+
+    ``inf`` means unknown (variables, division by a non-literal, ...).
+    """
+    exact = _exact_log10(node)
+    if exact is not None:
+        return exact
+    if isinstance(node, Name):
+        return math.inf
+    if isinstance(node, (Neg, Pos)):
+        return bounds[id(node.operand)]
+    if isinstance(node, BinOp):
+        a, b = bounds[id(node.left)], bounds[id(node.right)]
+        if node.op in "+-":
+            return max(a, b) + _LOG10_2
+        if node.op == "*":
+            return math.inf if math.inf in (a, b) else a + b
+        if node.op == "/":
+            divisor = _exact_log10(node.right)
+            return math.inf if divisor in (None, -math.inf) else a - divisor
+        # Power: exact for literal bases, else only literal non-negative exponents.
+        base = _exact_log10(node.left)
+        if base is not None and math.isfinite(base):
+            return _exp10(b) * abs(base) if base else 0.0
+        if isinstance(node.right, Num) and node.right.value >= 0 and a != math.inf:
+            # |x| <= 10**a  =>  |x**n| <= 10**(n*a); a == 0 is |x| <= 1.
+            return float(node.right.value) * a if a else 0.0
+        return math.inf
+    if isinstance(node, Call) and len(node.args) == 1:
+        a = bounds[id(node.args[0])]
+        if node.name in ("sin", "cos"):
+            return 0.0
+        if node.name in ("asin", "acos", "atan"):
+            return _LOG10_PI
+        if node.name == "abs":
+            return a
+        if node.name == "sqrt":
+            return a / 2
+        if node.name == "exp":
+            return _exp10(a) * math.log10(math.e)
+    return math.inf
+
+
+class Cost:
+    """Measured size and per-precision work of one expression."""
+
+    __slots__ = ("nodes", "depth", "terms", "switched", "trig_log10", "_work")
+
+    def __init__(self, nodes: int, depth: int, terms: Tuple[Tuple[float, float, int], ...],
+                 trig_log10: Tuple[float, ...], switched: Tuple[Tuple[int, Law, Law, int], ...] = ()) -> None:
+        self.nodes = nodes
+        self.depth = depth
+        # (base cost, precision exponent, number of such operations)
+        self.terms = terms
+        # (digits, law below, law from there on, number of such operations)
+        self.switched = switched
+        # Statically known log10 bounds of large trig arguments.
+        self.trig_log10 = trig_log10
+        self._work: Dict[int, float] = {}
+
+    def work(self, prec: int) -> float:
+        """Estimated evaluation work at *prec* digits."""
+        try:
+            total = self._work[prec]
+        except KeyError:
+            scale = prec / _BASE_PREC
+            total = sum(count * base * scale ** k for base, k, count in self.terms)
+            for digits, below, above, count in self.switched:
+                base, k = above if prec >= digits else below
+                total += count * base * scale ** k
+            self._work[prec] = total
+        if self.trig_log10:
+            # Not memoized: depends on how much of pi is cached.
+            total += sum(reduction_work(prec, b) for b in self.trig_log10)
+        return total
+
+    def __repr__(self) -> str:
+        return f"Cost(nodes={self.nodes}, depth={self.depth}, work@{_BASE_PREC}={self.work(_BASE_PREC):.3g})"
+
+
+def _op_cost(node: Node) -> Tuple[Law, int, Law] | None:
+    """``(law, digits, law from digits on)`` of *node*; the two laws are equal for most operations."""
+    if isinstance(node, (Num, Name, Vec)):
+        return None
+    if isinstance(node, BinOp) and node.op == "^":
+        exponent = node.right
+        if isinstance(exponent, Num) and exponent.value == exponent.value.to_integral_value():
+            return _INT_POW, 0, _INT_POW
+        return (_POW, *_FAST_POW)
+    if isinstance(node, Call):
+        cost = _CALL_COSTS.get(node.name, _ARITH)
+        digits, fast = _FAST_CALL_COSTS.get(node.name, (0, cost))
+        if node.name == "log" and len(node.args) == 2:
+            return (2 * cost[0], cost[1]), digits, (2 * fast[0], fast[1])
+        return cost, digits, fast
+    return _ARITH, 0, _ARITH
+
+
+def estimate(tree: Node) -> Cost:
+    """Measure *tree*; shared subtrees (one node object) are counted once."""
+    depths: Dict[int, int] = {}
+    bounds: Dict[int, float] = {}
+    # Number of elements each node operates on (1 for scalars).
+    widths: Dict[int, int] = {}
+    terms: Counter = Counter()
+    switched: Counter = Counter()
+    trig = []
+    nodes = 0
+    for node in postorder(tree):
+        nodes += 1
+        kids = children(node)
+        depths[id(node)] = 1 + max((depths[id(c)] for c in kids), default=0)
+        bounds[id(node)] = _bound(node, bounds)
+        if isinstance(node, Vec):
+            width = widths[id(node)] = len(kids)
+        elif isinstance(node, Call) and node.name in REDUCTIONS:
+            width = sum(widths[id(c)] for c in kids)
+            widths[id(node)] = 1
+        else:
+            width = widths[id(node)] = max((widths[id(c)] for c in kids), default=1)
+        cost = _op_cost(node)
+        if cost is not None:
+            law, digits, fast = cost
+            if law == fast:
+                terms[law] += width
+            else:
+                switched[digits, law, fast] += width
+        if isinstance(node, Call) and node.name in _TRIG and len(kids) == 1:
+            arg = bounds[id(kids[0])]
+            if 0 < arg < math.inf:
+                trig.append(arg)
+    return Cost(
+        nodes,
+        depths[id(tree)],
+        tuple((base, k, count) for (base, k), count in terms.items()),
+        tuple(trig),
+        tuple((digits, law, fast, count) for (digits, law, fast), count in switched.items()),
+    )
+
+
+def check_structure(cost: Cost) -> None:
+    """Reject expressions that are too large or too deeply nested."""
+    if cost.nodes > MAX_NODES:
+        raise BudgetExceeded(f"BudgetExceeded: expression has {cost.nodes} nodes (limit {MAX_NODES})")
+    if cost.depth > MAX_DEPTH:
+        raise BudgetExceeded(f"BudgetExceeded: expression nests {cost.depth} levels deep (limit {MAX_DEPTH})")
+
+
+def check_work(cost: Cost, prec: int, width: int = 1) -> None:
+    """Reject an evaluation whose estimated work at *prec* digits is over budget.
+
+    *width* is the length of the longest list-valued variable, if any.
+    """
+    work = cost.work(prec) * width
+    if work > MAX_WORK:
+        per_element = f" ({width} list elements)" if width > 1 else ""
+        raise BudgetExceeded(
+            f"BudgetExceeded: estimated work {work:.3g} at {prec} digits{per_element} exceeds limit {MAX_WORK}"
+        )
+
+
+def check_trig_argument(x: Decimal) -> None:
+    """Runtime guard for trig arguments whose size was unknown statically."""
+    work = reduction_work(getcontext().prec, x.adjusted())
+    if work > MAX_WORK:
+        raise BudgetExceeded(f"BudgetExceeded: trig argument too large (|x| ~ 1E{x.adjusted():+d})")
+
+
+__all__ = [
+    "Cost",
+    "check_structure",
+    "check_trig_argument",
+    "check_work",
+    "estimate",
+    "reduction_work",
+]
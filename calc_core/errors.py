@@ -1,2 +1,6 @@
 class CalcError(Exception):
     """Base exception for all calculator errors."""
+
+
+class BudgetExceeded(CalcError):
+    """The expression was rejected before evaluation as too expensive."""
@@ -0,0 +1,333 @@
+"""Exact integer tier: integral arithmetic with native Python ints.
+
+Most requests are plain integer arithmetic (``5+4-3+2-1``, ``2^10``,
+``x^3 - 2*x + 7`` with integer ``x``).  For those, Decimal does nothing
+that native ints would not do faster: while every operand and every
+intermediate result is an integer of at most ``precision`` digits, each
+Decimal operation is exact, and so is its int counterpart.
+
+A program is built per precision on the first call, from the optimized
+tree of a :class:`~calc_core.compiler.CompiledExpression`:
+
+* Expressions using constants (``pi``, ``e``), non-integral literals, list
+  literals or any function other than ``abs`` never take this path
+  (``compiled.exact`` becomes None).
+* Variable-free subtrees are evaluated once, when the program is built;
+  shared subtrees once per call, as in the Decimal closures.
+* At run time the tier steps aside (:func:`evaluate_exact` returns None and
+  the caller evaluates with Decimal as usual) whenever the result could
+  differ from Decimal's in any digit, sign or error: a variable that is
+  not an ``int``, a value of more than ``precision`` digits (Decimal would
+  round it), a division with a remainder, a negative exponent, a negative
+  zero (``0*(0-3)`` is ``-0`` in Decimal), and every error case
+  (``1/0``, ``0^0``, unknown names).
+* An expression that keeps stepping aside (say ``x/y`` with ``x``
+  rarely divisible by ``y``) stops trying after a while.
+
+The result is converted to Decimal and normalized once, at the end.
+"""
+from __future__ import annotations
+
+from decimal import Decimal, getcontext
+from typing import Callable, Dict, Mapping, Optional
+
+from .compiler import CompiledExpression, _shared
+from .nodes import BinOp, Call, Name, Neg, Node, Num, Pos, Vec, postorder
+from .optimizer import analyze
+from .transformer import CONSTANTS
+
+IntEnv = Mapping[str, int]
+IntEvaluator = Callable[[IntEnv], int]
+
+# Precisions above this keep using Decimal: results below 10**999 can never
+# hit the magnitude limit enforced by calc_core._quantize.
+MAX_DIGITS = 999
+# A program that stepped aside this many times, and on at least half of
+# its calls, is dropped for good.
+_GIVE_UP = 64
+# Literal exponents up to this are raised without a size estimate first.
+_SMALL_EXPONENT = 16
+
+
+class _Inexact(Exception):
+    """The int result may differ from Decimal's; evaluate with Decimal instead."""
+
+
+class _Ineligible(Exception):
+    """The expression can never be evaluated exactly at this precision."""
+
+
+class _Program:
+    """Native-int closures of one expression at one precision."""
+
+    __slots__ = ("fn", "constant", "low", "limit", "slots", "calls", "misses")
+
+    def __init__(self, fn: IntEvaluator, limit: int, slots: int, constant: Optional[Decimal] = None) -> None:
+        self.fn = fn
+        self.constant = constant  # the result, if the expression has no variables
+        self.low = -limit
+        self.limit = limit  # every value v satisfies -limit < v < limit
+        self.slots = slots
+        self.calls = 0
+        self.misses = 0
+
+
+def _compile_num(node: Num, prec: int) -> IntEvaluator:
+    value = node.value
+    # adjusted() < prec: at most prec digits before the point (and no huge int()).
+    if not value.is_finite() or value.adjusted() >= prec or value != value.to_integral_value():
+        raise _Ineligible
+    n = int(value)
+    return lambda env: n
+
+
+def _compile_name(node: Name) -> IntEvaluator:
+    name = node.id
+    if name in CONSTANTS:
+        raise _Ineligible
+
+    def lookup(env: IntEnv) -> int:
+        try:
+            return env[name]
+        except KeyError:
+            raise _Inexact from None
+
+    return lookup
+
+
+def _compile_with_constant(op: str, operand: IntEvaluator, c: int, constant_first: bool, limit: int) -> IntEvaluator:
+    """``x + c``, ``c - x``, ``x * c`` ...: the most common shapes, without a leaf call."""
+    low = -limit
+    if op == "+":
+        def add_c(env: IntEnv) -> int:
+            v = operand(env) + c
+            if low < v < limit:
+                return v
+            raise _Inexact
+        return add_c
+    if op == "-" and constant_first:
+        def c_sub(env: IntEnv) -> int:
+            v = c - operand(env)
+            if low < v < limit:
+                return v
+            raise _Inexact
+        return c_sub
+    if op == "-":
+        def sub_c(env: IntEnv) -> int:
+            v = operand(env) - c
+            if low < v < limit:
+                return v
+            raise _Inexact
+        return sub_c
+    if c > 0:
+        def mul_c(env: IntEnv) -> int:
+            v = operand(env) * c
+            if low < v < limit:
+                return v
+            raise _Inexact
+        return mul_c
+    if c < 0:
+        def mul_negative_c(env: IntEnv) -> int:
+            v = operand(env) * c
+            if v and low < v < limit:
+                return v
+            raise _Inexact  # includes x = 0: -0 in Decimal
+        return mul_negative_c
+
+    def mul_zero(env: IntEnv) -> int:
+        if operand(env) >= 0:
+            return 0
+        raise _Inexact
+    return mul_zero
+
+
+def _compile_binop(node: BinOp, done: Dict[int, IntEvaluator], constants: Dict[int, int], limit: int) -> IntEvaluator:
+    op = node.op
+    left, right = done[id(node.left)], done[id(node.right)]
+    if op in "+-*":
+        a, b = constants.get(id(node.left)), constants.get(id(node.right))
+        if a is None and b is not None:
+            return _compile_with_constant(op, left, b, False, limit)
+        if b is None and a is not None:
+            return _compile_with_constant(op, right, a, True, limit)
+    low = -limit
+    if op == "+":
+        def add(env: IntEnv) -> int:
+            v = left(env) + right(env)
+            if low < v < limit:
+                return v
+            raise _Inexact
+        return add
+    if op == "-":
+        def sub(env: IntEnv) -> int:
+            v = left(env) - right(env)
+            if low < v < limit:
+                return v
+            raise _Inexact
+        return sub
+    if op == "*":
+        def mul(env: IntEnv) -> int:
+            a = left(env)
+            b = right(env)
+            v = a * b
+            if v:
+                if low < v < limit:
+                    return v
+            elif a >= 0 and b >= 0:
+                return 0
+            raise _Inexact
+        return mul
+    if op == "/":
+        def div(env: IntEnv) -> int:
+            a = left(env)
+            b = right(env)
+            if b:
+                q, r = divmod(a, b)
+                if not r and (q or b > 0):
+                    return q
+            raise _Inexact
+        return div
+    if op == "^":
+        exponent = node.right.value if isinstance(node.right, Num) else None
+        if exponent is not None and exponent == exponent.to_integral_value() and 1 <= exponent <= _SMALL_EXPONENT:
+            # x^2, x^3 ...: |a| < limit, so a ** b stays cheap to compute.
+            b = int(exponent)
+
+            def small_pow(env: IntEnv) -> int:
+                v = left(env) ** b
+                if low < v < limit:
+                    return v
+                raise _Inexact
+            return small_pow
+
+        # |a| >= 2 and (bit_length(|a|) - 1) * b >= bits means |a|**b >= limit.
+        bits = limit.bit_length()
+
+        def pow_(env: IntEnv) -> int:
+            a = left(env)
+            b = right(env)
+            if b > 0:
+                if -1 <= a <= 1 or (abs(a).bit_length() - 1) * b < bits:
+                    v = a ** b
+                    if low < v < limit:
+                        return v
+            elif b == 0 and a:
+                return 1
+            raise _Inexact
+        return pow_
+    raise _Ineligible
+
+
+def _compile(node: Node, done: Dict[int, IntEvaluator], constants: Dict[int, int], prec: int, limit: int) -> IntEvaluator:
+    if isinstance(node, Num):
+        return _compile_num(node, prec)
+    if isinstance(node, Name):
+        return _compile_name(node)
+    if isinstance(node, BinOp):
+        return _compile_binop(node, done, constants, limit)
+    if isinstance(node, Neg):
+        operand = done[id(node.operand)]
+        # -0 is 0 in Decimal too (unary minus rounds, and rounding drops the sign).
+        return lambda env: -operand(env)
+    if isinstance(node, Pos):
+        return done[id(node.operand)]
+    if isinstance(node, Call) and node.name == "abs" and len(node.args) == 1:
+        operand = done[id(node.args[0])]
+        return lambda env: abs(operand(env))
+    raise _Ineligible
+
+
+def _build(tree: Node, prec: int) -> _Program:
+    """Compile *tree* for *prec* digits; raises _Ineligible if it cannot be exact."""
+    limit = 10 ** prec
+    analysis = analyze(tree)
+    done: Dict[int, IntEvaluator] = {}
+    constants: Dict[int, int] = {}  # values of variable-free nodes
+    slots = 0
+    for node in postorder(tree):
+        key = id(node)
+        fn = _compile(node, done, constants, prec, limit)
+        if key in analysis.pure:
+            try:
+                value = constants[key] = fn({})
+            except _Inexact:
+                raise _Ineligible from None  # 7/2, 1/0, 10^40 ...: Decimal every time
+            fn = lambda env, value=value: value  # noqa: E731
+        elif not isinstance(node, (Num, Name)) and analysis.refcounts.get(key, 0) > 1:
+            fn = _shared(fn, slots)
+            slots += 1
+        done[key] = fn
+    root = constants.get(id(tree))
+    return _Program(done[id(tree)], limit, slots, None if root is None else _to_decimal(root))
+
+
+def _to_decimal(n: int) -> Decimal:
+    value = Decimal(n)
+    return value if n % 10 else value.normalize()
+
+
+def _program(compiled: CompiledExpression, programs: Dict[int, Optional[_Program]], prec: int) -> Optional[_Program]:
+    try:
+        return programs[prec]
+    except KeyError:
+        pass
+    program = None
+    if prec <= MAX_DIGITS:
+        try:
+            program = _build(compiled.optimized, prec)
+        except _Ineligible:
+            if _never_exact(compiled.optimized):
+                compiled.exact = None
+    programs[prec] = program
+    return program
+
+
+def _never_exact(tree: Node) -> bool:
+    """True if *tree* has a node no precision can evaluate exactly."""
+    for node in postorder(tree):
+        if isinstance(node, Name) and node.id in CONSTANTS:
+            return True
+        if isinstance(node, Call) and (node.name != "abs" or len(node.args) != 1):
+            return True
+        if isinstance(node, Vec):
+            return True
+        if isinstance(node, Num) and node.value.is_finite() and node.value != node.value.to_integral_value():
+            return True
+    return False
+
+
+def evaluate_exact(compiled: CompiledExpression, variables: Mapping[str, object]) -> Optional[Decimal]:
+    """Evaluate *compiled* with native ints at the context precision, if possible.
+
+    Returns the normalized result (what Decimal evaluation followed by
+    ``calc_core._quantize`` would return), or None if the expression or
+    these variables need Decimal evaluation.
+    """
+    for value in variables.values():
+        if type(value) is not int:
+            return None
+    programs = compiled.exact
+    if programs is None:
+        return None
+    prec = getcontext().prec
+    program = _program(compiled, programs, prec)
+    if program is None:
+        return None
+    low, limit = program.low, program.limit
+    for value in variables.values():
+        if not low < value < limit:
+            return None
+    if program.constant is not None:
+        return program.constant
+    program.calls += 1
+    try:
+        n = program.fn(dict(variables) if program.slots else variables)
+    except _Inexact:
+        program.misses += 1
+        if program.misses >= _GIVE_UP and 2 * program.misses >= program.calls:
+            programs[prec] = None
+        return None
+    return _to_decimal(n)
+
+
+__all__ = ["MAX_DIGITS", "evaluate_exact"]
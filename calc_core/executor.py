@@ -0,0 +1,168 @@
+"""Worker pool that keeps calculations off the asyncio event loop.
+
+Both FastAPI servers are ``async``; evaluating inline would let one slow
+expression (``(1+1/10^10)^10^10``) stall every other request on the
+worker.  Route calculations through :data:`executor` instead::
+
+    result = await executor.run(calculate, expr, **variables)
+
+The pool is a thread pool (default) or a process pool, chosen with
+``CALC_EXECUTOR`` and sized with ``CALC_EXECUTOR_WORKERS`` (see
+:mod:`calc_core.config`).  It is created on first use.
+
+While :data:`calc_core.profiling.profiler` is armed, the calls submitted
+here are run under a profiler (see :mod:`calc_core.profiling`).
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from decimal import getcontext
+from typing import Any, Callable, NamedTuple, Optional, TypeVar
+
+from .config import EXECUTOR_KIND, EXECUTOR_WORKERS
+from .metrics import REGISTRY
+from .profiling import Ticket, profiler, run_profiled
+
+T = TypeVar("T")
+
+
+def _init_worker() -> None:
+    """Give each worker the library's default decimal context.
+
+    Decimal contexts are per thread; new threads start from
+    ``decimal.DefaultContext`` (28 digits) rather than the 34 set at import.
+    """
+    from . import PRECISION
+
+    getcontext().prec = PRECISION
+
+
+def _record_profile(ticket: Ticket, future: Future) -> None:
+    failed = future.cancelled() or future.exception() is not None
+    profiler.record(ticket, None if failed else future.result())
+
+
+class ExecutorStats(NamedTuple):
+    """Point-in-time gauges for sizing the pool."""
+
+    kind: str
+    workers: int
+    queued: int  # submitted, waiting for a free worker
+    in_flight: int  # currently running
+    completed: int  # finished since start (success or error)
+
+
+class CalcExecutor:
+    """Run blocking calculation callables from async code.
+
+    Gauges are derived from the number of submitted-but-unfinished jobs:
+    at most ``workers`` of them can be running, the rest are queued.  This
+    holds for process pools too, where workers cannot report back cheaply.
+    """
+
+    def __init__(self, kind: str = EXECUTOR_KIND, workers: int = EXECUTOR_WORKERS) -> None:
+        if kind not in ("thread", "process", "inline"):
+            raise ValueError(f"Unknown executor kind {kind!r}")
+        if workers < 0:
+            raise ValueError("Executor worker count cannot be negative")
+        if not workers:
+            # Threads also bound latency: a short job need not wait for a
+            # long one to finish, only for its GIL slices.
+            cpus = os.cpu_count() or 1
+            workers = cpus if kind == "process" else min(32, cpus + 4)
+        self.kind = kind
+        self.workers = workers
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+
+    def _get_pool(self) -> Executor:
+        with self._lock:
+            if self._pool is None:
+                if self.kind == "process":
+                    # Servers are multi-threaded, so fork() is unsafe here.
+                    self._pool = ProcessPoolExecutor(
+                        self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_worker,
+                    )
+                else:
+                    self._pool = ThreadPoolExecutor(
+                        self.workers, thread_name_prefix="calc", initializer=_init_worker
+                    )
+            return self._pool
+
+    async def run(self, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+        """Run ``fn(*args, **kwargs)`` in the pool and await its result.
+
+        With a process pool *fn* and its arguments must be picklable
+        (module-level functions such as :func:`calc_core.calculate` are).
+        """
+        ticket = profiler.claim() if profiler.armed else None
+        if ticket is not None:
+            call = functools.partial(run_profiled, ticket.kind, ticket.interval, fn, args, kwargs)
+        else:
+            call = functools.partial(fn, *args, **kwargs)
+        if self.kind == "inline":
+            if ticket is None:
+                return call()
+            outcome = call()
+            profiler.record(ticket, outcome)
+            return profiler.unwrap(outcome)
+        pool = self._get_pool()
+        with self._lock:
+            self._pending += 1
+        try:
+            future = pool.submit(call)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            if ticket is not None:
+                profiler.record(ticket, None)
+            raise
+        # Counted on completion in the pool, not when the awaiting request
+        # goes away: a cancelled request's job may still occupy a worker.
+        future.add_done_callback(self._done)
+        if ticket is None:
+            return await asyncio.wrap_future(future)
+        future.add_done_callback(functools.partial(_record_profile, ticket))
+        return profiler.unwrap(await asyncio.wrap_future(future))
+
+    def _done(self, _future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+
+    def stats(self) -> ExecutorStats:
+        """Current queue depth and in-flight count."""
+        with self._lock:
+            pending, completed = self._pending, self._completed
+        in_flight = min(pending, self.workers)
+        return ExecutorStats(self.kind, self.workers, pending - in_flight, in_flight, completed)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the pool; a later :meth:`run` starts a fresh one."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+
+# Shared by the REST and MCP servers.
+executor = CalcExecutor()
+
+
+@REGISTRY.add_collector
+def _executor_metrics():
+    stats = executor.stats()
+    yield "calc_executor_queued", "gauge", "Calculations waiting for a free worker.", [("", {}, stats.queued)]
+    yield "calc_executor_in_flight", "gauge", "Calculations running in the pool.", [("", {}, stats.in_flight)]
+    yield "calc_executor_completed_total", "counter", "Calculations finished since start.", [("", {}, stats.completed)]
+
+__all__ = ["CalcExecutor", "ExecutorStats", "executor"]
@@ -0,0 +1,340 @@
+"""Asymptotically fast constants and elementary functions for high precision.
+
+libmpdec's ``ln``, ``exp`` and ``sqrt`` are fine at tens of digits but grow
+quickly with the precision (at 10,000 digits ``ln`` alone takes seconds),
+and so does the Machin series the constants used to come from.  Above a
+crossover precision the work happens here instead, on Python ints holding
+binary fixed-point values ``v * 2**bits`` (int multiplication is
+subquadratic, shifts are free, :func:`math.isqrt` is fast):
+
+* pi by the Chudnovsky series, e by ``sum 1/k!``, ln 2 and ln 10 by
+  Machin-like atanh formulas -- all summed by binary splitting;
+* ``ln x`` by the arithmetic-geometric mean:
+  ``ln s ~ pi / (2 * AGM(1, 4/s))`` for ``s = x * 2**k >= 2**(bits/2)``;
+* ``exp x`` by Newton's iteration on ``ln``, doubling the precision each
+  step, after reducing ``x = m*ln 2 + r``; ``x ** y`` (non-integral ``y``)
+  as ``exp(y * ln x)`` in one fixed-point pass;
+* ``sqrt x`` by :func:`math.isqrt`, which is exact, so the result can be
+  rounded exactly.
+
+Every result is correctly rounded to the context precision, like
+libmpdec's: a value is computed with guard bits and an error bound, and
+accepted only if both ends of the error interval round to the same
+Decimal; otherwise it is recomputed with more guard bits.
+
+The largest fixed-point pi and ln 2 computed so far are kept and shifted
+down for smaller requests, since ``ln`` needs both on every call.
+"""
+from __future__ import annotations
+
+import math
+import threading
+from decimal import Decimal, getcontext, localcontext
+from typing import Callable, Dict, Optional, Tuple
+
+_LOG2_10 = math.log2(10)
+
+# Context precisions (digits) from which the functions below beat libmpdec,
+# measured with benchmarks/precision_scaling.py.
+LN_DIGITS = 100
+EXP_DIGITS = 300
+SQRT_DIGITS = 150
+
+# exp(x) for |x| >= 10**_EXP_MAX_ADJUSTED goes to libmpdec, which also
+# implements its overflow and underflow.
+_EXP_MAX_ADJUSTED = 4
+# Give up on correct rounding here after this many doublings of the guard
+# bits (the libmpdec function is then used).
+_MAX_RETRIES = 4
+
+
+def _bits(digits: int) -> int:
+    return int(digits * _LOG2_10) + 1
+
+
+def _guard(bits: int) -> int:
+    return 2 * bits.bit_length() + 16
+
+
+# ---------- binary splitting ----------
+
+Term = Callable[[int], Tuple[int, int, int, int]]
+
+
+def _split(n1: int, n2: int, term: Term) -> Tuple[int, int, int, int]:
+    """``(P, Q, B, T)`` of ``sum a(n)/b(n) * p(n1)..p(n) / (q(n1)..q(n))``, ``n1 <= n < n2``.
+
+    *term(n)* returns ``(a, b, p, q)``; the partial sum is ``T / (B*Q)``
+    (Haible & Papanikolaou, "Fast multiprecision evaluation of series of
+    rational numbers").
+    """
+    if n2 - n1 == 1:
+        a, b, p, q = term(n1)
+        return p, q, b, a * p
+    m = (n1 + n2) // 2
+    p1, q1, b1, t1 = _split(n1, m, term)
+    p2, q2, b2, t2 = _split(m, n2, term)
+    return p1 * p2, q1 * q2, b1 * b2, b2 * q2 * t1 + b1 * p1 * t2
+
+
+_C3_OVER_24 = 640320 ** 3 // 24
+
+
+def _chudnovsky_term(k: int) -> Tuple[int, int, int, int]:
+    if k == 0:
+        return 13591409, 1, 1, 1
+    p = (6 * k - 5) * (2 * k - 1) * (6 * k - 1)
+    return 13591409 + 545140134 * k, 1, -p, k * k * k * _C3_OVER_24
+
+
+def _pi_fixed(bits: int) -> int:
+    """``pi * 2**bits`` within 4 units."""
+    terms = bits // 47 + 2  # 14.18 digits per term
+    _, q, _, t = _split(0, terms, _chudnovsky_term)
+    return 426880 * math.isqrt(10005 << (2 * bits)) * q // t
+
+
+def _e_fixed(bits: int) -> int:
+    """``e * 2**bits`` within 2 units."""
+    terms = 2
+    while math.lgamma(terms + 1) / math.log(2) < bits + 4:
+        terms *= 2
+    _, q, _, t = _split(0, terms, lambda n: (1, 1, 1, n or 1))
+    return (t << bits) // q
+
+
+def _atanh_inv(x: int, bits: int) -> int:
+    """``atanh(1/x) * 2**bits`` within 2 units."""
+    terms = int(bits / (2 * math.log2(x))) + 2
+    x2 = x * x
+    _, q, b, t = _split(0, terms, lambda n: (1, 2 * n + 1, 1, x2 if n else x))
+    return (t << bits) // (b * q)
+
+
+def _ln2_fixed(bits: int) -> int:
+    """``ln(2) * 2**bits`` within 64 units."""
+    return 18 * _atanh_inv(26, bits) - 2 * _atanh_inv(4801, bits) + 8 * _atanh_inv(8749, bits)
+
+
+def _ln10_fixed(bits: int) -> int:
+    """``ln(10) * 2**bits`` within 256 units."""
+    return 46 * _atanh_inv(31, bits) + 34 * _atanh_inv(49, bits) + 20 * _atanh_inv(161, bits)
+
+
+_best: Dict[str, Tuple[int, int]] = {}
+_best_lock = threading.Lock()
+
+
+def _cached(name: str, compute: Callable[[int], int], bits: int) -> int:
+    """``compute(bits)`` from the most precise value computed so far (one more unit of error)."""
+    have, value = _best.get(name, (0, 0))
+    if bits > have:
+        have = max(bits + bits // 4, 256)
+        value = compute(have)
+        with _best_lock:
+            if have > _best.get(name, (0, 0))[0]:
+                _best[name] = (have, value)
+    return value >> (have - bits)
+
+
+def pi_fixed(bits: int) -> int:
+    """``pi * 2**bits`` within 5 units."""
+    return _cached("pi", _pi_fixed, bits)
+
+
+def ln2_fixed(bits: int) -> int:
+    """``ln(2) * 2**bits`` within 65 units."""
+    return _cached("ln2", _ln2_fixed, bits)
+
+
+# ---------- rounding ----------
+
+def _round(n: int, err: int, shift: int) -> Optional[Decimal]:
+    """``n * 2**shift`` rounded to the context, if all of ``(n +- err) * 2**shift`` round alike."""
+    if shift >= 0:
+        lo, hi = +Decimal((n - err) << shift), +Decimal((n + err) << shift)
+    else:
+        scale = Decimal(1 << -shift)
+        lo, hi = Decimal(n - err) / scale, Decimal(n + err) / scale
+    return lo if lo == hi else None
+
+
+def _correctly_rounded(approx: Callable[[int], Tuple[int, int, int]], bits: int) -> Optional[Decimal]:
+    """Round ``approx(bits + guard) = (n, err, shift)``, adding guard bits until unambiguous."""
+    guard = _guard(bits)
+    for _ in range(_MAX_RETRIES):
+        n, err, shift = approx(bits + guard)
+        value = _round(n, err, shift)
+        if value is not None:
+            return value
+        guard *= 2
+    return None
+
+
+def constant_value(name: str, digits: int) -> Decimal:
+    """``pi``, ``e``, ``ln2`` or ``ln10`` correctly rounded to *digits* digits."""
+    compute = {
+        "pi": (pi_fixed, 5),
+        "e": (_e_fixed, 2),
+        "ln2": (ln2_fixed, 65),
+        "ln10": (_ln10_fixed, 256),
+    }[name]
+    fixed, err = compute
+    with localcontext() as ctx:
+        ctx.prec = digits
+        bits = _bits(digits) + 2  # the leading digit carries up to 2 bits
+        guard = _guard(bits)
+        while True:
+            value = _round(fixed(bits + guard), err, -(bits + guard))
+            if value is not None:
+                return value
+            guard *= 2
+
+
+# ---------- ln ----------
+
+def _ln_ratio(num: int, den: int, bits: int) -> Tuple[int, int]:
+    """``(n, err)`` with ``n = ln(num/den) * 2**bits`` within *err* units; ``num, den > 0``."""
+    # s = x * 2**k >= 2**(bits/2 + 8), so that pi/(2*AGM(1, 4/s)) = ln s to ~2**-bits.
+    k = bits // 2 + 8 - (num.bit_length() - den.bit_length() - 1)
+    shift = k + bits
+    s = (num << shift) // den if shift >= 0 else num // (den << -shift)
+    # AGM(1, 4/s) = AGM(s/4, 1) * 4/s: the large form keeps every operand
+    # to full relative precision (4/s would have only bits/2 of them).
+    a, b = s >> 2, 1 << bits
+    while abs(a - b) > 2:
+        a, b = (a + b) >> 1, math.isqrt(a * b)
+    n = pi_fixed(bits) * s // (8 * a) - k * ln2_fixed(bits)
+    return n, 16 * bits + 70 * abs(k) + 64
+
+
+def ln(x: Decimal) -> Decimal:
+    """``ln(x)`` for finite ``x > 0``, correctly rounded to the context precision."""
+    prec = getcontext().prec
+    if prec < LN_DIGITS or x == 1 or not x.is_finite():
+        return x.ln()
+    num, den = x.as_integer_ratio()
+    bits = _bits(prec) + 2
+    # ln(x) ~ x - 1 near 1: its leading digits come after the cancellation.
+    near = x - 1
+    if abs(near) < Decimal("0.5"):
+        bits += int(-near.adjusted() * _LOG2_10) + 4
+    value = _correctly_rounded(lambda b: (*_ln_ratio(num, den, b), -b), bits)
+    return x.ln() if value is None else value
+
+
+# ---------- exp ----------
+
+def _exp_fixed(r: int, bits: int) -> Tuple[int, int]:
+    """``(y, err)`` with ``y = exp(r / 2**bits) * 2**bits`` within *err* units, ``|r| <= 2**bits``."""
+    # Newton: y <- y + y*(r - ln y), starting from a double and doubling the bits.
+    p = 50
+    y = int(math.exp(math.ldexp(r >> (bits - p), -p)) * (1 << p)) if bits > p else 1 << p
+    err = 0
+    while p < bits:
+        p2 = min(2 * p, bits)
+        y <<= p2 - p
+        p = p2
+        ln_y, err = _ln_ratio(y, 1 << p, p)
+        y += (y * ((r >> (bits - p)) - ln_y)) >> p
+    return y, 3 * err + 16
+
+
+def exp(x: Decimal) -> Decimal:
+    """``exp(x)`` for finite *x*, correctly rounded to the context precision."""
+    prec = getcontext().prec
+    if prec < EXP_DIGITS or not x or not x.is_finite() or x.adjusted() >= _EXP_MAX_ADJUSTED:
+        return x.exp()
+    num, den = x.as_integer_ratio()
+
+    def approx(bits: int) -> Tuple[int, int, int]:
+        # x = m*ln 2 + r with |r| <= ln 2 (m from a double is close enough).
+        m = round(float(x) / math.log(2))
+        extra = abs(m).bit_length() + 8
+        x_fixed = (num << (bits + extra)) // den
+        r = (x_fixed - m * ln2_fixed(bits + extra)) >> extra
+        y, err = _exp_fixed(r, bits)
+        return y, err + 2 * (abs(m) + 1), m - bits
+
+    # Relative precision: the leading digit of exp(x) may carry ~3.3 bits.
+    value = _correctly_rounded(approx, _bits(prec) + 4)
+    return x.exp() if value is None else value
+
+
+# ---------- power ----------
+
+def _log_estimate(x: Decimal) -> float:
+    """``ln x`` for finite ``x > 0`` as a float, without overflowing."""
+    adjusted = x.adjusted()
+    return math.log(float(x.scaleb(-adjusted))) + adjusted * math.log(10)
+
+
+def power(x: Decimal, y: Decimal) -> Decimal:
+    """``x ** y``, as ``exp(y * ln x)`` correctly rounded for ``x > 0`` and non-integral *y*.
+
+    Everything else (integral exponents, which libmpdec raises by squaring,
+    ``x <= 0``, results that may overflow or underflow) is left to
+    ``x ** y``.
+    """
+    prec = getcontext().prec
+    if (prec < EXP_DIGITS or not x.is_finite() or not y.is_finite() or x <= 0
+            or y == y.to_integral_value()):
+        return x ** y
+    estimate = float(y) * _log_estimate(x)
+    if not abs(estimate) < 10 ** _EXP_MAX_ADJUSTED:
+        return x ** y
+    num, den = x.as_integer_ratio()
+    y_num, y_den = y.as_integer_ratio()
+    m = round(estimate / math.log(2))
+
+    def approx(bits: int) -> Tuple[int, int, int]:
+        # t = y*ln x = m*ln 2 + r, with y's magnitude and m's bits added to
+        # the working precision so that r keeps *bits* of them.
+        extra = abs(y_num // y_den).bit_length() + abs(m).bit_length() + 24
+        wide = bits + extra
+        ln_x, err = _ln_ratio(num, den, wide)
+        t = ln_x * y_num // y_den
+        r = (t - m * ln2_fixed(wide)) >> extra
+        r_err = ((err * (abs(y_num) // y_den + 1) + 65 * abs(m)) >> extra) + 2
+        value, exp_err = _exp_fixed(r, bits)
+        return value, exp_err + 2 * r_err + 2, m - bits
+
+    value = _correctly_rounded(approx, _bits(prec) + 4)
+    return x ** y if value is None else value
+
+
+# ---------- sqrt ----------
+
+def sqrt(x: Decimal) -> Decimal:
+    """``sqrt(x)`` for ``x >= 0``, correctly rounded to the context precision."""
+    prec = getcontext().prec
+    if prec < SQRT_DIGITS or not x or not x.is_finite():
+        return x.sqrt()
+    _, digits, exponent = x.as_tuple()
+    coefficient = int(Decimal((0, digits, 0)))  # no str(): that is limited to 4300 digits
+    if exponent % 2:
+        coefficient *= 10
+        exponent -= 1
+    # Enough digits that the integer root has at least prec + 1 of them.
+    t = max(0, prec + 2 - len(digits) // 2)
+    scaled = coefficient * 10 ** (2 * t)
+    root = math.isqrt(scaled)
+    if root * root == scaled:
+        return +Decimal(root).scaleb(exponent // 2 - t)
+    # The true root lies strictly between root and root + 1; rounding
+    # boundaries at prec digits are integers, so root + 1/2 rounds the same.
+    return +Decimal(10 * root + 5).scaleb(exponent // 2 - t - 1)
+
+
+__all__ = [
+    "EXP_DIGITS",
+    "LN_DIGITS",
+    "SQRT_DIGITS",
+    "constant_value",
+    "exp",
+    "ln",
+    "ln2_fixed",
+    "pi_fixed",
+    "power",
+    "sqrt",
+]
@@ -0,0 +1,248 @@
+"""List values: the :class:`Vector` type, broadcasting and reductions.
+
+A list literal (``[98.5, 88, 76.5]``) or a list-valued variable evaluates
+to a :class:`Vector`, an immutable sequence of Decimals.  Arithmetic
+broadcasts: ``v * 2`` and ``v + w`` work elementwise (``v`` and ``w`` must
+be equally long), and so do the unary functions (``sqrt(v)``).  Because
+the broadcasting lives in Vector's operator methods, the compiled closures
+of scalar expressions are unchanged and pay nothing for it.
+
+Reductions turn lists (and scalars) into a single value in one pass over
+the data, without building a tree:
+
+* ``sum`` and ``mean`` add the values exactly and round once;
+* ``prod`` multiplies exactly (pairwise, so long lists stay fast) and
+  rounds once;
+* ``stdev`` (sample standard deviation, ``n - 1`` in the denominator)
+  accumulates ``sum(x)`` and ``sum(x^2)`` exactly and takes one correctly
+  rounded square root of the exact variance;
+* ``min`` and ``max`` return one of the values, unrounded.
+
+"Exactly" means with up to :data:`EXACT_DIGITS` digits, far beyond any
+supported precision; only data spanning more decimal orders of magnitude
+than that is rounded before the final step.
+"""
+from __future__ import annotations
+
+import math
+import operator
+from decimal import MAX_EMAX, MIN_EMIN, Context, Decimal, getcontext
+from typing import Callable, Dict, Iterable, List, Sequence
+
+from . import fixedpoint
+from .config import MAX_PRECISION
+from .errors import CalcError
+
+# Digits carried by the exact accumulators.
+EXACT_DIGITS = 4 * MAX_PRECISION + 100
+
+
+class Vector(tuple):
+    """A list value: a tuple of Decimals whose arithmetic broadcasts."""
+
+    __slots__ = ()
+
+    def map(self, fn: Callable[[Decimal], Decimal]) -> "Vector":
+        """Apply *fn* to every element."""
+        return Vector(map(fn, self))
+
+    def __str__(self) -> str:
+        return "[" + ", ".join(map(str, self)) + "]"
+
+    __repr__ = __str__
+
+    # tuple's + and * concatenate and repeat; lists broadcast instead.
+    def __add__(self, other):
+        return broadcast(operator.add, self, other)
+
+    def __radd__(self, other):
+        return broadcast(operator.add, other, self)
+
+    def __sub__(self, other):
+        return broadcast(operator.sub, self, other)
+
+    def __rsub__(self, other):
+        return broadcast(operator.sub, other, self)
+
+    def __mul__(self, other):
+        return broadcast(operator.mul, self, other)
+
+    def __rmul__(self, other):
+        return broadcast(operator.mul, other, self)
+
+    def __truediv__(self, other):
+        return broadcast(_divide, self, other)
+
+    def __rtruediv__(self, other):
+        return broadcast(_divide, other, self)
+
+    def __pow__(self, other):
+        return broadcast(fixedpoint.power, self, other)
+
+    def __rpow__(self, other):
+        return broadcast(fixedpoint.power, other, self)
+
+    def __neg__(self):
+        return Vector(-x for x in self)
+
+    def __pos__(self):
+        return Vector(+x for x in self)
+
+
+def broadcast(fn: Callable, a, b) -> Vector:
+    """``fn`` elementwise over two lists of equal length, or a list and a scalar."""
+    if type(a) is Vector:
+        if type(b) is Vector:
+            if len(a) != len(b):
+                raise CalcError(f"List lengths differ: {len(a)} and {len(b)}")
+            return Vector(map(fn, a, b))
+        return Vector([fn(x, b) for x in a])
+    return Vector([fn(a, y) for y in b])
+
+
+def _divide(a: Decimal, b: Decimal) -> Decimal:
+    if b == 0:
+        raise CalcError("Division by zero")
+    return a / b
+
+
+def power(a, b):
+    """:func:`calc_core.fixedpoint.power`, broadcast over lists."""
+    if type(a) is Vector or type(b) is Vector:
+        return broadcast(fixedpoint.power, a, b)
+    return fixedpoint.power(a, b)
+
+
+def apply(fn: Callable[..., Decimal], *args):
+    """``fn(*args)`` with list arguments broadcast (for the unary functions and ``log``)."""
+    if len(args) == 1:
+        (x,) = args
+        return x.map(fn) if type(x) is Vector else fn(x)
+    x, y = args
+    if type(x) is Vector or type(y) is Vector:
+        return broadcast(fn, x, y)
+    return fn(x, y)
+
+
+def make_vector(items: Iterable) -> Vector:
+    """A list literal's value; elements must be numbers."""
+    vector = Vector(items)
+    for item in vector:
+        if type(item) is Vector:
+            raise CalcError("Lists cannot be nested")
+    return vector
+
+
+# ---------- reductions ----------
+
+def _accumulator() -> Context:
+    # A fresh context per call: Context objects carry mutable flags.
+    return Context(prec=EXACT_DIGITS, Emax=MAX_EMAX, Emin=MIN_EMIN)
+
+
+def _flatten(args: Sequence) -> List[Decimal]:
+    values: List[Decimal] = []
+    for arg in args:
+        if type(arg) is Vector:
+            values.extend(arg)
+        else:
+            values.append(arg)
+    return values
+
+
+def _nonempty(name: str, values: List[Decimal]) -> List[Decimal]:
+    if not values:
+        raise CalcError(f"{name}() of an empty list")
+    return values
+
+
+def _exact_sum(values: Iterable[Decimal], ctx: Context) -> Decimal:
+    total = Decimal(0)
+    add = ctx.add
+    for value in values:
+        total = add(total, value)
+    return total
+
+
+def _sum(values: List[Decimal]) -> Decimal:
+    return +_exact_sum(values, _accumulator())
+
+
+def _mean(values: List[Decimal]) -> Decimal:
+    return _exact_sum(_nonempty("mean", values), _accumulator()) / len(values)
+
+
+def _prod(values: List[Decimal]) -> Decimal:
+    ctx = _accumulator()
+    multiply = ctx.multiply
+    layer = list(values) or [Decimal(1)]
+    # Pairwise, so that operands grow together (fast big-number products).
+    while len(layer) > 1:
+        paired = [multiply(layer[i], layer[i + 1]) for i in range(0, len(layer) - 1, 2)]
+        if len(layer) % 2:
+            paired.append(layer[-1])
+        layer = paired
+    return +layer[0]
+
+
+def _stdev(values: List[Decimal]) -> Decimal:
+    n = len(values)
+    if n < 2:
+        raise CalcError("stdev() needs at least two values")
+    ctx = _accumulator()
+    add, multiply = ctx.add, ctx.multiply
+    s1 = s2 = Decimal(0)
+    for x in values:
+        s1 = add(s1, x)
+        s2 = add(s2, multiply(x, x))
+    # variance = (n*s2 - s1^2) / (n*(n-1)), exactly; never negative.
+    numerator = ctx.subtract(multiply(s2, n), multiply(s1, s1))
+    return _sqrt_ratio(numerator, n * (n - 1), ctx)
+
+
+def _sqrt_ratio(numerator: Decimal, denominator: int, ctx: Context) -> Decimal:
+    """``sqrt(numerator / denominator)`` correctly rounded to the current context."""
+    if not numerator:
+        return Decimal(0)
+    exponent = numerator.as_tuple().exponent
+    coefficient = int(numerator.scaleb(-exponent, ctx))
+    if exponent % 2:
+        coefficient *= 10
+        exponent -= 1
+    prec = getcontext().prec
+    # Scale so that the integer root has at least prec + 2 digits.
+    magnitude = numerator.adjusted() - exponent - len(str(denominator)) + 1
+    k = max(0, prec + 3 - magnitude // 2)
+    q, remainder = divmod(coefficient * 10 ** (2 * k), denominator)
+    root = math.isqrt(q)
+    shift = exponent // 2 - k
+    if remainder or root * root != q:
+        # Inexact: a trailing 1 keeps the value off rounding ties.
+        root, shift = root * 10 + 1, shift - 1
+    return +ctx.scaleb(Decimal(root), shift)
+
+
+def _min(values: List[Decimal]) -> Decimal:
+    return min(_nonempty("min", values))
+
+
+def _max(values: List[Decimal]) -> Decimal:
+    return max(_nonempty("max", values))
+
+
+REDUCTIONS: Dict[str, Callable[[List[Decimal]], Decimal]] = {
+    "sum": _sum,
+    "mean": _mean,
+    "prod": _prod,
+    "stdev": _stdev,
+    "min": _min,
+    "max": _max,
+}
+
+
+def reduce(name: str, args: Sequence) -> Decimal:
+    """Apply reduction *name* to all elements of *args* (lists and scalars)."""
+    return REDUCTIONS[name](_flatten(args))
+
+
+__all__ = ["EXACT_DIGITS", "REDUCTIONS", "Vector", "apply", "broadcast", "make_vector", "power", "reduce"]
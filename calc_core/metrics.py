@@ -0,0 +1,320 @@
+"""In-process metrics, rendered in the Prometheus text exposition format.
+
+Recording is meant to be cheap enough to leave on everywhere: a counter
+increment is one dictionary update, a histogram observation one
+:func:`bisect.bisect_left` over integer nanosecond bounds plus two
+additions.  There are no locks; metrics are updated from several threads
+(the calculation pool) and a read-modify-write can, very rarely, lose an
+increment.  That is the usual trade-off for operational counters and keeps
+each event well under a microsecond (``benchmarks/metrics_overhead.py``).
+
+Durations are taken with :func:`time.perf_counter_ns`::
+
+    start = perf_counter_ns()
+    ...
+    PARSE.observe_ns(perf_counter_ns() - start)
+
+Gauges that merely mirror state kept elsewhere (cache statistics, the
+calculation pool) are read only when the metrics are rendered, through
+collectors registered with :meth:`Registry.add_collector`.
+
+With a process pool (``CALC_EXECUTOR=process``) the parse and evaluate
+stages run, and are recorded, in the worker processes; the server process
+only sees its own requests.
+"""
+from __future__ import annotations
+
+import math
+from bisect import bisect_left
+from collections import defaultdict
+from time import perf_counter_ns
+from typing import Any, Callable, DefaultDict, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .errors import BudgetExceeded
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers a cached lookup (microseconds) to a budget-sized evaluation.
+LATENCY_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+Labels = Tuple[str, ...]
+# (name suffix, labels, value), e.g. ("_bucket", {"le": "0.001"}, 3).
+Sample = Tuple[str, Dict[str, str], float]
+# name, type, help, samples: one metric family for rendering.
+Family = Tuple[str, str, str, List[Sample]]
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+class Counter:
+    """A monotonically increasing count, optionally split by one label.
+
+    A single label keeps :meth:`inc` to one dictionary update, without
+    packing label tuples.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelname: Optional[str] = None) -> None:
+        self.name = name
+        self.help = help
+        self.labelname = labelname
+        self._values: DefaultDict[str, int] = defaultdict(int)
+
+    def inc(self, label: str = "") -> None:
+        """Add one to the count for *label* (omit it for an unlabelled counter)."""
+        self._values[label] += 1
+
+    def value(self, label: str = "") -> int:
+        return self._values.get(label, 0)
+
+    def collect(self) -> Iterator[Family]:
+        samples = [
+            ("", {self.labelname: label} if self.labelname else {}, value)
+            for label, value in sorted(self._values.items())
+        ]
+        yield self.name, self.kind, self.help, samples
+
+
+class Gauge:
+    """A value that goes up and down, e.g. requests in flight."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str) -> None:
+        self.name = name
+        self.help = help
+        self.value = 0
+
+    def inc(self) -> None:
+        self.value += 1
+
+    def dec(self) -> None:
+        self.value -= 1
+
+    def collect(self) -> Iterator[Family]:
+        yield self.name, self.kind, self.help, [("", {}, self.value)]
+
+
+class _HistogramChild:
+    """Bucket counts of one label combination of a :class:`Histogram`."""
+
+    __slots__ = ("_bounds", "counts", "total_ns")
+
+    def __init__(self, bounds: List[int]) -> None:
+        self._bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # the last one is +Inf
+        self.total_ns = 0
+
+    def observe_ns(self, ns: int, _bisect: Callable[[List[int], int], int] = bisect_left) -> None:
+        """Record a duration in nanoseconds."""
+        self.counts[_bisect(self._bounds, ns)] += 1
+        self.total_ns += ns
+
+    def observe(self, seconds: float) -> None:
+        self.observe_ns(int(seconds * 1e9))
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+
+class Histogram:
+    """Durations in fixed buckets (``le`` bounds in seconds), split by label values.
+
+    Resolve label values once with :meth:`labels` and keep the child: its
+    :meth:`~_HistogramChild.observe_ns` is the hot path.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._bounds = [round(b * 1e9) for b in self.buckets]
+        self._children: Dict[Labels, _HistogramChild] = {}
+
+    def labels(self, *labels: str) -> _HistogramChild:
+        child = self._children.get(labels)
+        if child is None:
+            child = self._children.setdefault(labels, _HistogramChild(self._bounds))
+        return child
+
+    def collect(self) -> Iterator[Family]:
+        samples: List[Sample] = []
+        for labels, child in sorted(self._children.items()):
+            base = dict(zip(self.labelnames, labels))
+            counts = list(child.counts)  # one consistent-enough snapshot
+            cumulative = 0
+            for bound, n in zip((*self.buckets, math.inf), counts):
+                cumulative += n
+                samples.append(("_bucket", {**base, "le": _format_value(bound)}, cumulative))
+            samples.append(("_sum", base, child.total_ns / 1e9))
+            samples.append(("_count", base, cumulative))
+        yield self.name, self.kind, self.help, samples
+
+
+Collector = Callable[[], Iterable[Family]]
+
+
+class Registry:
+    """The metrics and collectors rendered together by :meth:`render`."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Any] = {}
+        self._collectors: List[Collector] = []
+
+    def register(self, metric: Any) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name!r} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector: Collector) -> Collector:
+        """Call *collector* at every :meth:`render` for families computed on demand."""
+        self._collectors.append(collector)
+        return collector
+
+    def collect(self) -> Iterator[Family]:
+        for metric in self._metrics.values():
+            yield from metric.collect()
+        for collector in self._collectors:
+            yield from collector()
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format (version 0.0.4)."""
+        lines = []
+        for name, kind, help, samples in self.collect():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in samples:
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "calc_stage_seconds",
+    "Time spent per stage: parse and compile (cache misses only), evaluate, "
+    "serialize (response encoding) and total (request received to response ready).",
+    ("stage",),
+))
+PARSE = STAGE_SECONDS.labels("parse")
+COMPILE = STAGE_SECONDS.labels("compile")
+EVALUATE = STAGE_SECONDS.labels("evaluate")
+SERIALIZE = STAGE_SECONDS.labels("serialize")
+TOTAL = STAGE_SECONDS.labels("total")
+
+TOOL_CALLS = REGISTRY.register(Counter("calc_tool_calls_total", "Tool calls, by tool.", "tool"))
+ERRORS = REGISTRY.register(Counter("calc_errors_total", "Calculation errors returned, by category.", "category"))
+IN_FLIGHT = REGISTRY.register(Gauge("calc_requests_in_flight", "Requests received and not yet answered."))
+
+# Message prefix -> category; CalcError messages are the only signal.
+_CATEGORIES = (
+    ("Syntax error", "syntax"),
+    ("Unexpected", "syntax"),  # Lark parser (CALC_PARSER=lark)
+    ("No terminal", "syntax"),
+    ("Division by zero", "division_by_zero"),
+    ("Overflow", "overflow"),
+    ("Power overflow", "overflow"),
+    ("DomainError", "domain"),
+    ("Unknown identifier", "unknown_name"),
+    ("Unknown function", "unknown_name"),
+    ("Unknown operator", "unknown_name"),
+    ("Invalid variable value", "invalid_variable"),
+    ("Unsupported precision", "invalid_precision"),
+    ("All variable columns", "invalid_variable"),
+)
+
+
+def error_category(exc: BaseException) -> str:
+    """A short, bounded label for *exc*, for :data:`ERRORS`."""
+    if isinstance(exc, BudgetExceeded):
+        return "budget"
+    message = str(exc)
+    for prefix, category in _CATEGORIES:
+        if message.startswith(prefix):
+            return category
+    if "takes" in message and "argument" in message:
+        return "arity"
+    return "other"
+
+
+def record_error(exc: BaseException) -> None:
+    ERRORS.inc(error_category(exc))
+
+
+class MetricsMiddleware:
+    """ASGI middleware: in-flight gauge and ``total`` stage for POST requests.
+
+    Only POST requests (calculations and JSON-RPC calls) are measured, so
+    health checks, scrapes and long-lived event streams do not skew them.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or scope.get("method") != "POST":
+            await self.app(scope, receive, send)
+            return
+        IN_FLIGHT.inc()
+        start = perf_counter_ns()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            TOTAL.observe_ns(perf_counter_ns() - start)
+            IN_FLIGHT.dec()
+
+
+def render(registry: Optional[Registry] = None) -> str:
+    """The default (or given) registry in the Prometheus text format."""
+    return (registry or REGISTRY).render()
+
+
+__all__ = [
+    "CONTENT_TYPE",
+    "COMPILE",
+    "Counter",
+    "ERRORS",
+    "EVALUATE",
+    "Gauge",
+    "Histogram",
+    "IN_FLIGHT",
+    "LATENCY_BUCKETS",
+    "MetricsMiddleware",
+    "PARSE",
+    "REGISTRY",
+    "Registry",
+    "SERIALIZE",
+    "STAGE_SECONDS",
+    "TOOL_CALLS",
+    "TOTAL",
+    "error_category",
+    "perf_counter_ns",
+    "record_error",
+    "render",
+]
@@ -0,0 +1,154 @@
+"""Compact expression AST shared by every evaluation backend.
+
+The Lark parse tree is lowered once into these immutable nodes; the
+compiler (and any later analysis pass) works on nodes only, so it never
+has to know about Lark tokens, positions or tree metadata.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Iterator, List, Set, Tuple, Union
+
+from lark import Transformer, v_args
+
+
+@dataclass(frozen=True, slots=True)
+class Num:
+    """Numeric literal."""
+
+    value: Decimal
+
+
+@dataclass(frozen=True, slots=True)
+class Name:
+    """Identifier: a predefined constant or a caller-supplied variable."""
+
+    id: str
+
+
+@dataclass(frozen=True, slots=True)
+class Neg:
+    """Arithmetic negation (result of an odd number of leading minus signs)."""
+
+    operand: "Node"
+
+
+@dataclass(frozen=True, slots=True)
+class Pos:
+    """Unary plus: rounds to the context precision (``x + 0`` after simplification)."""
+
+    operand: "Node"
+
+
+@dataclass(frozen=True, slots=True)
+class BinOp:
+    """Binary operation; *op* is one of ``+ - * / ^``."""
+
+    op: str
+    left: "Node"
+    right: "Node"
+
+
+@dataclass(frozen=True, slots=True)
+class Call:
+    """Function call with positional arguments."""
+
+    name: str
+    args: Tuple["Node", ...]
+
+
+@dataclass(frozen=True, slots=True)
+class Vec:
+    """List literal ``[a, b, ...]``; evaluates to a :class:`calc_core.lists.Vector`."""
+
+    items: Tuple["Node", ...]
+
+
+Node = Union[Num, Name, Neg, Pos, BinOp, Call, Vec]
+
+
+# ---------- Lark tree -> AST ----------
+
+@v_args(inline=True)
+class AstBuilder(Transformer):
+    """Lower a parse tree produced by :func:`calc_core.parser.get_parser`."""
+
+    def number(self, token):
+        return Num(Decimal(token))
+
+    def const(self, token):
+        return Name(str(token))
+
+    def arg_list(self, *items):
+        return list(items)
+
+    def add(self, a, b):
+        return BinOp("+", a, b)
+
+    def sub(self, a, b):
+        return BinOp("-", a, b)
+
+    def mul(self, a, b):
+        return BinOp("*", a, b)
+
+    def div(self, a, b):
+        return BinOp("/", a, b)
+
+    def pow(self, a, b):
+        return BinOp("^", a, b)
+
+    def signed(self, *items):
+        """Collapse a leading sign sequence; only the parity of '-' matters."""
+        *sign_parts, value = items
+        minus_count = 0
+        for part in sign_parts:
+            tokens = part.children if hasattr(part, "children") else [part]
+            minus_count += sum(1 for tok in tokens if str(tok) == "-")
+        return Neg(value) if minus_count % 2 else value
+
+    def vector(self, *arg_nodes):
+        items: list[Node] = []
+        for n in arg_nodes:
+            items.extend(n if isinstance(n, list) else [n])
+        return Vec(tuple(items))
+
+    def func(self, name_token, *arg_nodes):
+        args: list[Node] = []
+        for n in arg_nodes:
+            args.extend(n if isinstance(n, list) else [n])
+        return Call(str(name_token), tuple(args))
+
+
+def children(node: Node) -> Tuple[Node, ...]:
+    """Direct sub-nodes of *node* in evaluation order."""
+    if isinstance(node, BinOp):
+        return (node.left, node.right)
+    if isinstance(node, (Neg, Pos)):
+        return (node.operand,)
+    if isinstance(node, Call):
+        return node.args
+    if isinstance(node, Vec):
+        return node.items
+    return ()
+
+
+def postorder(tree: Node) -> Iterator[Node]:
+    """Yield each distinct node object once, children before parents."""
+    seen: Set[int] = set()
+    order: List[Node] = []
+    stack: List[Tuple[Node, bool]] = [(tree, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            order.append(node)
+            continue
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        stack.append((node, True))
+        stack.extend((c, False) for c in children(node))
+    return iter(order)
+
+
+__all__ = ["Num", "Name", "Neg", "Pos", "BinOp", "Call", "Vec", "Node", "AstBuilder", "children", "postorder"]
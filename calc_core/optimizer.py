@@ -0,0 +1,140 @@
+"""Optimization pass run between parsing and compilation.
+
+Three rewrites, all of which preserve results bit-for-bit (after the final
+normalization) and the evaluation order that decides which error wins:
+
+* Identity simplification: ``x*1``, ``1*x``, ``x/1``, ``x-0`` and ``x^1``
+  become ``x`` when ``x`` is already rounded to the context precision
+  (the result of an operation); ``x+0`` / ``0+x`` become ``+x``, which is
+  exactly what Decimal computes for them.
+* Common-subexpression sharing: structurally identical subtrees are
+  interned to a single node object, so the compiler can evaluate them once
+  per call.
+* Constant folding: variable-free subtrees are marked so the compiler
+  evaluates them once per precision and reuses the value.  A subtree that
+  raises (``1/0``, ``0^0``) is never cached and raises on every call,
+  exactly as before.
+"""
+from __future__ import annotations
+
+from typing import Dict, NamedTuple, Set
+
+from .nodes import BinOp, Call, Name, Neg, Node, Num, Pos, Vec, children, postorder
+from .transformer import CONSTANTS, _FUNCS
+
+# Functions whose result is rounded to the context precision (abs() returns
+# its argument unchanged, the inverse trig functions go through float).
+_ROUNDED_CALLS = (set(_FUNCS) | {"log"}) - {"abs", "asin", "acos", "atan"}
+
+
+def _is_rounded(node: Node) -> bool:
+    """True if evaluating *node* yields a value already rounded to the context."""
+    if isinstance(node, (BinOp, Neg, Pos)):
+        return True
+    return isinstance(node, Call) and node.name in _ROUNDED_CALLS
+
+
+def _is_num(node: Node, value: int) -> bool:
+    return isinstance(node, Num) and node.value == value
+
+
+def _simplify_binop(node: BinOp) -> Node:
+    op, left, right = node.op, node.left, node.right
+    if op == "+":
+        if _is_num(right, 0):
+            return left if isinstance(left, Pos) else Pos(left)
+        if _is_num(left, 0):
+            return right if isinstance(right, Pos) else Pos(right)
+    elif op == "*":
+        if _is_num(right, 1) and _is_rounded(left):
+            return left
+        if _is_num(left, 1) and _is_rounded(right):
+            return right
+    elif op in "/^":
+        if _is_num(right, 1) and _is_rounded(left):
+            return left
+    elif op == "-":
+        if _is_num(right, 0) and _is_rounded(left):
+            return left
+    return node
+
+
+class _Interner:
+    """Bottom-up rebuild that simplifies and hash-conses nodes.
+
+    Keys use the identity of already-interned children, so each lookup is
+    O(1) regardless of subtree size.
+    """
+
+    def __init__(self) -> None:
+        self._table: Dict[tuple, Node] = {}
+
+    def _intern(self, key: tuple, node: Node) -> Node:
+        return self._table.setdefault(key, node)
+
+    def visit(self, tree: Node) -> Node:
+        """Rebuild *tree* children-first without recursing (trees can be deep)."""
+        done: Dict[int, Node] = {}
+        for node in postorder(tree):
+            done[id(node)] = self._rebuild(node, done)
+        return done[id(tree)]
+
+    def _rebuild(self, node: Node, done: Dict[int, Node]) -> Node:
+        if isinstance(node, Num):
+            # Keyed on the literal's exact representation: "2" and "2.0"
+            # are equal but not interchangeable digit-for-digit.
+            return self._intern((Num, str(node.value)), node)
+        if isinstance(node, Name):
+            return self._intern((Name, node.id), node)
+        if isinstance(node, (Neg, Pos)):
+            operand = done[id(node.operand)]
+            return self._intern((type(node), id(operand)), type(node)(operand))
+        if isinstance(node, BinOp):
+            left = done[id(node.left)]
+            right = done[id(node.right)]
+            simplified = _simplify_binop(BinOp(node.op, left, right))
+            if isinstance(simplified, Pos):
+                return self._intern((Pos, id(simplified.operand)), simplified)
+            if not isinstance(simplified, BinOp):
+                return simplified
+            return self._intern((BinOp, node.op, id(left), id(right)), simplified)
+        if isinstance(node, Call):
+            args = tuple(done[id(a)] for a in node.args)
+            return self._intern((Call, node.name) + tuple(id(a) for a in args), Call(node.name, args))
+        if isinstance(node, Vec):
+            items = tuple(done[id(i)] for i in node.items)
+            return self._intern((Vec,) + tuple(id(i) for i in items), Vec(items))
+        raise TypeError(f"Unsupported node {node!r}")
+
+
+def optimize(tree: Node) -> Node:
+    """Simplify identities and intern identical subtrees of *tree*."""
+    return _Interner().visit(tree)
+
+
+class Analysis(NamedTuple):
+    """Facts the compiler needs about an optimized tree (keyed by ``id(node)``)."""
+
+    refcounts: Dict[int, int]
+    pure: Set[int]
+
+
+def analyze(tree: Node) -> Analysis:
+    """Count parents of every shared node and find variable-free subtrees."""
+    refcounts: Dict[int, int] = {}
+    pure: Set[int] = set()
+    for node in postorder(tree):
+        kids = children(node)
+        for child in kids:
+            refcounts[id(child)] = refcounts.get(id(child), 0) + 1
+        if isinstance(node, Num):
+            pure.add(id(node))
+        elif isinstance(node, Name):
+            if node.id in CONSTANTS:
+                pure.add(id(node))
+        elif all(id(c) in pure for c in kids):
+            pure.add(id(node))
+    return Analysis(refcounts, pure)
+
+
+__all__ = ["Analysis", "analyze", "optimize"]
@@ -1,8 +1,19 @@
-"""Parser setup for calculator expressions using lark-parser."""
+"""Parser setup for calculator expressions using lark-parser.
+
+Building the LALR tables takes longer than everything else a fresh process
+does before its first answer, so the parser is built on first use and the
+tables are serialized to a cache file (``CALC_PARSER_CACHE``: a path, empty
+for Lark's per-user temp file, or ``off``).  Lark keys the file on the
+grammar, options and versions, and rebuilds it when any of them changes.
+"""
 from __future__ import annotations
 
+from functools import lru_cache
+
 from lark import Lark
 
+from .config import PARSER_CACHE
+
 # Grammar mirrors the design doc
 GRAMMAR = r"""
 ?start: expr
@@ -33,8 +44,9 @@ SIGN: "+" | "-"
      | FUNC "(" args ")" -> func
      | FUNC                -> const
      | "(" expr ")"
+     | "[" args "]"        -> vector
 
-// Comma-separated argument list
+// Comma-separated argument list (function arguments, list items)
 ?args: expr ("," expr)*   -> arg_list
 
 
@@ -47,4 +59,18 @@ NUMBER: /[0-9]+(\.[0-9]+)?([eE][+-]?\d+)?/
 %ignore WS_INLINE
 """
 
-PARSER: Lark = Lark(GRAMMAR, parser="lalr", lexer="contextual", propagate_positions=True)
+
+@lru_cache(maxsize=None)
+def get_parser() -> Lark:
+    """Return the shared LALR parser, loading its tables from the cache file."""
+    cache: bool | str = PARSER_CACHE or True
+    if PARSER_CACHE == "off":
+        cache = False
+    return Lark(GRAMMAR, parser="lalr", lexer="contextual", propagate_positions=True, cache=cache)
+
+
+def __getattr__(name: str) -> Lark:
+    # `PARSER` predates the lazy build; keep it importable.
+    if name == "PARSER":
+        return get_parser()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,204 @@
+"""Hand-written tokenizer and operator-precedence parser.
+
+Accepts exactly the language of :data:`calc_core.parser.GRAMMAR` and builds
+the same :mod:`calc_core.nodes` tree as the Lark parser, without Lark's
+generic lexer, position tracking or intermediate ``Tree`` objects.  The
+parser is iterative (an explicit operator stack), so neither long sums nor
+deep parentheses can exhaust the Python stack.
+
+Grammar points that a textbook precedence parser would get "wrong":
+
+* a sign sequence is only allowed where a *product* starts (at the start,
+  after ``(``, ``[``, ``,`` or a binary ``+``/``-``): ``2*-3`` and ``2^-3``
+  are syntax errors;
+* a sign sequence binds looser than ``^`` but tighter than ``*``/``/``:
+  ``-2^2`` is ``-(2^2)`` and ``-2*3`` is ``(-2)*3``;
+* only the parity of ``-`` in a sign sequence matters; ``+x`` is ``x``.
+"""
+from __future__ import annotations
+
+import re
+from decimal import Decimal
+from typing import List, NoReturn, Optional, Tuple
+
+from .errors import CalcError
+from .nodes import BinOp, Call, Name, Neg, Node, Num, Vec
+
+# Same terminals as the Lark grammar: NUMBER, CNAME, WS_INLINE.
+_TOKEN = re.compile(
+    r"(?P<ws>[ \t]+)"
+    r"|(?P<num>[0-9]+(?:\.[0-9]+)?(?:[eE][+-]?\d+)?)"
+    r"|(?P<name>[A-Za-z_][A-Za-z0-9_]*)"
+    r"|(?P<op>[-+*/^(),\[\]])"
+)
+
+NUM, NAME, OP, END = "number", "name", "op", "end"
+
+Token = Tuple[str, str, int]  # kind, text, column (1-based)
+
+# Binding power of binary operators and of a (collapsed) negative sign.
+_BINARY = {"+": 1, "-": 1, "*": 2, "/": 2, "^": 4}
+_NEG = 3
+
+
+def tokenize(expr: str) -> List[Token]:
+    """Split *expr* into tokens, ending with an ``END`` token."""
+    tokens: List[Token] = []
+    pos, size = 0, len(expr)
+    match = _TOKEN.match
+    while pos < size:
+        m = match(expr, pos)
+        if m is None:
+            raise CalcError(f"Syntax error at column {pos + 1}: unexpected character {expr[pos]!r}")
+        kind = m.lastgroup
+        if kind != "ws":
+            tokens.append((NUM if kind == "num" else NAME if kind == "name" else OP, m.group(), pos + 1))
+        pos = m.end()
+    tokens.append((END, "", size + 1))
+    return tokens
+
+
+def _unexpected(token: Token) -> NoReturn:
+    kind, text, column = token
+    if kind == END:
+        raise CalcError("Syntax error: unexpected end of expression")
+    raise CalcError(f"Syntax error at column {column}: unexpected {text!r}")
+
+
+class _Call:
+    """Operator-stack marker for an open ``name(`` with its argument count."""
+
+    __slots__ = ("name", "argc")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.argc = 1
+
+
+class _List(_Call):
+    """Operator-stack marker for an open ``[`` with its item count."""
+
+    __slots__ = ()
+
+    def __init__(self) -> None:
+        super().__init__("[")
+
+
+_PAREN = "("
+
+
+def parse(expr: str) -> Node:
+    """Parse *expr* into an AST.
+
+    Raises
+    ------
+    CalcError
+        If *expr* is not in the grammar; the message starts with
+        ``Syntax error``.
+    """
+    tokens = tokenize(expr)
+    operands: List[Node] = []
+    # Entries: a binary operator, "neg", "(" or a _Call (or _List) marker.
+    ops: List[object] = []
+
+    def reduce() -> None:
+        op = ops.pop()
+        if op == "neg":
+            operands.append(Neg(operands.pop()))
+        else:
+            right = operands.pop()
+            operands.append(BinOp(op, operands.pop(), right))
+
+    def binding(op: object) -> int:
+        if op == "neg":
+            return _NEG
+        return _BINARY.get(op, 0) if isinstance(op, str) else 0
+
+    i = 0
+    expect_operand = True
+    signs_allowed = True
+    while True:
+        token = tokens[i]
+        kind, text, _ = token
+        if expect_operand:
+            if kind == OP and text in "+-":
+                if not signs_allowed:
+                    _unexpected(token)
+                minus = 0
+                while tokens[i][0] == OP and tokens[i][1] in "+-":
+                    minus += tokens[i][1] == "-"
+                    i += 1
+                if minus % 2:
+                    ops.append("neg")
+                signs_allowed = False
+                continue
+            if kind == NUM:
+                operands.append(Num(Decimal(text)))
+                expect_operand = False
+            elif kind == NAME:
+                if tokens[i + 1][1] == "(" and tokens[i + 1][0] == OP:
+                    ops.append(_Call(text))
+                    i += 1
+                    signs_allowed = True
+                else:
+                    operands.append(Name(text))
+                    expect_operand = False
+            elif kind == OP and text == "(":
+                ops.append(_PAREN)
+                signs_allowed = True
+            elif kind == OP and text == "[":
+                ops.append(_List())
+                signs_allowed = True
+            else:
+                _unexpected(token)
+            i += 1
+            continue
+
+        # After an operand: a binary operator, ")", "]", "," or the end.
+        if kind == OP and text in _BINARY:
+            power = _BINARY[text]
+            # "^" is right-associative; everything else groups to the left.
+            while ops and (binding(ops[-1]) > power or (binding(ops[-1]) == power and text != "^")):
+                reduce()
+            ops.append(text)
+            expect_operand = True
+            signs_allowed = text in "+-"
+        elif kind == OP and text in "),]":
+            while ops and binding(ops[-1]):
+                reduce()
+            top: Optional[object] = ops[-1] if ops else None
+            if text == ")":
+                if top is _PAREN:
+                    ops.pop()
+                elif isinstance(top, _Call) and not isinstance(top, _List):
+                    ops.pop()
+                    args = operands[len(operands) - top.argc:]
+                    del operands[len(operands) - top.argc:]
+                    operands.append(Call(top.name, tuple(args)))
+                else:
+                    _unexpected(token)
+            elif text == "]":
+                if not isinstance(top, _List):
+                    _unexpected(token)
+                ops.pop()
+                items = operands[len(operands) - top.argc:]
+                del operands[len(operands) - top.argc:]
+                operands.append(Vec(tuple(items)))
+            else:
+                if not isinstance(top, _Call):
+                    _unexpected(token)
+                top.argc += 1
+                expect_operand = True
+                signs_allowed = True
+        elif kind == END:
+            while ops and binding(ops[-1]):
+                reduce()
+            if ops:
+                _unexpected(token)
+            return operands[0]
+        else:
+            _unexpected(token)
+        i += 1
+
+
+__all__ = ["parse", "tokenize"]
@@ -0,0 +1,236 @@
+"""Profile the next N calculations and write the result to a file.
+
+The admin switch behind ``POST /admin/profile`` and the ``admin/profile``
+JSON-RPC method (both only with ``CALC_ADMIN=1``)::
+
+    profiler.start(requests=200, kind="cprofile")   # or kind="sampling"
+    ... the next 200 calculations submitted to the executor are profiled ...
+    profiler.status()  # {"active": False, "path": ".../calc-cprofile-....prof", ...}
+
+Two kinds:
+
+* ``cprofile`` -- deterministic, via :mod:`cProfile`; the file is a
+  :mod:`pstats` dump (``python -m pstats``, snakeviz, ...).  Since Python
+  3.12 only one profiler can be active per process and it sees every
+  thread, so profiled calculations run one at a time and a concurrent
+  unprofiled one can show up in the profile.
+* ``sampling`` -- a thread samples the calculation's stack every
+  ``interval`` seconds (in practice no more often than the interpreter's
+  switch interval, 5 ms by default, when the calculation holds the GIL);
+  the file has one ``frame;frame;... count`` line per distinct stack
+  (the "folded" input of flame graph tools).
+
+Calculations are claimed when submitted to :class:`calc_core.executor.CalcExecutor`
+and profiled where they run, so process pools work too.  The file is
+written when the last claimed calculation finishes (even if its request
+was cancelled), or by :meth:`Profiler.stop`.
+"""
+from __future__ import annotations
+
+import cProfile
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from .config import PROFILE_DIR
+
+KINDS = ("cprofile", "sampling")
+MAX_REQUESTS = 10_000
+
+# cProfile is process-wide since Python 3.12: one profiled call at a time.
+_CPROFILE_LOCK = threading.Lock()
+
+
+class Ticket(NamedTuple):
+    """A claimed slot of the current profiling session."""
+
+    session: int
+    kind: str
+    interval: float
+
+
+class _RawStats:
+    """Adapter that lets :class:`pstats.Stats` load a plain stats dict."""
+
+    def __init__(self, stats: Dict) -> None:
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+def _frame_label(frame: Any) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _sample(ident: int, interval: float, stop: threading.Event, counts: Counter) -> None:
+    while not stop.wait(interval):
+        frame = sys._current_frames().get(ident)
+        stack = []
+        while frame is not None:
+            stack.append(_frame_label(frame))
+            frame = frame.f_back
+        if stack:
+            counts[";".join(reversed(stack))] += 1
+
+
+def run_profiled(kind: str, interval: float, fn: Callable[..., Any], args: Tuple, kwargs: Dict) -> Tuple:
+    """Call ``fn(*args, **kwargs)`` under a profiler; runs in the worker.
+
+    Returns ``(ok, value_or_exception, data)``; *data* is picklable, so this
+    works in process pools as well.
+    """
+    if kind == "cprofile":
+        profile = cProfile.Profile()
+        with _CPROFILE_LOCK:
+            profile.enable()
+            try:
+                outcome = (True, fn(*args, **kwargs))
+            except Exception as exc:  # noqa: BLE001 - handed back to the caller
+                outcome = (False, exc)
+            finally:
+                profile.disable()
+        profile.create_stats()
+        return (*outcome, profile.stats)
+    counts: Counter = Counter()
+    stop = threading.Event()
+    sampler = threading.Thread(target=_sample, args=(threading.get_ident(), interval, stop, counts),
+                               name="calc-sampler", daemon=True)
+    sampler.start()
+    try:
+        outcome = (True, fn(*args, **kwargs))
+    except Exception as exc:  # noqa: BLE001
+        outcome = (False, exc)
+    finally:
+        stop.set()
+        sampler.join()
+    return (*outcome, dict(counts))
+
+
+class Profiler:
+    """Arms profiling for a number of calculations and collects the results."""
+
+    def __init__(self, directory: str = PROFILE_DIR) -> None:
+        self.directory = directory or os.path.join(tempfile.gettempdir(), "calc-profiles")
+        self._lock = threading.Lock()
+        self._session = 0
+        self._remaining = 0  # slots not yet claimed
+        self._pending = 0  # claimed, not finished
+        self._kind = "cprofile"
+        self._interval = 0.001
+        self._requested = 0
+        self._profiled = 0
+        self._stats: Optional[pstats.Stats] = None
+        self._folded: Counter = Counter()
+        self._path: Optional[str] = None
+
+    @property
+    def armed(self) -> bool:
+        """Cheap check for the executor's hot path (no lock)."""
+        return self._remaining > 0
+
+    def start(self, requests: int, kind: str = "cprofile", interval: float = 0.001) -> Dict[str, Any]:
+        """Profile the next *requests* calculations; replaces any running session.
+
+        Raises
+        ------
+        ValueError
+            On an unknown *kind* or out-of-range *requests* / *interval*.
+        """
+        if kind not in KINDS:
+            raise ValueError(f"kind must be one of {', '.join(KINDS)}")
+        if isinstance(requests, bool) or not isinstance(requests, int) or not 1 <= requests <= MAX_REQUESTS:
+            raise ValueError(f"requests must be an integer in 1..{MAX_REQUESTS}")
+        if not 0.0001 <= interval <= 1:
+            raise ValueError("interval must be between 0.0001 and 1 second")
+        with self._lock:
+            self._session += 1
+            self._remaining, self._pending = requests, 0
+            self._kind, self._interval = kind, interval
+            self._requested, self._profiled = requests, 0
+            self._stats, self._folded = None, Counter()
+            suffix = "prof" if kind == "cprofile" else "folded"
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            self._path = os.path.join(self.directory, f"calc-{kind}-{stamp}-{os.getpid()}-{self._session}.{suffix}")
+            return self._status()
+
+    def stop(self) -> Dict[str, Any]:
+        """End the session now, writing whatever has been collected."""
+        with self._lock:
+            self._remaining = 0
+            if self._pending == 0:
+                self._dump()
+            return self._status()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return self._status()
+
+    def _status(self) -> Dict[str, Any]:
+        return {
+            "active": self._remaining > 0 or self._pending > 0,
+            "kind": self._kind,
+            "requested": self._requested,
+            "profiled": self._profiled,
+            "remaining": self._remaining,
+            "path": self._path,
+        }
+
+    def claim(self) -> Optional[Ticket]:
+        """Reserve a slot for one calculation, or None if the session is full."""
+        with self._lock:
+            if self._remaining <= 0:
+                return None
+            self._remaining -= 1
+            self._pending += 1
+            return Ticket(self._session, self._kind, self._interval)
+
+    def record(self, ticket: Ticket, outcome: Optional[Tuple]) -> None:
+        """Merge the profile of a finished calculation (None: it failed to run)."""
+        with self._lock:
+            if ticket.session != self._session:
+                return  # a newer session has started
+            self._pending -= 1
+            if outcome is not None:
+                data = outcome[2]
+                self._profiled += 1
+                if ticket.kind == "cprofile":
+                    if self._stats is None:
+                        self._stats = pstats.Stats(_RawStats(data))
+                    else:
+                        self._stats.add(_RawStats(data))
+                else:
+                    self._folded.update(data)
+            if self._remaining == 0 and self._pending == 0:
+                self._dump()
+
+    @staticmethod
+    def unwrap(outcome: Tuple) -> Any:
+        """The value returned by :func:`run_profiled`'s call, or raise its exception."""
+        ok, value, _data = outcome
+        if not ok:
+            raise value
+        return value
+
+    def _dump(self) -> None:
+        if self._path is None or not self._profiled:
+            return
+        os.makedirs(os.path.dirname(self._path), exist_ok=True)
+        if self._kind == "cprofile":
+            self._stats.dump_stats(self._path)
+        else:
+            with open(self._path, "w", encoding="utf-8") as fh:
+                for stack, count in self._folded.most_common():
+                    fh.write(f"{stack} {count}\n")
+
+
+# Used by the shared calculation executor.
+profiler = Profiler()
+
+__all__ = ["KINDS", "MAX_REQUESTS", "Profiler", "Ticket", "profiler", "run_profiled"]
@@ -0,0 +1,334 @@
+"""Calculation sessions: named formulas that recompute incrementally.
+
+A session maps names to formulas (``total = price * qty``).  Formulas may
+refer to each other; the session keeps the dependency graph and the last
+value of every formula, so that changing one formula re-evaluates only the
+formulas downstream of it, in dependency order.  Propagation stops early
+where a recomputed value comes out unchanged.
+
+Each formula keeps its :class:`CompiledExpression` for the life of the
+session, independent of :data:`calc_core.expression_cache` evictions.
+
+Sessions live in this process (see ``stateful`` tools in
+:mod:`server.registry`).  Their number and size are bounded: the least
+recently used session is evicted beyond ``CALC_SESSION_MAX``, a session
+refuses formulas beyond ``CALC_SESSION_MAX_FORMULAS``, and sessions idle
+for ``CALC_SESSION_TTL`` seconds expire (see :mod:`calc_core.config`).
+"""
+from __future__ import annotations
+
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+
+from . import Precision, _calculate, _resolve_precision, compile_expression
+from .compiler import CompiledExpression
+from .config import SESSION_MAX, SESSION_MAX_FORMULAS, SESSION_TTL
+from .errors import CalcError
+from .lists import REDUCTIONS
+from .metrics import REGISTRY
+from .transformer import _FUNCS, CONSTANTS
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+class Formula:
+    """One named formula and its last outcome (a value or an error message)."""
+
+    __slots__ = ("expr", "compiled", "value", "error")
+
+    def __init__(self, expr: str, compiled: CompiledExpression) -> None:
+        self.expr = expr
+        self.compiled = compiled
+        self.value: Optional[Decimal | float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def deps(self) -> FrozenSet[str]:
+        return self.compiled.names
+
+    def outcome(self) -> Dict[str, str]:
+        return {"error": self.error} if self.error is not None else {"result": str(self.value)}
+
+
+class Session:
+    """Formulas of one session, their dependency graph and current values.
+
+    ``users[n]`` holds the formulas that refer to *n*, including names
+    that are not defined yet (those formulas fail until *n* is defined).
+    Mutations hold the session lock; evaluation happens under it too, so
+    readers never see a half-propagated update.
+    """
+
+    def __init__(self, session_id: str, precision: int | str) -> None:
+        self.id = session_id
+        self.precision = precision
+        self.formulas: Dict[str, Formula] = {}
+        self.users: Dict[str, Set[str]] = {}
+        self.lock = threading.Lock()
+
+    def set(self, name: str, expr: str) -> Dict[str, Dict[str, str]]:
+        """Define or replace formula *name*; return the outcomes that were recomputed."""
+        compiled = compile_expression(expr)
+        self._check_cycle(name, compiled.names)
+        old = self.formulas.get(name)
+        if old is None and len(self.formulas) >= SESSION_MAX_FORMULAS:
+            raise CalcError(f"Session is full ({SESSION_MAX_FORMULAS} formulas)")
+        if old is not None:
+            self._unlink(name, old.deps)
+        formula = self.formulas[name] = Formula(expr, compiled)
+        for dep in formula.deps:
+            self.users.setdefault(dep, set()).add(name)
+        self._evaluate(formula)
+        recomputed = {name: formula.outcome()}
+        if old is not None and (formula.value, formula.error) == (old.value, old.error):
+            return recomputed  # same value: nothing downstream changes
+        return {**recomputed, **self._propagate(name)}
+
+    def drop(self, name: str) -> Dict[str, Dict[str, str]]:
+        """Remove formula *name*; its users are recomputed (and now fail)."""
+        formula = self.formulas.pop(name, None)
+        if formula is None:
+            raise CalcError(f"Unknown formula '{name}'")
+        self._unlink(name, formula.deps)
+        return self._propagate(name)
+
+    def outcomes(self, names: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, str]]:
+        """Expression and current outcome of *names* (default: every formula)."""
+        result = {}
+        for name in self.formulas if names is None else names:
+            formula = self.formulas.get(name)
+            if formula is None:
+                raise CalcError(f"Unknown formula '{name}'")
+            result[name] = {"expr": formula.expr, **formula.outcome()}
+        return result
+
+    # Graph -------------------------------------------------------------
+
+    def _unlink(self, name: str, deps: FrozenSet[str]) -> None:
+        for dep in deps:
+            users = self.users.get(dep)
+            if users is not None:
+                users.discard(name)
+                if not users:
+                    del self.users[dep]
+
+    def _check_cycle(self, name: str, deps: FrozenSet[str]) -> None:
+        """Raise if defining *name* over *deps* would make it depend on itself."""
+        parent: Dict[str, Optional[str]] = {dep: None for dep in deps}
+        stack = list(deps)
+        while stack:
+            current = stack.pop()
+            if current == name:
+                chain = []
+                link = parent[name]
+                while link is not None:
+                    chain.append(link)
+                    link = parent[link]
+                raise CalcError(f"Circular reference: {' -> '.join([name, *reversed(chain), name])}")
+            formula = self.formulas.get(current)
+            if formula is None:
+                continue
+            for dep in formula.deps:
+                if dep not in parent:
+                    parent[dep] = current
+                    stack.append(dep)
+
+    def _downstream(self, name: str) -> List[str]:
+        """Formulas that depend on *name*, directly or not, in evaluation order."""
+        affected: Set[str] = set()
+        stack = [name]
+        while stack:
+            for user in self.users.get(stack.pop(), ()):
+                if user not in affected:
+                    affected.add(user)
+                    stack.append(user)
+        # Kahn's algorithm on the affected subgraph (acyclic by construction).
+        pending = {n: sum(dep in affected for dep in self.formulas[n].deps) for n in affected}
+        ready = sorted(n for n, count in pending.items() if not count)
+        order = []
+        while ready:
+            current = ready.pop()
+            order.append(current)
+            for user in self.users.get(current, ()):
+                if user in pending:
+                    pending[user] -= 1
+                    if not pending[user]:
+                        ready.append(user)
+        return order
+
+    def _propagate(self, name: str) -> Dict[str, Dict[str, str]]:
+        """Recompute what depends on *name*, skipping formulas whose inputs all came out the same."""
+        changed: Set[str] = {name}
+        recomputed: Dict[str, Dict[str, str]] = {}
+        for user in self._downstream(name):
+            formula = self.formulas[user]
+            if changed.isdisjoint(formula.deps):
+                continue  # every input came out the same
+            before = (formula.value, formula.error)
+            self._evaluate(formula)
+            recomputed[user] = formula.outcome()
+            if (formula.value, formula.error) != before:
+                changed.add(user)
+        return recomputed
+
+    def _evaluate(self, formula: Formula) -> None:
+        env: Dict[str, Decimal | float] = {}
+        for dep in sorted(formula.deps):  # report the same missing input every time
+            source = self.formulas.get(dep)
+            if source is None:
+                formula.value, formula.error = None, f"Unknown identifier '{dep}'"
+                return
+            if source.error is not None:
+                formula.value, formula.error = None, f"'{dep}' has no value"
+                return
+            env[dep] = source.value
+        try:
+            formula.value, formula.error = _calculate(formula.compiled, self.precision, env), None
+        except CalcError as ce:
+            formula.value, formula.error = None, str(ce)
+
+
+class SessionStore:
+    """Thread-safe, bounded LRU of :class:`Session` objects with idle expiry."""
+
+    def __init__(self, maxsize: int = SESSION_MAX, ttl: float = SESSION_TTL) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be >= 1")
+        if ttl < 0:
+            raise ValueError("ttl must be >= 0")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # Least recently used first; values are (session, last use).
+        self._data: OrderedDict[str, tuple[Session, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expire(self, now: float) -> None:
+        while self.ttl and self._data:
+            session_id, (_, used) = next(iter(self._data.items()))
+            if used + self.ttl > now:
+                break
+            del self._data[session_id]
+            self.expirations += 1
+
+    def _get(self, session_id: str) -> Session:
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._data.get(session_id)
+            if entry is None:
+                raise CalcError(f"Unknown or expired session '{session_id}'")
+            self._data[session_id] = (entry[0], now)
+            self._data.move_to_end(session_id)
+            return entry[0]
+
+    def _insert(self, session: Session) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            self._data[session.id] = (session, now)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def define(
+        self, name: str, expr: str, session_id: Optional[str] = None, precision: Precision = None
+    ) -> Dict[str, object]:
+        """Add formula *name* to a session (a new one if *session_id* is None).
+
+        Returns the session id and the outcome of every formula that was
+        evaluated: *name* itself and any earlier formulas that refer to it.
+
+        Raises
+        ------
+        CalcError
+            For an invalid or already defined name, a syntax error, a
+            circular reference, a full or unknown session, or a *precision*
+            different from the session's.
+        """
+        _check_name(name)
+        if session_id is None:
+            # Registered only once its first formula is in: a failed define
+            # must not leave an unreachable session taking up a slot.
+            session = Session(secrets.token_hex(8), _resolve_precision(precision))
+            updated = session.set(name, expr)
+            self._insert(session)
+            return {"session": session.id, "updated": updated}
+        session = self._get(session_id)
+        if precision is not None and _resolve_precision(precision) != session.precision:
+            raise CalcError(f"Session precision is {session.precision!r}")
+        with session.lock:
+            if name in session.formulas:
+                raise CalcError(f"Formula '{name}' is already defined; use update")
+            updated = session.set(name, expr)
+        return {"session": session.id, "updated": updated}
+
+    def update(self, session_id: str, name: str, expr: str) -> Dict[str, object]:
+        """Replace formula *name* and recompute only the formulas depending on it."""
+        session = self._get(session_id)
+        with session.lock:
+            if name not in session.formulas:
+                raise CalcError(f"Unknown formula '{name}'")
+            updated = session.set(name, expr)
+        return {"session": session.id, "updated": updated}
+
+    def get(self, session_id: str, names: Optional[Iterable[str]] = None) -> Dict[str, object]:
+        """Current expressions and outcomes of *names* (default: all formulas)."""
+        session = self._get(session_id)
+        with session.lock:
+            formulas = session.outcomes(names)
+        return {"session": session.id, "precision": session.precision, "formulas": formulas}
+
+    def drop(self, session_id: str, name: Optional[str] = None) -> Dict[str, object]:
+        """Remove formula *name*, or the whole session if *name* is None."""
+        if name is None:
+            with self._lock:
+                if self._data.pop(session_id, None) is None:
+                    raise CalcError(f"Unknown or expired session '{session_id}'")
+            return {"session": session_id, "dropped": True}
+        session = self._get(session_id)
+        with session.lock:
+            updated = session.drop(name)
+        return {"session": session.id, "updated": updated}
+
+    def clear(self) -> None:
+        """Drop every session."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def formula_count(self) -> int:
+        with self._lock:
+            sessions = [session for session, _ in self._data.values()]
+        return sum(len(session.formulas) for session in sessions)
+
+
+def _check_name(name: object) -> None:
+    if not isinstance(name, str) or not _IDENTIFIER.fullmatch(name):
+        raise CalcError(f"Invalid formula name {name!r}")
+    if name in CONSTANTS or name in _FUNCS or name in REDUCTIONS or name == "log":
+        raise CalcError(f"'{name}' is a built-in name")
+
+
+# Shared by the MCP and REST servers (in the server process, never a worker).
+sessions = SessionStore()
+
+
+@REGISTRY.add_collector
+def _session_metrics():
+    yield "calc_sessions", "gauge", "Live calculation sessions.", [("", {}, len(sessions))]
+    yield "calc_session_formulas", "gauge", "Formulas held by live sessions.", [("", {}, sessions.formula_count())]
+    yield "calc_session_evictions_total", "counter", "Sessions dropped to stay within CALC_SESSION_MAX.", [("", {}, sessions.evictions)]
+    yield "calc_session_expirations_total", "counter", "Sessions dropped after CALC_SESSION_TTL idle seconds.", [("", {}, sessions.expirations)]
+
+
+__all__ = ["Formula", "Session", "SessionStore", "sessions"]
@@ -0,0 +1,426 @@
+"""Numerical solvers over a compiled expression in one variable.
+
+:func:`solve` finds a root in a bracketing interval (Brent's method),
+:func:`integrate` integrates over a finite interval (globally adaptive
+Gauss-Legendre quadrature) and :func:`summation` adds up a finite series.
+
+Each call compiles the expression once and then evaluates it in a loop,
+binding the solver variable directly in the environment: no parsing, no
+caches, no per-point quantization.  Arithmetic runs at the requested
+precision plus a few guard digits and the answer is rounded once.
+
+Every call is bounded by ``CALC_SOLVER_MAX_ITER`` (root iterations or
+integration subdivisions), ``CALC_SOLVER_MAX_TERMS`` (terms of a sum) and
+``CALC_SOLVER_TIMEOUT`` seconds (see :mod:`calc_core.config`); running
+into a limit raises :class:`BudgetExceeded`.
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal, localcontext
+from typing import Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+from . import FLOAT64, Precision, _calculate, _quantize, _resolve_precision, compile_expression
+from .config import SOLVER_MAX_ITER, SOLVER_MAX_TERMS, SOLVER_TIMEOUT
+from .cost import check_work
+from .errors import BudgetExceeded, CalcError
+from .lists import Vector
+from .transformer import _coerce_variables
+
+# Extra digits carried through the iterations, dropped when rounding the answer.
+GUARD = 5
+
+Bound = Decimal | int | float | str
+
+
+class Root(NamedTuple):
+    """Result of :func:`solve`: the root, f(root) and the iterations used."""
+
+    root: Decimal
+    residual: Decimal
+    iterations: int
+
+
+class Integral(NamedTuple):
+    """Result of :func:`integrate`: the value, its estimated absolute error and the panel count."""
+
+    value: Decimal
+    error: Decimal
+    intervals: int
+
+
+class Series(NamedTuple):
+    """Result of :func:`summation`: the sum and the number of terms."""
+
+    value: Decimal
+    terms: int
+
+
+class _Deadline:
+    def __init__(self, what: str, timeout: float) -> None:
+        self.what = what
+        self.timeout = timeout
+        self.end = time.monotonic() + timeout
+
+    def check(self) -> None:
+        if time.monotonic() > self.end:
+            raise BudgetExceeded(f"BudgetExceeded: {self.what} exceeded the time limit of {self.timeout:g}s")
+
+
+def _function(
+    expr: str, var: str, variables: Optional[Mapping[str, object]], prec: int
+) -> Callable[[Decimal], Decimal]:
+    """Compile *expr* once; return ``f(x)`` with *var* bound to x (call it inside the working context)."""
+    compiled = compile_expression(expr)
+    check_work(compiled.cost, prec)
+    env: Dict[str, Decimal] = _coerce_variables(variables)
+    if var in env:
+        raise CalcError(f"'{var}' is the solver variable and cannot also be given a value")
+    missing = sorted(compiled.names - env.keys() - {var})
+    if missing:
+        raise CalcError(f"Unknown identifier '{missing[0]}'")
+    evaluate = compiled.evaluate
+
+    def f(x: Decimal) -> Decimal:
+        env[var] = x
+        try:
+            y = evaluate(env)
+        except CalcError as ce:
+            raise CalcError(f"{ce} (at {var} = {x})") from ce
+        except Exception as exc:  # noqa: BLE001 - decimal signals
+            raise CalcError(f"{exc} (at {var} = {x})") from exc
+        if type(y) is Vector:
+            raise CalcError(f"'{expr}' must evaluate to a number, not a list")
+        if not y.is_finite():
+            raise CalcError(f"Overflow (at {var} = {x})")
+        return y
+
+    return f
+
+
+def _precision(precision: Precision) -> int:
+    prec = _resolve_precision(precision)
+    if prec == FLOAT64:
+        raise CalcError("Solvers need a decimal precision (digits), not 'float64'")
+    return prec
+
+
+def _bound(value: Bound, prec: int, variables: Optional[Mapping[str, object]]) -> Decimal:
+    """A number, or an expression such as ``"pi/2"`` evaluated with *variables*."""
+    if isinstance(value, str):
+        converted = _calculate(compile_expression(value), prec + GUARD, variables or {})
+    else:
+        (converted,) = _coerce_variables({"bound": value}).values()
+    if type(converted) is Vector:
+        raise CalcError(f"Bounds must be numbers, got {value}")
+    if not converted.is_finite():
+        raise CalcError(f"Bounds must be finite, got {value}")
+    return converted
+
+
+def _tolerance(value: Bound, prec: int, variables: Optional[Mapping[str, object]]) -> Decimal:
+    tol = _bound(value, prec, variables)
+    if tol <= 0:
+        raise CalcError("tol must be positive")
+    return tol
+
+
+# ---------------------------------------------------------------------------
+# Root finding
+# ---------------------------------------------------------------------------
+
+def solve(
+    expr: str,
+    var: str,
+    lower: Bound,
+    upper: Bound,
+    /,
+    *,
+    precision: Precision = None,
+    tol: Bound | None = None,
+    variables: Optional[Mapping[str, object]] = None,
+    max_iter: int = SOLVER_MAX_ITER,
+    timeout: float = SOLVER_TIMEOUT,
+) -> Root:
+    """Find x in [*lower*, *upper*] with ``expr(x) = 0``.
+
+    *expr* must take values of opposite sign (or zero) at the two ends.
+    Brent's method combines inverse quadratic interpolation, secant steps
+    and bisection: it converges superlinearly on smooth functions and
+    never does worse than bisection.  It stops once the bracket is within
+    *tol* (absolute; default: the working precision, relative to x).
+
+    Raises
+    ------
+    CalcError
+        On a syntax error, no sign change, or an evaluation error inside
+        the interval; :class:`BudgetExceeded` when *max_iter* or *timeout*
+        is exceeded.
+    """
+    prec = _precision(precision)
+    deadline = _Deadline("solve", timeout)
+    with localcontext() as ctx:
+        ctx.prec = prec + GUARD
+        f = _function(expr, var, variables, prec)
+        a, b = _bound(lower, prec, variables), _bound(upper, prec, variables)
+        eps = Decimal(10) ** -prec
+        tol = _tolerance(tol, prec, variables) if tol is not None else eps
+        fa, fb = f(a), f(b)
+        if fa.is_signed() == fb.is_signed() and fa and fb:
+            raise CalcError(f"No sign change: f({a}) = {+fa} and f({b}) = {+fb} have the same sign")
+        c, fc = b, fb
+        d = e = b - a
+        for iteration in range(max_iter + 1):
+            if fb and fc and fb.is_signed() == fc.is_signed():
+                c, fc = a, fa
+                d = e = b - a
+            if abs(fc) < abs(fb):
+                a, b, c = b, c, b
+                fa, fb, fc = fb, fc, fb
+            tol1 = 2 * eps * abs(b) + tol / 2
+            xm = (c - b) / 2
+            if abs(xm) <= tol1 or not fb:
+                break
+            if iteration == max_iter:
+                raise BudgetExceeded(
+                    f"BudgetExceeded: solve did not converge in {max_iter} iterations (bracket [{b}, {c}])"
+                )
+            deadline.check()
+            if abs(e) >= tol1 and abs(fa) > abs(fb):
+                s = fb / fa
+                if a == c:  # secant
+                    p, q = 2 * xm * s, 1 - s
+                else:  # inverse quadratic interpolation
+                    q, r = fa / fc, fb / fc
+                    p = s * (2 * xm * q * (q - r) - (b - a) * (r - 1))
+                    q = (q - 1) * (r - 1) * (s - 1)
+                if p > 0:
+                    q = -q
+                p = abs(p)
+                if 2 * p < min(3 * xm * q - abs(tol1 * q), abs(e * q)):
+                    e, d = d, p / q
+                else:
+                    d = e = xm
+            else:
+                d = e = xm
+            a, fa = b, fb
+            b += d if abs(d) > tol1 else tol1.copy_sign(xm)
+            fb = f(b)
+    with localcontext() as ctx:
+        ctx.prec = prec
+        return Root(_quantize(+b), _quantize(+fb), iteration)
+
+
+# ---------------------------------------------------------------------------
+# Integration
+# ---------------------------------------------------------------------------
+
+def _rule_size(prec: int) -> int:
+    """Gauss-Legendre points per panel: more digits, higher order (even, so panel midpoints are skipped)."""
+    return 2 * max(4, min(prec // 6, 40))
+
+
+Rule = Tuple[Tuple[Decimal, Decimal], ...]
+
+# Rules by (n, prec); building one takes seconds at thousands of digits.
+_RULES: "OrderedDict[Tuple[int, int], Rule]" = OrderedDict()
+_RULES_MAX = 32
+_rules_lock = threading.Lock()
+
+
+def gauss_legendre(n: int, prec: int, check: Optional[Callable[[], None]] = None) -> Rule:
+    """Nodes and weights of the *n*-point Gauss-Legendre rule on [-1, 1] to *prec* digits.
+
+    Newton's method on the Legendre polynomial P_n, started from the
+    classical float approximation of each root.  Rules are cached by
+    ``(n, prec)``; *check* is called between Newton steps of a rule being
+    built and may raise to abandon it (the solver deadline).
+    """
+    key = (n, prec)
+    with _rules_lock:
+        rule = _RULES.get(key)
+        if rule is not None:
+            _RULES.move_to_end(key)
+            return rule
+    rule = _build_rule(n, prec, check)
+    with _rules_lock:
+        _RULES[key] = rule
+        if len(_RULES) > _RULES_MAX:
+            _RULES.popitem(last=False)
+    return rule
+
+
+def _build_rule(n: int, prec: int, check: Optional[Callable[[], None]]) -> Rule:
+    with localcontext() as ctx:
+        ctx.prec = prec + 5
+        tiny = Decimal(10) ** -(prec + 2)
+        half: List[Tuple[Decimal, Decimal]] = []
+        for i in range(1, n // 2 + 1):
+            x = Decimal(math.cos(math.pi * (i - 0.25) / (n + 0.5)))
+            for _ in range(100):
+                if check is not None:
+                    check()
+                p0, p1 = Decimal(1), x
+                for k in range(2, n + 1):
+                    p0, p1 = p1, ((2 * k - 1) * x * p1 - (k - 1) * p0) / k
+                dp = n * (x * p1 - p0) / (x * x - 1)
+                dx = p1 / dp
+                x -= dx
+                if abs(dx) <= tiny:
+                    break
+            p0, p1 = Decimal(1), x
+            for k in range(2, n + 1):
+                p0, p1 = p1, ((2 * k - 1) * x * p1 - (k - 1) * p0) / k
+            dp = n * (x * p1 - p0) / (x * x - 1)
+            half.append((x, 2 / ((1 - x * x) * dp * dp)))
+        return tuple(half)
+
+
+def integrate(
+    expr: str,
+    var: str,
+    lower: Bound,
+    upper: Bound,
+    /,
+    *,
+    precision: Precision = None,
+    tol: Bound | None = None,
+    variables: Optional[Mapping[str, object]] = None,
+    max_iter: int = SOLVER_MAX_ITER,
+    timeout: float = SOLVER_TIMEOUT,
+) -> Integral:
+    """Integrate *expr* over [*lower*, *upper*] (finite bounds) to absolute error *tol*.
+
+    Each panel is integrated with a Gauss-Legendre rule whose order grows
+    with the precision, and again as two halves; the difference estimates
+    the panel's error.  The panel with the largest error is split until the
+    total is within *tol* (default: the working precision relative to the
+    integral of ``|expr|``).  Endpoints are never evaluated, so integrable
+    endpoint singularities such as ``1/sqrt(x)`` on [0, 1] work, slowly.
+
+    Raises
+    ------
+    CalcError
+        On a syntax error or an evaluation error at a sample point;
+        :class:`BudgetExceeded` when more than *max_iter* subdivisions
+        would be needed or *timeout* is exceeded.
+    """
+    prec = _precision(precision)
+    deadline = _Deadline("integrate", timeout)
+    rule = gauss_legendre(_rule_size(prec), prec + GUARD, deadline.check)
+    with localcontext() as ctx:
+        ctx.prec = prec + GUARD
+        f = _function(expr, var, variables, prec)
+        a, b = _bound(lower, prec, variables), _bound(upper, prec, variables)
+        target = _tolerance(tol, prec, variables) if tol is not None else None
+        eps = Decimal(10) ** -prec
+
+        def panel(lo: Decimal, hi: Decimal) -> Decimal:
+            mid, radius = (lo + hi) / 2, (hi - lo) / 2
+            total = Decimal(0)
+            for x, w in rule:
+                total += w * (f(mid - radius * x) + f(mid + radius * x))
+            return radius * total
+
+        def split(lo: Decimal, hi: Decimal, whole: Decimal) -> Tuple[Decimal, tuple, tuple]:
+            """Halve [lo, hi]; return the error estimate and both halves with their values."""
+            mid = (lo + hi) / 2
+            left, right = panel(lo, mid), panel(mid, hi)
+            return abs(left + right - whole), (lo, mid, left), (mid, hi, right)
+
+        if a == b:
+            return Integral(Decimal(0), Decimal(0), 0)
+        # Heap of (-error, sequence, halves); a panel's value is the sum of its halves.
+        error, left, right = split(a, b, panel(a, b))
+        sequence = itertools.count()  # tie-breaker: never compare the halves
+        heap = [(-error, next(sequence), left, right)]
+        value, total_error, scale = left[2] + right[2], error, abs(left[2]) + abs(right[2])
+        for _ in range(max_iter):
+            if total_error <= (target if target is not None else eps * scale):
+                break
+            deadline.check()
+            neg_error, _, left, right = heapq.heappop(heap)
+            total_error += neg_error
+            value -= left[2] + right[2]
+            scale -= abs(left[2]) + abs(right[2])
+            for lo, hi, whole in (left, right):
+                error, l2, r2 = split(lo, hi, whole)
+                heapq.heappush(heap, (-error, next(sequence), l2, r2))
+                total_error += error
+                value += l2[2] + r2[2]
+                scale += abs(l2[2]) + abs(r2[2])
+        else:
+            raise BudgetExceeded(
+                f"BudgetExceeded: integrate did not reach the tolerance in {max_iter} subdivisions "
+                f"(estimate {+value}, error ~{total_error:.3g})"
+            )
+        # Re-add the panels with more digits than the running sums had.
+        ctx.prec = prec + 2 * GUARD
+        value = sum((left[2] + right[2] for _, _, left, right in heap), Decimal(0))
+    with localcontext() as ctx:
+        ctx.prec = prec
+        return Integral(_quantize(+value), +abs(total_error), 2 * len(heap))
+
+
+# ---------------------------------------------------------------------------
+# Summation
+# ---------------------------------------------------------------------------
+
+def summation(
+    expr: str,
+    var: str,
+    start: Bound,
+    end: Bound,
+    /,
+    *,
+    step: Bound = 1,
+    precision: Precision = None,
+    variables: Optional[Mapping[str, object]] = None,
+    max_terms: int = SOLVER_MAX_TERMS,
+    timeout: float = SOLVER_TIMEOUT,
+) -> Series:
+    """Sum *expr* for *var* = *start*, *start* + *step*, ... up to *end* (inclusive).
+
+    The bounds and step must be integers.  Terms are evaluated and added
+    with extra digits growing with the number of terms, so that the
+    accumulated rounding errors stay below the rounded result's last digit.
+
+    Raises
+    ------
+    CalcError
+        On a syntax error, non-integer bounds, a zero step, or an
+        evaluation error at some term; :class:`BudgetExceeded` for more
+        than *max_terms* terms or when *timeout* is exceeded.
+    """
+    prec = _precision(precision)
+    deadline = _Deadline("sum", timeout)
+    with localcontext() as ctx:
+        ctx.prec = prec + GUARD
+        f = _function(expr, var, variables, prec)
+        first, last, delta = (_bound(v, prec, variables) for v in (start, end, step))
+        if any(v != v.to_integral_value() for v in (first, last, delta)):
+            raise CalcError("Summation bounds and step must be integers")
+        first, last, delta = int(first), int(last), int(delta)
+        if not delta:
+            raise CalcError("Summation step cannot be zero")
+        terms = max(0, (last - first) // delta + 1)
+        if terms > max_terms:
+            raise BudgetExceeded(f"BudgetExceeded: sum of {terms} terms exceeds the limit of {max_terms}")
+        # Each addition errs by at most half a unit in the last carried digit.
+        ctx.prec = prec + GUARD + len(str(terms))
+        total = Decimal(0)
+        for i, k in enumerate(range(first, last + (1 if delta > 0 else -1), delta)):
+            if not i & 255:
+                deadline.check()
+            total += f(Decimal(k))
+    with localcontext() as ctx:
+        ctx.prec = prec
+        return Series(_quantize(+total), terms)
+
+
+__all__ = ["GUARD", "Integral", "Root", "Series", "gauss_legendre", "integrate", "solve", "summation"]
@@ -0,0 +1,104 @@
+"""Per-request evaluation traces (opt-in, see :func:`calc_core.calculate_traced`).
+
+A :class:`Trace` collects, for one calculation:
+
+* wall time per stage (parse, compile, evaluate, quantize, total);
+* size and nesting depth of the tree as parsed and as optimized, and the
+  estimated work (:mod:`calc_core.cost`);
+* calls, inclusive and exclusive time per function (``sin``, ``sqrt``, ...),
+  by wrapping the compiled closures of :class:`~calc_core.nodes.Call` nodes;
+* series terms and argument halvings used by :mod:`calc_core.trig`.
+
+The active trace lives in a context variable, so code deep in the
+evaluation (the trig series) can report to it without new parameters; when
+no trace is active that costs one :meth:`ContextVar.get` per trig call.
+"""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter_ns
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+_ACTIVE: ContextVar[Optional["Trace"]] = ContextVar("calc_trace", default=None)
+
+
+def active() -> Optional["Trace"]:
+    """The trace of the calculation running in this context, if any."""
+    return _ACTIVE.get()
+
+
+def _ms(ns: int) -> float:
+    return round(ns / 1e6, 6)
+
+
+class Trace:
+    """Where the time of one traced calculation went."""
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, int] = {}  # ns
+        self.info: Dict[str, Any] = {}
+        # name -> [calls, inclusive ns, exclusive ns]
+        self.functions: Dict[str, List[int]] = {}
+        # calls, series terms, longest series, argument halvings
+        self.series = [0, 0, 0, 0]
+        self._nested = 0  # ns spent in traced calls below the current one
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0) + perf_counter_ns() - start
+
+    @contextmanager
+    def activate(self) -> Iterator["Trace"]:
+        """Make this the trace that :func:`active` returns, within the block."""
+        token = _ACTIVE.set(self)
+        try:
+            yield self
+        finally:
+            _ACTIVE.reset(token)
+
+    def wrap_call(self, name: str, fn: Callable) -> Callable:
+        """Time every call of the compiled function-call closure *fn*."""
+        stats = self.functions.setdefault(name, [0, 0, 0])
+
+        def traced(env):
+            outer, self._nested = self._nested, 0
+            start = perf_counter_ns()
+            try:
+                return fn(env)
+            finally:
+                elapsed = perf_counter_ns() - start
+                stats[0] += 1
+                stats[1] += elapsed
+                stats[2] += elapsed - self._nested
+                self._nested = outer + elapsed
+
+        return traced
+
+    def record_series(self, terms: int, halvings: int) -> None:
+        """One trig series evaluation with *terms* coefficients (see trig._sin_cos_reduced)."""
+        series = self.series
+        series[0] += 1
+        series[1] += terms
+        series[2] = max(series[2], terms)
+        series[3] += halvings
+
+    def as_dict(self) -> Dict[str, Any]:
+        """JSON-ready summary; times in milliseconds."""
+        calls, terms, longest, halvings = self.series
+        return {
+            **self.info,
+            "stages_ms": {name: _ms(ns) for name, ns in self.stages.items()},
+            "functions": {
+                name: {"calls": n, "total_ms": _ms(total), "self_ms": _ms(own)}
+                for name, (n, total, own) in sorted(self.functions.items())
+            },
+            "trig_series": {"calls": calls, "terms": terms, "max_terms": longest, "halvings": halvings},
+        }
+
+
+__all__ = ["Trace", "active"]
@@ -2,17 +2,17 @@
 from __future__ import annotations
 
 import math
-from decimal import Decimal, getcontext
-from typing import Callable, Dict
+from decimal import Decimal
+from typing import Callable, Dict, Mapping, Sequence
 
 from lark import Transformer, v_args
 
+from . import constants, fixedpoint, trig
 from .errors import CalcError
+from .lists import REDUCTIONS, Vector, apply, make_vector, power, reduce
 
-# Global precision already set in __init__.py via getcontext()
-CTX = getcontext()
-
-# 40 significant digits constants
+# 40 significant digits constants (the values at the default precision; the
+# evaluators use `constants.constant()` to get them at the active precision)
 CONSTANTS: Dict[str, Decimal] = {
     "pi": Decimal("3.141592653589793238462643383279502884197"),
     "e": Decimal("2.718281828459045235360287471352662497757"),
@@ -29,40 +29,33 @@ def _raise_domain(name: str) -> None:  # noqa: D401
     raise CalcError(f"DomainError: {name}")
 
 
-# ---------- high-precision trig via Taylor (sufficient for 34-digit) ----------
-
-_TWO_PI = CONSTANTS["pi"] * 2
+def _to_decimal(v: object) -> Decimal:
+    return v if isinstance(v, Decimal) else Decimal(str(v))
 
 
-def _taylor_sin(x: Decimal) -> Decimal:
-    x %= _TWO_PI
-    term = total = x
-    k = 1
-    while True:
-        k += 2
-        term *= -x * x / (k * (k - 1))
-        if abs(term) < Decimal('1e-50'):
-            return total
-        total += term
+def _coerce_variables(variables: Mapping[str, str | int | float | Decimal | Sequence] | None) -> dict[str, Decimal | Vector]:
+    """Convert caller-supplied variable values to Decimal via ``str()``.
 
+    Lists and tuples of numbers become :class:`~calc_core.lists.Vector` values.
+    """
+    result: dict[str, Decimal | Vector] = {}
+    if variables:
+        for k, v in variables.items():
+            try:
+                if isinstance(v, (list, tuple)):
+                    result[k] = Vector(map(_to_decimal, v))
+                else:
+                    result[k] = _to_decimal(v)
+            except Exception as exc:
+                raise CalcError(f"Invalid variable value for '{k}': {v}") from exc
+    return result
 
-def _taylor_cos(x: Decimal) -> Decimal:
-    x %= _TWO_PI
-    term = total = Decimal(1)
-    k = 0
-    while True:
-        k += 2
-        term *= -x * x / (k * (k - 1))
-        if abs(term) < Decimal('1e-50'):
-            return total
-        total += term
 
+# ---------- high-precision trig (see trig.py for the algorithm) ----------
 
-def _taylor_tan(x: Decimal) -> Decimal:
-    c = _taylor_cos(x)
-    if abs(c) < Decimal('1e-32'):
-        _raise_domain("tan")
-    return _taylor_sin(x) / c
+_taylor_sin = trig.sin
+_taylor_cos = trig.cos
+_taylor_tan = trig.tan
 
 
 # ---------- unary function map ----------
@@ -74,8 +67,8 @@ _FUNCS: Dict[str, Callable[[Decimal], Decimal]] = {
     "asin": lambda x: _ftod(math.asin(float(x))) if -1 <= x <= 1 else _raise_domain("asin"),
     "acos": lambda x: _ftod(math.acos(float(x))) if -1 <= x <= 1 else _raise_domain("acos"),
     "atan": lambda x: _ftod(math.atan(float(x))),
-    "sqrt": lambda x: x.sqrt() if x >= 0 else _raise_domain("sqrt"),
-    "exp": lambda x: x.exp(),
+    "sqrt": lambda x: fixedpoint.sqrt(x) if x >= 0 else _raise_domain("sqrt"),
+    "exp": fixedpoint.exp,
     "abs": lambda x: x.copy_abs(),
 }
 
@@ -85,12 +78,12 @@ _FUNCS: Dict[str, Callable[[Decimal], Decimal]] = {
 def _log(x: Decimal, base: Decimal | None = None) -> Decimal:
     if x <= 0:
         _raise_domain("log")
-    ln_x = CTX.ln(x)
+    ln_x = constants.ln(x)
     if base is None:
         return ln_x
     if base <= 0 or base == 1:
         _raise_domain("log")
-    return ln_x / CTX.ln(base)
+    return ln_x / constants.ln(base)
 
 
 # ---------- Lark transformer ----------
@@ -99,13 +92,7 @@ def _log(x: Decimal, base: Decimal | None = None) -> Decimal:
 class EvalTransformer(Transformer):
     def __init__(self, variables: dict[str, str | int | float | Decimal] | None = None):
         super().__init__()
-        self._vars: dict[str, Decimal] = {}
-        if variables:
-            for k, v in variables.items():
-                try:
-                    self._vars[k] = v if isinstance(v, Decimal) else Decimal(str(v))
-                except Exception as exc:
-                    raise CalcError(f"Invalid variable value for '{k}': {v}") from exc
+        self._vars: dict[str, Decimal] = _coerce_variables(variables)
     # terminals
     number = lambda self, token: Decimal(token)
 
@@ -116,7 +103,7 @@ class EvalTransformer(Transformer):
             return token
         text = str(token)
         if text in CONSTANTS:
-            return CONSTANTS[text]
+            return constants.constant(text)
         if text in self._vars:
             return self._vars[text]
         raise CalcError(f"Unknown identifier '{text}'")
@@ -124,6 +111,9 @@ class EvalTransformer(Transformer):
     def arg_list(self, *items):
         return list(items)
 
+    def vector(self, items):
+        return make_vector(items if isinstance(items, list) else [items])
+
     # binary ops
     add = lambda self, a, b: a + b
     sub = lambda self, a, b: a - b
@@ -136,7 +126,7 @@ class EvalTransformer(Transformer):
 
     def pow(self, a, b):
         try:
-            return a ** b
+            return power(a, b)
         except (OverflowError, ValueError):
             raise CalcError("Power overflow")
 
@@ -176,11 +166,13 @@ class EvalTransformer(Transformer):
             args.extend(n if isinstance(n, list) else [n])
 
         if name == "log":
-            if len(args) == 1:
-                return _log(args[0])
-            if len(args) == 2:
-                return _log(args[0], args[1])
+            if len(args) in (1, 2):
+                return apply(_log, *args)
             raise CalcError("log() takes 1 or 2 arguments")
+        if name in REDUCTIONS:
+            if not args:
+                raise CalcError(f"{name}() takes at least 1 argument")
+            return reduce(name, args)
 
         if len(args) != 1:
             raise CalcError(f"{name}() takes exactly 1 argument")
@@ -188,11 +180,11 @@ class EvalTransformer(Transformer):
         func = _FUNCS.get(name)
         if not func:
             raise CalcError(f"Unknown function '{name}'")
-        return func(args[0])
+        return apply(func, args[0])
 
 
 
     # catch stray constants not handled by grammar
     def __default_token__(self, token):
         t = str(token)
-        return CONSTANTS[t] if t in CONSTANTS else token
+        return constants.constant(t) if t in CONSTANTS else token
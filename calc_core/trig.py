@@ -0,0 +1,208 @@
+"""High-precision sine/cosine/tangent for Decimal arguments.
+
+Algorithm (all work happens at the caller's precision plus guard digits):
+
+1. Octant reduction: ``x = k*(pi/2) + r`` with ``|r| <= pi/4``, using pi
+   computed to as many digits as the magnitude of *x* requires, so large
+   arguments keep full accuracy.
+2. Series evaluation by Horner's rule over precomputed tables of inverse
+   factorials (one table per working precision and argument magnitude, no
+   divisions in the hot loop).  The number of terms follows from the active
+   context precision.
+3. At higher precisions, argument halving: ``a = r / 2**h`` and only
+   ``v = 1 - cos(a)`` is summed; ``h`` doublings of
+   ``1 - cos(2a) = 2v(2 - v)`` recover ``v = 1 - cos(r)``, then
+   ``cos r = 1 - v`` and ``|sin r| = sqrt(v(2 - v))`` (the square root by
+   :func:`calc_core.fixedpoint.sqrt`).  Whether to halve, and how often, is
+   chosen per precision by an operation-count estimate.
+"""
+from __future__ import annotations
+
+import math
+from decimal import Decimal, getcontext, localcontext
+from functools import lru_cache
+from typing import Tuple
+
+from . import fixedpoint
+from .constants import _pi_digits
+from .cost import check_trig_argument
+from .errors import CalcError
+from .trace import active as _active_trace
+
+_GUARD = 10  # extra digits carried through reduction, series and doubling
+
+@lru_cache(maxsize=64)
+def _half_pi(digits: int) -> Decimal:
+    with localcontext() as ctx:
+        ctx.prec = digits
+        return _pi_digits(digits) / 2
+
+
+# ---------- series tables ----------
+
+_QUARTER_PI = math.pi / 4
+_LN10 = math.log(10)
+# Rough cost of one Decimal square root in multiplications; used only to
+# decide whether argument halving pays off at a given precision.
+_SQRT_COST = 15
+
+
+def _terms(log10_x: float, first_power: int, wp: int) -> int:
+    """Number of series terms ``x**(first_power+2k)/(first_power+2k)!`` needed.
+
+    Counts terms until the next one falls below ``10**-wp`` relative to the
+    leading term, for ``|x| <= 10**log10_x``.
+    """
+    n = 1
+    lead = first_power * log10_x - math.lgamma(first_power + 1) / _LN10
+    while True:
+        p = first_power + 2 * n
+        if p * log10_x - math.lgamma(p + 1) / _LN10 - lead < -(wp + 1):
+            return n
+        n += 1
+
+
+def _inverse_factorials(wp: int, count: int) -> Tuple[Decimal, ...]:
+    """``(-1)**k / k!`` for ``k = 0 .. count-1`` at precision *wp*."""
+    out = []
+    with localcontext() as ctx:
+        ctx.prec = wp
+        fact = Decimal(1)
+        for k in range(count):
+            if k:
+                fact *= k
+            out.append((1 if k % 4 < 2 else -1) / fact)
+    return tuple(out)
+
+
+@lru_cache(maxsize=256)
+def _plan(wp: int, log2_r: int) -> Tuple[int, Tuple[Decimal, ...], Tuple[Decimal, ...]]:
+    """Evaluation plan for ``|r| <= 2**log2_r`` at working precision *wp*.
+
+    Returns ``(halvings, sin_coeffs, cos_coeffs)``.  With ``halvings == 0``
+    sin and cos are summed directly (coefficients ``(-1)**k/(2k+1)!`` and
+    ``(-1)**k/(2k)!``); otherwise only the ``1 - cos`` series is used on the
+    halved argument and ``sin_coeffs`` is empty.
+    """
+    log10_r = log2_r * math.log10(2)
+    direct = _terms(log10_r, 1, wp)
+    best_h, best_cost = 0, 2 * direct
+    for h in range(1, int(math.sqrt(wp)) + 2):
+        cost = 2 * _terms(log10_r - h * math.log10(2), 2, wp) + 3 * h + _SQRT_COST
+        if cost < best_cost:
+            best_h, best_cost = h, cost
+    if best_h == 0:
+        n = max(direct, _terms(log10_r, 0, wp)) + 1
+        table = _inverse_factorials(wp, 2 * n + 2)
+        return 0, table[1::2], table[0::2]
+    n = _terms(log10_r - best_h * math.log10(2), 2, wp) + 1
+    table = _inverse_factorials(wp, 2 * n + 3)
+    # 1 - cos(a) = a2/2! - a2**2/4! + ... ; drop the constant term, flip signs.
+    return best_h, (), tuple(-c for c in table[2::2])
+
+
+@lru_cache(maxsize=128)
+def _inv_pow2(h: int) -> Decimal:
+    """Exact ``2**-h`` as a Decimal (``5**h * 10**-h``)."""
+    return Decimal(5 ** h).scaleb(-h)
+
+
+def _horner(coeffs: Tuple[Decimal, ...], x2: Decimal) -> Decimal:
+    v = coeffs[-1]
+    for c in coeffs[-2::-1]:
+        v = v * x2 + c
+    return v
+
+
+# ---------- core ----------
+
+def _reduce(x: Decimal, wp: int) -> Tuple[int, Decimal]:
+    """Return ``(quadrant, r)`` with ``x = quadrant*(pi/2) + r (mod 2pi)``, ``|r| <= pi/4``."""
+    if x.adjusted() < 0 and abs(x) <= Decimal("0.785"):
+        return 0, x
+    # Enough digits that r keeps wp significant digits even when x is large
+    # or very close to a multiple of pi/2.
+    digits = 2 * wp + max(0, x.adjusted())
+    with localcontext() as ctx:
+        ctx.prec = digits
+        half_pi = _half_pi(digits)
+        k = (x / half_pi).to_integral_value()
+        r = x - k * half_pi
+    return int(k) % 4, r
+
+
+def _sin_cos_reduced(r: Decimal, wp: int, need_sin: bool, need_cos: bool) -> Tuple[Decimal | None, Decimal | None]:
+    """sin and cos of ``|r| <= pi/4`` at the current (working) precision."""
+    if not r:
+        return Decimal(0), Decimal(1)
+    # Bucket |r| by its binary magnitude so tiny arguments use short plans.
+    log2_r = min(0, math.frexp(float(r))[1])
+    halvings, sin_coeffs, cos_coeffs = _plan(wp, log2_r)
+    trace = _active_trace()
+    if trace is not None:
+        terms = len(cos_coeffs) if halvings else len(sin_coeffs) * need_sin + len(cos_coeffs) * need_cos
+        trace.record_series(terms, halvings)
+    if not halvings:
+        r2 = r * r
+        s = r * _horner(sin_coeffs, r2) if need_sin else None
+        c = _horner(cos_coeffs, r2) if need_cos else None
+        return s, c
+    a = r * _inv_pow2(halvings)
+    a2 = a * a
+    v = _horner(cos_coeffs, a2) * a2  # 1 - cos(a)
+    for _ in range(halvings):
+        v = 2 * v * (2 - v)  # 1 - cos(2a) = 2 sin(a)**2
+    c = 1 - v if need_cos else None
+    s = None
+    if need_sin:
+        s = fixedpoint.sqrt(v * (2 - v))
+        if r < 0:
+            s = -s
+    return s, c
+
+
+def _sin_cos(x: Decimal, want_sin: bool = True, want_cos: bool = True) -> Tuple[Decimal | None, Decimal | None]:
+    """Return ``(sin x, cos x)`` rounded to the current context precision.
+
+    Either component can be skipped (returned as None) to save a square root.
+    """
+    if not x.is_finite():
+        raise CalcError("DomainError: trig argument must be finite")
+    if x.adjusted() > 0:
+        check_trig_argument(x)
+    wp = getcontext().prec + _GUARD
+    quadrant, r = _reduce(x, wp)
+    # In odd quadrants sin and cos of x swap roles.
+    need_sin_r, need_cos_r = (want_sin, want_cos) if quadrant % 2 == 0 else (want_cos, want_sin)
+    with localcontext() as ctx:
+        ctx.prec = wp
+        sin_r, cos_r = _sin_cos_reduced(r, wp, need_sin_r, need_cos_r)
+    if quadrant == 0:
+        s, c = sin_r, cos_r
+    elif quadrant == 1:
+        s, c = cos_r, (None if sin_r is None else -sin_r)
+    elif quadrant == 2:
+        s, c = (None if sin_r is None else -sin_r), (None if cos_r is None else -cos_r)
+    else:
+        s, c = (None if cos_r is None else -cos_r), sin_r
+    return (None if s is None else +s), (None if c is None else +c)
+
+
+def sin(x: Decimal) -> Decimal:
+    return _sin_cos(x, want_cos=False)[0]
+
+
+def cos(x: Decimal) -> Decimal:
+    return _sin_cos(x, want_sin=False)[1]
+
+
+def tan(x: Decimal) -> Decimal:
+    s, c = _sin_cos(x)
+    # Pole threshold follows the precision: 1e-32 at the default 34 digits
+    # and below (a few digits must not turn ordinary arguments into poles).
+    if abs(c) < Decimal(10) ** -(max(getcontext().prec, 34) - 2):
+        raise CalcError("DomainError: tan")
+    return s / c
+
+
+__all__ = ["cos", "sin", "tan"]
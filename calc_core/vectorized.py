@@ -0,0 +1,348 @@
+"""Float64 evaluation tier: lowers the AST to vectorized NumPy operations.
+
+Opt-in via ``precision="float64"``.  Whole columns of variables are
+evaluated at once; errors are tracked per element with the same rules as
+the Decimal evaluator (first error in evaluation order wins) instead of
+raising, so one bad row never poisons the rest.
+
+NumPy is an optional dependency (``pip install calculator-mcp[fast]``).
+"""
+from __future__ import annotations
+
+from typing import Callable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None  # type: ignore[assignment]
+
+from .compiler import CompiledExpression
+from .errors import CalcError
+from .lists import REDUCTIONS
+from .nodes import BinOp, Call, Name, Neg, Node, Num, Pos, Vec
+from .transformer import CONSTANTS
+
+FLOAT64 = "float64"
+
+# |cos(x)| below this is treated as a pole of tan(); float64 cannot resolve
+# pi/2 more finely than ~6e-17.
+_TAN_POLE = 1e-15
+_NO_LISTS = "Lists are not supported with precision 'float64'"
+
+
+class Float64Result(NamedTuple):
+    """Vectorized evaluation output.
+
+    ``errors`` holds one code per element: 0 means success, any other value
+    indexes ``messages``.
+    """
+
+    values: "np.ndarray"
+    errors: "np.ndarray"
+    messages: Tuple[str, ...]
+
+    def error_at(self, i: int) -> Optional[str]:
+        code = int(self.errors[i])
+        return self.messages[code] if code else None
+
+    def to_list(self) -> List[float | CalcError]:
+        """Per-element floats, with failed elements replaced by :class:`CalcError`."""
+        values = self.values.tolist()
+        if not self.errors.any():
+            return values
+        return [
+            CalcError(self.messages[code]) if code else value
+            for value, code in zip(values, self.errors.tolist())
+        ]
+
+
+# Each lowered node returns (values, errors); errors is None when no element failed.
+_Vec = Tuple["np.ndarray", Optional["np.ndarray"]]
+_Lowered = Callable[[Mapping[str, _Vec], int], _Vec]
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise CalcError("precision='float64' requires numpy (pip install numpy)")
+
+
+def _merge(first: Optional["np.ndarray"], second: Optional["np.ndarray"]) -> Optional["np.ndarray"]:
+    """Combine error arrays, keeping the earliest error per element."""
+    if first is None:
+        return second
+    if second is None:
+        return first
+    return np.where(first != 0, first, second)
+
+
+def _flag(err: Optional["np.ndarray"], mask, code: int, n: int) -> Optional["np.ndarray"]:
+    """Set *code* where *mask* holds and no earlier error was recorded."""
+    mask = np.broadcast_to(mask, (n,))
+    if not mask.any():
+        return err
+    if err is None:
+        return np.where(mask, code, 0).astype(np.int16)
+    return np.where((err == 0) & mask, code, err).astype(np.int16)
+
+
+class _Lowering:
+    """Translate one AST into a closure over NumPy arrays."""
+
+    def __init__(self) -> None:
+        self.messages: List[str] = [""]
+
+    def code(self, message: str) -> int:
+        try:
+            return self.messages.index(message)
+        except ValueError:
+            self.messages.append(message)
+            return len(self.messages) - 1
+
+    def lower(self, node: Node) -> _Lowered:
+        if isinstance(node, Num):
+            value = np.float64(node.value)
+            return lambda cols, n: (value, None)
+        if isinstance(node, Name):
+            return self._name(node.id)
+        if isinstance(node, Neg):
+            operand = self.lower(node.operand)
+
+            def neg(cols, n):
+                v, err = operand(cols, n)
+                return -v, err
+            return neg
+        if isinstance(node, Pos):
+            # Rounding to float64 already happened; unary plus is the identity.
+            return self.lower(node.operand)
+        if isinstance(node, BinOp):
+            return self._binop(node)
+        if isinstance(node, Call):
+            return self._call(node)
+        if isinstance(node, Vec):
+            raise CalcError(_NO_LISTS)
+        raise TypeError(f"Unsupported node {node!r}")
+
+    def _name(self, name: str) -> _Lowered:
+        if name in CONSTANTS:
+            value = np.float64(CONSTANTS[name])
+            return lambda cols, n: (value, None)
+        missing = self.code(f"Unknown identifier '{name}'")
+
+        def lookup(cols, n):
+            try:
+                return cols[name]
+            except KeyError:
+                return np.float64("nan"), np.full(n, missing, dtype=np.int16)
+        return lookup
+
+    def _binop(self, node: BinOp) -> _Lowered:
+        left = self.lower(node.left)
+        right = self.lower(node.right)
+        op = node.op
+        if op in "+-*":
+            ufunc = {"+": np.add, "-": np.subtract, "*": np.multiply}[op]
+
+            def arith(cols, n):
+                a, ea = left(cols, n)
+                b, eb = right(cols, n)
+                return ufunc(a, b), _merge(ea, eb)
+            return arith
+        if op == "/":
+            zero = self.code("Division by zero")
+
+            def div(cols, n):
+                a, ea = left(cols, n)
+                b, eb = right(cols, n)
+                return np.divide(a, b), _flag(_merge(ea, eb), b == 0, zero, n)
+            return div
+        if op == "^":
+            indeterminate = self.code("Indeterminate: 0^0")
+            domain = self.code("DomainError: pow")
+
+            def pow_(cols, n):
+                a, ea = left(cols, n)
+                b, eb = right(cols, n)
+                err = _merge(ea, eb)
+                err = _flag(err, (a == 0) & (b == 0), indeterminate, n)
+                err = _flag(err, (a < 0) & (np.floor(b) != b), domain, n)
+                return np.power(a, b), err
+            return pow_
+        raise CalcError(f"Unknown operator '{op}'")
+
+    def _unary(self, arg: _Lowered, fn, invalid=None, name: str = "") -> _Lowered:
+        code = self.code(f"DomainError: {name}") if invalid is not None else 0
+
+        def call(cols, n):
+            x, err = arg(cols, n)
+            if invalid is not None:
+                err = _flag(err, invalid(x), code, n)
+            return fn(x), err
+        return call
+
+    def _call(self, node: Call) -> _Lowered:
+        name = node.name
+        if name in REDUCTIONS:
+            raise CalcError(_NO_LISTS)
+        args = [self.lower(a) for a in node.args]
+
+        if name == "log":
+            if len(args) == 1:
+                return self._unary(args[0], np.log, lambda x: x <= 0, "log")
+            if len(args) == 2:
+                x_arg, base_arg = args
+                code = self.code("DomainError: log")
+
+                def log(cols, n):
+                    x, ex = x_arg(cols, n)
+                    b, eb = base_arg(cols, n)
+                    err = _merge(ex, eb)
+                    err = _flag(err, (x <= 0) | (b <= 0) | (b == 1), code, n)
+                    return np.log(x) / np.log(b), err
+                return log
+            message = "log() takes 1 or 2 arguments"
+        elif len(args) != 1:
+            message = f"{name}() takes exactly 1 argument"
+        elif name == "tan":
+            return self._unary(args[0], np.tan, lambda x: np.abs(np.cos(x)) < _TAN_POLE, "tan")
+        elif name in _UNARY:
+            fn, invalid = _UNARY[name]
+            return self._unary(args[0], fn, invalid, name)
+        else:
+            message = f"Unknown function '{name}'"
+
+        code = self.code(message)
+
+        def invalid_call(cols, n):
+            err = None
+            for a in args:
+                err = _merge(err, a(cols, n)[1])
+            return np.float64("nan"), _flag(err, True, code, n)
+        return invalid_call
+
+
+if np is not None:
+    _UNARY = {
+        "sin": (np.sin, None),
+        "cos": (np.cos, None),
+        "asin": (np.arcsin, lambda x: (x < -1) | (x > 1)),
+        "acos": (np.arccos, lambda x: (x < -1) | (x > 1)),
+        "atan": (np.arctan, None),
+        "sqrt": (np.sqrt, lambda x: x < 0),
+        "exp": (np.exp, None),
+        "abs": (np.abs, None),
+    }
+
+
+class _Float64Program:
+    """Lowered form of one expression, cached on its :class:`CompiledExpression`."""
+
+    __slots__ = ("fn", "messages", "overflow")
+
+    def __init__(self, tree: Node) -> None:
+        lowering = _Lowering()
+        self.fn = lowering.lower(tree)
+        self.overflow = lowering.code("Overflow")
+        self.messages = tuple(lowering.messages)
+
+
+def _program(compiled: CompiledExpression) -> _Float64Program:
+    program = compiled.float64
+    if program is None:
+        program = compiled.float64 = _Float64Program(compiled.tree)
+    return program
+
+
+# Placeholder for a variable absent from some rows (see `columns_from_rows`).
+MISSING = object()
+
+
+def columns_from_rows(rows: Sequence[Mapping[str, object]]) -> dict[str, list]:
+    """Transpose row mappings into columns, filling absent keys with :data:`MISSING`."""
+    names: dict[str, None] = {}
+    for row in rows:
+        names.update(dict.fromkeys(row))
+    return {name: [row.get(name, MISSING) for row in rows] for name in names}
+
+
+def _column(values: Sequence[object] | "np.ndarray", n: int):
+    """Convert one variable column to float64.
+
+    Returns ``(array, bad, missing)`` where the masks are None when no
+    element is unparsable / :data:`MISSING`.
+    """
+    try:
+        return np.broadcast_to(np.asarray(values, dtype=np.float64), (n,)), None, None
+    except (TypeError, ValueError):
+        pass
+    arr = np.full(n, np.nan)
+    bad = np.zeros(n, dtype=bool)
+    missing = np.zeros(n, dtype=bool)
+    for i, v in enumerate(values):
+        if v is MISSING:
+            missing[i] = True
+            continue
+        try:
+            arr[i] = float(str(v))
+        except ValueError:
+            bad[i] = True
+    return arr, (bad if bad.any() else None), (missing if missing.any() else None)
+
+
+def evaluate_float64(
+    compiled: CompiledExpression,
+    columns: Mapping[str, Sequence[object]] | None = None,
+    size: int | None = None,
+) -> Float64Result:
+    """Evaluate *compiled* over variable *columns* in float64.
+
+    Parameters
+    ----------
+    compiled : CompiledExpression
+        Expression from :func:`calc_core.compile_expression`.
+    columns : dict[str, array-like], optional
+        Variable name -> values; every column must have *size* elements.
+    size : int, optional
+        Number of elements; inferred from the columns when omitted
+        (1 for expressions without variables).
+
+    Raises
+    ------
+    CalcError
+        If numpy is unavailable or the columns differ in length.
+    """
+    _require_numpy()
+    program = _program(compiled)
+    messages = list(program.messages)
+    columns = columns or {}
+    lengths = {len(col) for col in columns.values()}
+    if size is not None:
+        lengths.add(size)
+    if len(lengths) > 1:
+        raise CalcError("All variable columns must have the same length")
+    n = lengths.pop() if lengths else 1
+
+    cols = {}
+    var_err = None
+    for name, values in columns.items():
+        arr, bad, missing = _column(values, n)
+        missing_err = None
+        if missing is not None and name in compiled.names:
+            missing_err = _flag(None, missing, messages.index(f"Unknown identifier '{name}'"), n)
+        cols[name] = (arr, missing_err)
+        if bad is not None:
+            # Like the Decimal path, any unparsable value fails its row.
+            messages.append(f"Invalid variable value for '{name}'")
+            var_err = _flag(var_err, bad, len(messages) - 1, n)
+
+    with np.errstate(all="ignore"):
+        values, err = program.fn(cols, n)
+        values = np.broadcast_to(np.asarray(values, dtype=np.float64), (n,)).copy()
+        err = _merge(var_err, err)
+        err = _flag(err, ~np.isfinite(values), program.overflow, n)
+    if err is None:
+        err = np.zeros(n, dtype=np.int16)
+    values[err != 0] = np.nan
+    return Float64Result(values, err, tuple(messages))
+
+
+__all__ = ["FLOAT64", "MISSING", "Float64Result", "columns_from_rows", "evaluate_float64"]
@@ -0,0 +1,324 @@
+"""Command-line calculator: one expression, or millions from a file.
+
+Single expression::
+
+    calc "3*(4+5)-sqrt(16)"
+
+Bulk evaluation (``--input``), results written in input order::
+
+    calc --input exprs.txt --output results.txt          # one expression per line
+    calc --input rows.csv --expr "m*g*h" -o out.csv      # variable columns
+    calc --input reqs.ndjson -o out.ndjson               # {"expr": ..., "variables": {...}}
+
+Formats follow the file extension (``.csv``; ``.ndjson`` / ``.jsonl``;
+anything else is one expression per line) or ``--format``:
+
+* ``lines``  -- each line is an expression; the output line is the result,
+  or ``error: <message>``.  Blank lines stay blank.
+* ``csv``    -- the first row names the columns.  Every column is a
+  variable of ``--expr``, or, without ``--expr``, an ``expr`` column holds
+  each row's expression.  The output has ``result,error`` columns.
+  Quoted fields must not contain newlines.
+* ``ndjson`` -- each line is an object ``{"expr", "variables",
+  "precision"}`` (``variables`` and ``precision`` optional), or, with
+  ``--expr``, a mapping of variables.  Each output line is
+  ``{"result": ...}`` or ``{"error": ...}``.
+
+The input is memory-mapped and cut into chunks of about ``--chunk-bytes``
+at line boundaries.  Chunks are evaluated by a pool of ``--workers``
+processes, each of which maps the file itself, so only offsets cross the
+process boundary.  With ``--expr`` every chunk is one
+:func:`calc_core.calculate_many` call: the expression is parsed once per
+chunk (and ``--precision float64`` evaluates it vectorized).  A bounded
+window of chunks is in flight and results are written in input order.
+Throughput statistics go to stderr (``--quiet`` to omit them).
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import mmap
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from calc_core import FLOAT64, CalcError, calculate, calculate_many
+
+FORMATS = ("lines", "csv", "ndjson")
+# Chunks submitted ahead of the one being written, per worker.
+_WINDOW_PER_WORKER = 2
+
+
+class Job(NamedTuple):
+    """What a worker needs to evaluate one chunk (picklable, no input data)."""
+
+    path: str
+    start: int
+    end: int
+    fmt: str
+    expr: Optional[str]
+    columns: Tuple[str, ...]  # CSV header
+    precision: Any
+
+
+class ChunkResult(NamedTuple):
+    output: bytes
+    rows: int
+    errors: int
+
+
+# ---------------------------------------------------------------------------
+# Per-chunk evaluation (runs in the workers)
+# ---------------------------------------------------------------------------
+
+def _outcome(expr: str, variables: Dict[str, Any], precision: Any) -> Any:
+    """Result of one row, or the CalcError it raised."""
+    try:
+        return calculate(expr, precision=precision, **variables)
+    except CalcError as exc:
+        return exc
+
+
+def _text(outcome: Any) -> Tuple[Optional[str], Optional[str]]:
+    if isinstance(outcome, Exception):
+        return None, str(outcome)
+    return str(outcome), None
+
+
+def _evaluate_lines(lines: List[str], job: Job) -> Tuple[List[str], int, int]:
+    out, errors = [], 0
+    for line in lines:
+        expr = line.strip()
+        if not expr:
+            out.append("")
+            continue
+        result, error = _text(_outcome(expr, {}, job.precision))
+        if error is not None:
+            errors += 1
+            out.append(f"error: {error}")
+        else:
+            out.append(result)
+    return out, len(out) - out.count(""), errors
+
+
+def _evaluate_rows(expr: Optional[str], rows: List[Any], job: Job) -> List[Any]:
+    """Outcomes of *rows* (variable mappings, or exceptions for unreadable rows)."""
+    if expr is not None:
+        valid = [r for r in rows if not isinstance(r, Exception)]
+        try:
+            outcomes = iter(calculate_many(expr, valid, precision=job.precision))
+        except CalcError as exc:  # syntax error: every row fails alike
+            return [r if isinstance(r, Exception) else exc for r in rows]
+        return [r if isinstance(r, Exception) else next(outcomes) for r in rows]
+    outcomes = []
+    for row in rows:
+        if isinstance(row, Exception):
+            outcomes.append(row)
+        else:
+            row_expr, variables, precision = row
+            outcomes.append(_outcome(row_expr, variables, precision))
+    return outcomes
+
+
+def _parse_csv(lines: List[str], job: Job) -> List[Any]:
+    rows: List[Any] = []
+    for fields in csv.reader(lines):
+        if len(fields) != len(job.columns):
+            rows.append(ValueError(f"Invalid row: expected {len(job.columns)} fields, got {len(fields)}"))
+            continue
+        values = dict(zip(job.columns, fields))
+        if job.expr is None:
+            rows.append((values.pop("expr"), values, job.precision))
+        else:
+            rows.append(values)
+    return rows
+
+
+def _parse_ndjson(lines: List[str], job: Job) -> List[Any]:
+    rows: List[Any] = []
+    for line in lines:
+        try:
+            obj = json.loads(line)
+            if not isinstance(obj, dict):
+                raise ValueError("expected a JSON object")
+            if job.expr is not None:
+                rows.append(obj)
+            else:
+                rows.append((obj["expr"], obj.get("variables") or {}, obj.get("precision", job.precision)))
+        except (ValueError, KeyError) as exc:
+            rows.append(ValueError(f"Invalid row: {exc}"))
+    return rows
+
+
+def evaluate_chunk(job: Job) -> ChunkResult:
+    """Evaluate the rows in bytes ``[start, end)`` of the input and encode their output."""
+    with open(job.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        text = mm[job.start:job.end].decode("utf-8")
+    # Not splitlines(): it also splits at \x1c, \u2028 ..., which would shift rows.
+    lines = [line.rstrip("\r") for line in text.split("\n")]
+    if lines[-1] == "":
+        lines.pop()
+    if job.fmt == "lines":
+        out, rows, errors = _evaluate_lines(lines, job)
+        return ChunkResult(("\n".join(out) + "\n").encode() if out else b"", rows, errors)
+
+    lines = [line for line in lines if line.strip()]
+    parsed = _parse_csv(lines, job) if job.fmt == "csv" else _parse_ndjson(lines, job)
+    outcomes = _evaluate_rows(job.expr, parsed, job)
+    errors = sum(isinstance(o, Exception) for o in outcomes)
+    buffer = io.StringIO()
+    if job.fmt == "csv":
+        writer = csv.writer(buffer, lineterminator="\n")
+        for outcome in outcomes:
+            writer.writerow(["" if v is None else v for v in _text(outcome)])
+    else:
+        for outcome in outcomes:
+            result, error = _text(outcome)
+            buffer.write(json.dumps({"error": error} if error is not None else {"result": result}) + "\n")
+    return ChunkResult(buffer.getvalue().encode(), len(outcomes), errors)
+
+
+# ---------------------------------------------------------------------------
+# Splitting and ordered writing (main process)
+# ---------------------------------------------------------------------------
+
+def split_chunks(mm: mmap.mmap, start: int, chunk_bytes: int) -> List[Tuple[int, int]]:
+    """Byte ranges of about *chunk_bytes* from *start*, each ending after a newline (or at EOF)."""
+    ranges = []
+    size = len(mm)
+    while start < size:
+        cut = mm.find(b"\n", min(start + chunk_bytes, size) - 1)
+        end = size if cut < 0 else cut + 1
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def _detect_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in (".ndjson", ".jsonl"):
+        return "ndjson"
+    return "lines"
+
+
+class Stats(NamedTuple):
+    rows: int
+    errors: int
+    bytes: int
+    seconds: float
+    workers: int
+    chunks: int
+
+    def summary(self) -> str:
+        rate = self.rows / self.seconds if self.seconds else float("inf")
+        mb = self.bytes / 1e6 / self.seconds if self.seconds else float("inf")
+        return (f"{self.rows:,} rows ({self.errors:,} errors) in {self.seconds:.2f} s: "
+                f"{rate:,.0f} rows/s, {mb:.1f} MB/s ({self.chunks} chunks, {self.workers} workers)")
+
+
+def evaluate_file(path: str, out: Any, *, fmt: Optional[str] = None, expr: Optional[str] = None,
+                  precision: Any = None, workers: int = 0, chunk_bytes: int = 1 << 20) -> Stats:
+    """Evaluate every row of *path* and write the results to the binary stream *out*, in order."""
+    fmt = fmt or _detect_format(path)
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    size = os.path.getsize(path)
+    columns: Tuple[str, ...] = ()
+    if size == 0:
+        return Stats(0, 0, 0, time.perf_counter() - started, workers, 0)
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+        if fmt == "csv":
+            newline = mm.find(b"\n")
+            start = size if newline < 0 else newline + 1
+            columns = tuple(next(csv.reader([mm[:start].decode("utf-8")]), []))
+            if expr is None and "expr" not in columns:
+                raise CalcError("CSV input needs an 'expr' column or --expr")
+            out.write(b"result,error\n")
+        ranges = split_chunks(mm, start, chunk_bytes)
+    jobs = [Job(path, a, b, fmt, expr, columns, precision) for a, b in ranges]
+
+    rows = errors = 0
+    if workers == 1 or len(jobs) <= 1:
+        for job in jobs:
+            chunk = evaluate_chunk(job)
+            out.write(chunk.output)
+            rows, errors = rows + chunk.rows, errors + chunk.errors
+    else:
+        # "spawn" as in calc_core.executor: the caller may be multi-threaded.
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            window: List[Future] = []
+            pending = iter(jobs)
+            for job in pending:
+                window.append(pool.submit(evaluate_chunk, job))
+                if len(window) >= workers * _WINDOW_PER_WORKER:
+                    break
+            while window:
+                chunk = window.pop(0).result()
+                job = next(pending, None)
+                if job is not None:
+                    window.append(pool.submit(evaluate_chunk, job))
+                out.write(chunk.output)
+                rows, errors = rows + chunk.rows, errors + chunk.errors
+    out.flush()
+    return Stats(rows, errors, size, time.perf_counter() - started, workers, len(jobs))
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def _precision(text: str) -> Any:
+    return FLOAT64 if text == FLOAT64 else int(text)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="calc", description=__doc__.splitlines()[0])
+    parser.add_argument("expression", nargs="?", help="evaluate this expression and print the result")
+    parser.add_argument("-i", "--input", help="file of rows to evaluate")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    parser.add_argument("--format", choices=FORMATS, help="input format (default: from the file extension)")
+    parser.add_argument("--expr", help="expression evaluated for every row (CSV/NDJSON variable rows)")
+    parser.add_argument("-p", "--precision", type=_precision, help="significant digits, or 'float64'")
+    parser.add_argument("-w", "--workers", type=int, default=0, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-bytes", type=int, default=1 << 20, help="input bytes per chunk (default 1 MiB)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print throughput statistics")
+    args = parser.parse_args(argv)
+
+    if (args.expression is None) == (args.input is None):
+        parser.error("give either an expression or --input")
+    if args.workers < 0 or args.chunk_bytes < 1:
+        parser.error("--workers must be >= 0 and --chunk-bytes >= 1")
+
+    if args.expression is not None:
+        try:
+            print(calculate(args.expression, precision=args.precision))
+        except CalcError as exc:
+            print(f"error: {exc}", file=sys.stderr)
+            return 1
+        return 0
+
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        stats = evaluate_file(args.input, out, fmt=args.format, expr=args.expr, precision=args.precision,
+                              workers=args.workers, chunk_bytes=args.chunk_bytes)
+    except (CalcError, OSError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    finally:
+        if args.output:
+            out.close()
+    if not args.quiet:
+        print(stats.summary(), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,7 @@
-def main():
-    print("Hello from calculator-mcp!")
+"""Entry point: ``python main.py`` is the command-line calculator (see calculator_cli)."""
+import sys
 
+from calculator_cli import main
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
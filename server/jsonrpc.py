@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+"""JSON-RPC 2.0 dispatch shared by the HTTP and stdio MCP transports.
+
+Transports only deal with framing: they hand a decoded payload (a single
+request object or a batch array) to :meth:`Dispatcher.handle_payload` and
+write back the :class:`Reply` it returns.
+
+Nothing here imports :mod:`calc_core` at module level: a freshly started
+stdio server can answer ``initialize`` and ``tools/list`` before the
+calculator (and its parser tables) are loaded; see :meth:`Dispatcher.preload`.
+"""
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional
+
+from .registry import ResourceRegistry, registry
+
+if TYPE_CHECKING:
+    from calc_core.executor import CalcExecutor
+
+logger = logging.getLogger(__name__)
+
+PROTOCOL_VERSION = "2025-06-18"
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+SERVER_ERROR = -32000
+
+
+def json_rpc_response(request_id: int | str | None, result: Any) -> Dict[str, Any]:
+    """Construct a successful JSON-RPC response."""
+    return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+
+def json_rpc_error(request_id: int | str | None, code: int, message: str) -> Dict[str, Any]:
+    """Construct a JSON-RPC error response."""
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "error": {"code": code, "message": message},
+    }
+
+
+class Reply(NamedTuple):
+    """Outcome of one payload: the body to send (None: nothing) and an HTTP status."""
+
+    body: Optional[Dict[str, Any] | List[Dict[str, Any]]]
+    status: int = 200
+
+
+class Dispatcher:
+    """Route JSON-RPC messages to the MCP methods and registered tools."""
+
+    def __init__(
+        self,
+        server_info: Dict[str, Any],
+        capabilities: Dict[str, Any],
+        tools: ResourceRegistry = registry,
+        pool: Optional[CalcExecutor] = None,
+    ) -> None:
+        self.server_info = server_info
+        self.capabilities = capabilities
+        self.tools = tools
+        self._pool = pool
+
+    @property
+    def pool(self) -> CalcExecutor:
+        """The calculation pool (default: the shared :data:`calc_core.executor.executor`)."""
+        if self._pool is None:
+            from calc_core.executor import executor
+
+            self._pool = executor
+        return self._pool
+
+    def preload(self) -> None:
+        """Import the calculator and load the parser, e.g. in a background thread."""
+        from calc_core import compile_expression
+
+        compile_expression("0")
+        self.pool.stats()
+
+    async def handle_payload(self, payload: Any) -> Reply:
+        """Handle a single request object or a batch array."""
+        if isinstance(payload, list):
+            return await self.handle_batch(payload)
+        return await self.handle(payload)
+
+    async def handle_batch(self, messages: List[Any]) -> Reply:
+        """Process batch entries concurrently; answer in request order.
+
+        Notifications get no entry; a batch of only notifications gets no
+        response at all.
+        """
+        if not messages:
+            return Reply(json_rpc_error(None, INVALID_REQUEST, "Invalid Request"), 400)
+        await self._warm(messages)
+        replies = await asyncio.gather(*(self.handle(m) for m in messages))
+        bodies = [r.body for r in replies if r.body is not None]
+        return Reply(bodies or None)
+
+    async def _warm(self, messages: List[Any]) -> None:
+        """Compile each distinct expression of a batch once, before fanning out."""
+        if self.pool.kind == "process":
+            return  # workers have their own caches
+        exprs = set()
+        for m in messages:
+            if isinstance(m, dict) and m.get("method") == "tools/call":
+                params = m.get("params")
+                arguments = params.get("arguments") if isinstance(params, dict) else None
+                if isinstance(arguments, dict) and isinstance(arguments.get("expr"), str):
+                    exprs.add(arguments["expr"])
+        if exprs:
+            from calc_core import expression_cache
+
+            await self.pool.run(expression_cache.warm, sorted(exprs))
+
+    async def handle(self, message: Any) -> Reply:
+        """Handle one request or notification."""
+        if not isinstance(message, dict):
+            return Reply(json_rpc_error(None, INVALID_REQUEST, "Invalid Request"), 400)
+        request_id = message.get("id")
+        method = message.get("method")
+        params = message.get("params") or {}
+
+        # Notifications (no id) never get a response.
+        if request_id is None:
+            if method == "notifications/initialized":
+                logger.info("Received 'initialized' notification from client.")
+            else:
+                logger.warning("Received an unsupported notification: %s", method)
+            return Reply(None, 204)
+
+        if not isinstance(method, str):
+            return Reply(json_rpc_error(None, INVALID_REQUEST, "Invalid Request"), 400)
+        if not isinstance(params, dict):
+            # By-position (array) params: no method here takes them.
+            return Reply(json_rpc_error(request_id, INVALID_PARAMS, "Invalid params"), 400)
+
+        if method == "initialize":
+            return Reply(json_rpc_response(request_id, {
+                "protocolVersion": PROTOCOL_VERSION,
+                "serverInfo": self.server_info,
+                "capabilities": self.capabilities,
+            }))
+
+        if method == "tools/list":
+            tools_list = [
+                {
+                    "name": name,
+                    "description": meta.get("description", ""),
+                    "inputSchema": {
+                        "type": "object",
+                        "properties": meta.get("parameters", {}),
+                    },
+                }
+                for name, meta in self.tools.list_functions().items()
+            ]
+            return Reply(json_rpc_response(request_id, {"tools": tools_list}))
+
+        if method == "tools/call":
+            return await self._call_tool(request_id, params)
+
+        if method == "metrics/get":
+            from calc_core import metrics
+
+            return Reply(json_rpc_response(request_id, {"contentType": metrics.CONTENT_TYPE, "text": metrics.render()}))
+
+        if method == "admin/profile":
+            return self._profile(request_id, params)
+
+        return Reply(json_rpc_error(request_id, METHOD_NOT_FOUND, "Method not found"), 404)
+
+    def _profile(self, request_id: int | str, params: Dict[str, Any]) -> Reply:
+        """``{"action": "start", "requests": N, "kind": ..., "interval_ms": ...}``, ``"stop"`` or ``"status"``."""
+        from calc_core import config
+        from calc_core.profiling import profiler
+
+        if not config.ADMIN_ENABLED:
+            return Reply(json_rpc_error(request_id, METHOD_NOT_FOUND, "Method not found"), 404)
+        action = params.get("action", "status")
+        try:
+            if action == "start":
+                status = profiler.start(
+                    params.get("requests"),
+                    params.get("kind", "cprofile"),
+                    float(params.get("interval_ms", 1.0)) / 1000,
+                )
+            elif action == "stop":
+                status = profiler.stop()
+            elif action == "status":
+                status = profiler.status()
+            else:
+                raise ValueError("action must be one of start, stop, status")
+        except (TypeError, ValueError) as e:
+            return Reply(json_rpc_error(request_id, INVALID_PARAMS, f"Invalid params: {e}"), 400)
+        return Reply(json_rpc_response(request_id, status))
+
+    async def _call_tool(self, request_id: int | str, params: Dict[str, Any]) -> Reply:
+        from calc_core import CalcError, metrics
+
+        name = params.get("name")
+        arguments = params.get("arguments") or {}
+        if not isinstance(name, str) or not isinstance(arguments, dict):
+            return Reply(json_rpc_error(request_id, INVALID_PARAMS, "Invalid params"), 400)
+        func_meta = self.tools.get_function(name)
+        if not func_meta:
+            return Reply(json_rpc_error(request_id, METHOD_NOT_FOUND, "Method not found"), 404)
+        metrics.TOOL_CALLS.inc(name)
+        try:
+            # Tool handlers are blocking; keep the event loop free.
+            if func_meta.get("stateful") and self.pool.kind == "process":
+                # Their state lives in this process, not in a pool worker.
+                result = await asyncio.to_thread(func_meta["handler"], **arguments)
+            else:
+                result = await self.pool.run(func_meta["handler"], **arguments)
+        except CalcError as e:
+            metrics.record_error(e)
+            return Reply(json_rpc_error(request_id, SERVER_ERROR, f"Calculation Error: {e}"), 400)
+        except Exception as e:
+            logger.error("Error during tool call: %s", e, exc_info=True)
+            return Reply(json_rpc_error(request_id, SERVER_ERROR, f"Server Error: {e}"), 500)
+        return Reply(json_rpc_response(request_id, {"content": [{"type": "text", "text": str(result)}]}))
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+"""Logging for the MCP transports: off-thread, sampled and lazily formatted.
+
+* Records are put on a queue by the request path and formatted/written by a
+  background :class:`logging.handlers.QueueListener` thread.
+* Request/response bodies are logged through :func:`log_body`, which
+  serializes nothing on the hot path: JSON encoding and truncation happen
+  only if the record is actually written.
+* Only a sample of requests logs bodies (``CALC_LOG_BODY_SAMPLE``, 0..1),
+  truncated to ``CALC_LOG_BODY_MAX`` characters.
+* ``CALC_LOG_FORMAT=json`` writes one JSON object per line.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional, TextIO
+
+# Read directly rather than through calc_core.config: importing any part of
+# calc_core loads the whole calculator, which the stdio server defers.
+LOG_FORMAT = "json" if os.environ.get("CALC_LOG_FORMAT", "").strip().lower() == "json" else "text"
+BODY_SAMPLE_RATE = float(os.environ.get("CALC_LOG_BODY_SAMPLE") or 1.0)
+BODY_MAX_CHARS = int(os.environ.get("CALC_LOG_BODY_MAX") or 2000)
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, msg (and exc)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Enqueue records unformatted; the listener thread does the formatting.
+
+    The stock handler formats in the caller to make records picklable; ours
+    never leave the process, and the logged objects are not mutated after
+    logging.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class _Body:
+    """A body that is serialized and truncated only when formatted."""
+
+    __slots__ = ("body",)
+
+    def __init__(self, body: Any) -> None:
+        self.body = body
+
+    def __str__(self) -> str:
+        if isinstance(self.body, (bytes, bytearray)):
+            text = self.body.decode("utf-8", "replace")
+        else:
+            text = json.dumps(self.body, ensure_ascii=False, default=str)
+        if len(text) > BODY_MAX_CHARS:
+            return f"{text[:BODY_MAX_CHARS]}... ({len(text) - BODY_MAX_CHARS} more chars)"
+        return text
+
+
+def sample() -> bool:
+    """Decide once per request whether its bodies are logged."""
+    return BODY_SAMPLE_RATE >= 1 or random.random() < BODY_SAMPLE_RATE
+
+
+def log_body(logger: logging.Logger, label: str, body: Any) -> None:
+    """Log *body* at INFO as ``label: <json>`` without formatting it here."""
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("%s: %s", label, _Body(body))
+
+
+def configure_logging(
+    stream: TextIO = sys.stderr,
+    fmt: str = "%(asctime)s - %(levelname)s - %(message)s",
+    level: int = logging.INFO,
+) -> QueueListener:
+    """Route root logging through a queue to a background writer on *stream*.
+
+    Calling it again replaces the previous configuration.
+    """
+    global _listener
+    stop_logging()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(fmt))
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.addHandler(_DeferredQueueHandler(records))
+    root.setLevel(level)
+    _listener = QueueListener(records, handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the background writer."""
+    global _listener
+    root = logging.getLogger()
+    for old in [h for h in root.handlers if isinstance(h, _DeferredQueueHandler)]:
+        root.removeHandler(old)
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+__all__ = ["JsonFormatter", "configure_logging", "log_body", "sample", "stop_logging"]
@@ -3,134 +3,94 @@ from __future__ import annotations
 """FastAPI application exposing a spec-compliant MCP server."""
 
 import logging
-from typing import Any, Dict
 
 import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 
-from .registry import registry, CalcError
+from calc_core import metrics, result_cache
+from calc_core.executor import executor
+from .jsonrpc import PARSE_ERROR, Dispatcher, json_rpc_error
+from .logs import configure_logging, log_body, sample
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Configure logging (queued, written by a background thread)
+configure_logging()
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Calculator MCP Server", version="1.0.0")
 
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    yield
+    executor.shutdown(wait=False)
 
-def json_rpc_response(request_id: int | str, result: Any) -> Dict[str, Any]:
-    """Construct a successful JSON-RPC response."""
-    return {"jsonrpc": "2.0", "id": request_id, "result": result}
 
+app = FastAPI(title="Calculator MCP Server", version="1.0.0", lifespan=lifespan)
+app.add_middleware(metrics.MetricsMiddleware)
 
-def json_rpc_error(request_id: int | str, code: int, message: str) -> Dict[str, Any]:
-    """Construct a JSON-RPC error response."""
-    return {
-        "jsonrpc": "2.0",
-        "id": request_id,
-        "error": {"code": code, "message": message},
-    }
+
+dispatcher = Dispatcher(
+    server_info={"name": "Calculator MCP Server", "version": "1.0.0"},
+    capabilities={
+        "tools": {
+            "listChanged": False
+        },
+        "prompts": {},
+        "resources": {},
+        "logging": {},
+        "roots": {}
+    },
+)
 
 
 @app.post("/")
 async def mcp_rpc_handler(request: Request):
-    """Handles all incoming MCP JSON-RPC requests."""
-    logger.info(f"Received request on {request.url.path}")
+    """Handles all incoming MCP JSON-RPC requests, single or batched."""
+    logger.debug("Received request on %s", request.url.path)
+    sampled = sample()
     try:
         body = await request.json()
-        logger.info(f"MCP-REQUEST-BODY: {body}")
-
-        def create_and_log_response(content, status_code=200):
-            logger.info(f"MCP-RESPONSE-BODY: {content}")
-            return JSONResponse(status_code=status_code, content=content)
-
-        request_id = body.get("id")
-        method = body.get("method")
-        params = body.get("params", {})
-
-        # Handle notifications (requests without an id)
-        if request_id is None:
-            if method == "notifications/initialized":
-                # This is a notification from the client that it's ready.
-                # We don't need to send a response for notifications.
-                logger.info("Received 'initialized' notification from client.")
-                # Return a simple 204 No Content response without a body.
-                # Using JSONResponse here would incorrectly add a 'null' body.
-                return Response(status_code=204)
-            else:
-                # For other notifications, we can just log them and ignore.
-                logger.warning(f"Received an unsupported notification: {method}")
-                return Response(status_code=204)
-
-        if method == "initialize":
-            response_payload = {
-                "protocolVersion": "2025-06-18",
-                "serverInfo": {
-                    "name": "Calculator MCP Server",
-                    "version": "1.0.0"
-                },
-                "capabilities": {
-                    "tools": {
-                        "listChanged": False
-                    },
-                    "prompts": {},
-                    "resources": {},
-                    "logging": {},
-                    "roots": {}
-                }
-            }
-            return create_and_log_response(json_rpc_response(request_id, response_payload))
-
-        if not all([request_id, method]):
-            return create_and_log_response(
-                json_rpc_error(None, -32600, "Invalid Request"),
-                status_code=400,
-            )
-
-        if method == "tools/list":
-            all_funcs = registry.list_functions()
-            tools_list = []
-            for name, meta in all_funcs.items():
-                tools_list.append({
-                    "name": name,
-                    "description": meta.get("description", ""),
-                    "inputSchema": {
-                        "type": "object",
-                        "properties": meta.get("parameters", {}),
-                    }
-                })
-            return create_and_log_response(json_rpc_response(request_id, {"tools": tools_list}))
-
-        elif method == "tools/call":
-            tool_name = params.get("name")
-            arguments = params.get("arguments", {})
-            
-            func_meta = registry.get_function(tool_name)
-            if not func_meta:
-                return create_and_log_response(json_rpc_error(request_id, -32601, "Method not found"), status_code=404)
-
-            handler = func_meta["handler"]
-            try:
-                result = handler(**arguments)
-                return create_and_log_response(json_rpc_response(request_id, {"content": [{"type": "text", "text": str(result)}]}))
-            except CalcError as e:
-                return create_and_log_response(json_rpc_error(request_id, -32000, f"Calculation Error: {e}"), status_code=400)
-            except Exception as e:
-                return create_and_log_response(json_rpc_error(request_id, -32000, f"Server Error: {e}"), status_code=500)
-
-        else:
-            return create_and_log_response(json_rpc_error(request_id, -32601, "Method not found"), status_code=404)
+        if sampled:
+            log_body(logger, "MCP-REQUEST-BODY", body)
+
+        reply = await dispatcher.handle_payload(body)
+        if reply.body is None:
+            # Notifications (or a batch of only notifications): no body.
+            # Using JSONResponse here would incorrectly add a 'null' body.
+            return Response(status_code=204)
+        if sampled:
+            log_body(logger, "MCP-RESPONSE-BODY", reply.body)
+        start = metrics.perf_counter_ns()
+        response = JSONResponse(status_code=reply.status, content=reply.body)
+        metrics.SERIALIZE.observe_ns(metrics.perf_counter_ns() - start)
+        return response
 
     except Exception as e:
-        logger.error(f"Error processing request: {e}", exc_info=True)
-        response = json_rpc_error(None, -32700, f"Parse error: {str(e)}")
-        logger.info(f"MCP-RESPONSE-BODY: {response}")
+        logger.error("Error processing request: %s", e, exc_info=True)
+        response = json_rpc_error(None, PARSE_ERROR, f"Parse error: {str(e)}")
+        log_body(logger, "MCP-RESPONSE-BODY", response)
         return JSONResponse(
             status_code=500,
             content=response,
         )
 
 
+@app.get("/healthz")
+async def healthz():
+    """Liveness/readiness probe, with calculation pool and result cache gauges."""
+    return {
+        "status": "ok",
+        "executor": executor.stats()._asdict(),
+        "result_cache": result_cache.info()._asdict(),
+    }
+
+
+@app.get("/metrics")
+async def metrics_handler():
+    """Counters, gauges and stage latency histograms in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.get("/")
 async def mcp_sse_handler(request: Request):
     """Handles the client's GET request to establish a server-sent events (SSE) stream."""
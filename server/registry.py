@@ -1,56 +1,133 @@
 from __future__ import annotations
 
-"""Resource & function registry for the Calculator MCP server."""
+"""Resource & function registry for the Calculator MCP server.
 
-from decimal import getcontext
+Handlers import :mod:`calc_core` when first called, so listing the tools
+does not load the calculator.
+"""
+
+import json
 from typing import Any, Dict, List, Optional, Tuple
 
-from lark import Lark
 
-from calc_core.transformer import EvalTransformer, CalcError
+def _evaluate_expr(
+    expr: str, variables: dict | None = None, precision: int | str | None = None, trace: bool = False
+) -> str:
+    """Evaluate *expr* with high precision; repeated calls are answered from the result cache.
 
-# --------------------------- grammar & parser ----------------------------
-# Minimal Lark grammar matching EvalTransformer rule names
-_CALC_GRAMMAR = r"""
-    ?start: expr
+    With *trace*, the cache is bypassed and the answer is a JSON object with
+    the ``result`` and its ``trace`` (see :func:`calc_core.calculate_traced`).
+    """
+    if trace:
+        from calc_core import calculate_traced
 
-    ?expr: expr "+" term   -> add
-         | expr "-" term   -> sub
-         | term
+        value, details = calculate_traced(expr, precision=precision, **(variables or {}))
+        return json.dumps({"result": str(value), "trace": details})
 
-    ?term: term "*" power  -> mul
-         | term "/" power  -> div
-         | power
+    from calc_core import calculate_cached
 
-    ?power: factor "^" power -> pow
-          | factor
+    return str(calculate_cached(expr, precision=precision, **(variables or {})))
 
-    ?factor: func_call
-           | constant       -> const
-           | NUMBER         -> number
-           | "-" factor     -> signed
-           | "(" expr ")"
 
-    func_call: NAME "(" arg_list? ")" -> func
-    arg_list: expr ("," expr)*
+def _evaluate_many(
+    expr: str,
+    rows: list | None = None,
+    columns: dict | None = None,
+    precision: int | str | None = None,
+) -> str:
+    """Evaluate *expr* once per variable row; return a JSON array of per-row outcomes."""
+    from calc_core import CalcError, calculate_many, metrics
 
-    constant: NAME
+    if (rows is None) == (columns is None):
+        raise CalcError("Provide exactly one of 'rows' or 'columns'")
+    outcomes = calculate_many(expr, rows if rows is not None else columns, precision=precision)
+    items = []
+    for o in outcomes:
+        if isinstance(o, CalcError):
+            metrics.record_error(o)
+            items.append({"error": str(o)})
+        else:
+            items.append({"result": str(o)})
+    return json.dumps(items)
+
+
+def _solve(
+    expr: str,
+    variable: str,
+    lower: float | str,
+    upper: float | str,
+    variables: dict | None = None,
+    precision: int | str | None = None,
+    tol: float | str | None = None,
+) -> str:
+    """Root of *expr* in [*lower*, *upper*]; JSON with ``root``, ``residual`` and ``iterations``."""
+    from calc_core.solvers import solve
+
+    root = solve(expr, variable, lower, upper, precision=precision, tol=tol, variables=variables)
+    return json.dumps({"root": str(root.root), "residual": str(root.residual), "iterations": root.iterations})
+
+
+def _integrate(
+    expr: str,
+    variable: str,
+    lower: float | str,
+    upper: float | str,
+    variables: dict | None = None,
+    precision: int | str | None = None,
+    tol: float | str | None = None,
+) -> str:
+    """Integral of *expr* over [*lower*, *upper*]; JSON with ``value``, ``error`` and ``intervals``."""
+    from calc_core.solvers import integrate
+
+    result = integrate(expr, variable, lower, upper, precision=precision, tol=tol, variables=variables)
+    return json.dumps({"value": str(result.value), "error": str(result.error), "intervals": result.intervals})
+
+
+def _sum(
+    expr: str,
+    variable: str,
+    start: int | str,
+    end: int | str,
+    step: int | str = 1,
+    variables: dict | None = None,
+    precision: int | str | None = None,
+) -> str:
+    """Sum of *expr* over an integer range; JSON with ``value`` and ``terms``."""
+    from calc_core.solvers import summation
+
+    result = summation(expr, variable, start, end, step=step, precision=precision, variables=variables)
+    return json.dumps({"value": str(result.value), "terms": result.terms})
+
+
+def _session_define(name: str, expr: str, session: str | None = None, precision: int | str | None = None) -> str:
+    """Add a formula to *session* (or to a new session); JSON of the session id and recomputed outcomes."""
+    from calc_core.sessions import sessions
+
+    return json.dumps(sessions.define(name, str(expr), session, precision))
+
+
+def _session_update(session: str, name: str, expr: str) -> str:
+    """Replace a formula; only the formulas depending on it are recomputed."""
+    from calc_core.sessions import sessions
+
+    return json.dumps(sessions.update(session, name, str(expr)))
 
-    %import common.CNAME -> NAME
-    %import common.SIGNED_NUMBER -> NUMBER
-    %import common.WS_INLINE
-    %ignore WS_INLINE
-"""
 
-_PARSER = Lark(_CALC_GRAMMAR, parser="lalr", transformer=None, maybe_placeholders=False)
+def _session_get(session: str, names: list | None = None) -> str:
+    """Current expressions and outcomes of *names* (default: all formulas)."""
+    from calc_core import CalcError
+    from calc_core.sessions import sessions
 
+    if names is not None and not (isinstance(names, list) and all(isinstance(n, str) for n in names)):
+        raise CalcError("'names' must be a list of formula names")
+    return json.dumps(sessions.get(session, names))
 
-def _evaluate_expr(expr: str, variables: dict | None = None) -> str:
-    """Evaluate *expr* with high precision using EvalTransformer & Lark."""
-    transformer = EvalTransformer(variables)
-    tree = _PARSER.parse(expr)
-    result = transformer.transform(tree)  # type: ignore[arg-type]
-    return str(result)
+
+def _session_drop(session: str, name: str | None = None) -> str:
+    """Remove one formula, or the whole session if *name* is omitted."""
+    from calc_core.sessions import sessions
+
+    return json.dumps(sessions.drop(session, name))
 
 
 # --------------------------- registry class -----------------------------
@@ -94,16 +171,28 @@ registry = ResourceRegistry()
 registry.add_function(
     "calc.evaluate",
     {
-        "description": "Evaluate a math expression with 34-digit precision.",
+        "description": "Evaluate a math expression with 34-digit precision (configurable per call).",
             "parameters": {
                 "expr": {
                     "type": "string",
-                    "description": "Mathematical expression supporting + - * / ^, parentheses, predefined constants and functions."
+                    "description": "Mathematical expression supporting + - * / ^, parentheses, predefined constants and functions. "
+                                   "List literals ([1, 2, 3]) broadcast elementwise; sum, mean, prod, stdev, min and max reduce them."
                 },
                 "variables": {
                     "type": "object",
-                    "description": "Optional mapping of variable names to numeric values overriding default constants.",
-                    "schema": {"additionalProperties": {"type": "number"}},
+                    "description": "Optional mapping of variable names to numeric values (or lists of numbers) overriding default constants.",
+                    "schema": {"additionalProperties": {"type": ["number", "array"], "items": {"type": "number"}}},
+                    "optional": True
+                },
+                "precision": {
+                    "type": ["integer", "string"],
+                    "description": "Significant digits for this call (default 34), or 'float64' for fast double precision.",
+                    "optional": True
+                },
+                "trace": {
+                    "type": "boolean",
+                    "description": "Return a JSON object with the result and a trace of where the time went "
+                                   "(stage timings, tree size, per-function times, trig series lengths).",
                     "optional": True
                 }
             },
@@ -111,12 +200,205 @@ registry.add_function(
                 "pi": "3.14159265358979",
                 "e": "2.71828182845905"
             },
-            "supported_functions": ["sin", "cos", "tan", "asin", "acos", "atan", "sqrt", "log", "exp", "abs"],
+            "supported_functions": ["sin", "cos", "tan", "asin", "acos", "atan", "sqrt", "log", "exp", "abs",
+                                    "sum", "mean", "prod", "stdev", "min", "max"],
             "examples": [
                 {"expr": "sin(pi/2)", "result": "1"},
                 {"expr": "log(100,10)", "result": "2"},
-                {"expr": "sqrt(16)+tan(pi/4)", "result": "5"}
+                {"expr": "sqrt(16)+tan(pi/4)", "result": "5"},
+                {"expr": "mean([98.5, 88, 76.5])", "result": "87.66666666666666666666666666666667"}
             ],
             "handler": _evaluate_expr,
     },
 )
+
+registry.add_function(
+    "calc.evaluate_many",
+    {
+        "description": "Evaluate one expression over many variable bindings in a single call. "
+                       "Returns a JSON array with one {\"result\"} or {\"error\"} object per row, in input order.",
+        "parameters": {
+            "expr": {
+                "type": "string",
+                "description": "Expression evaluated for every row, e.g. 'm*g*h'."
+            },
+            "rows": {
+                "type": "array",
+                "description": "List of variable mappings, one per row.",
+                "items": {"type": "object", "additionalProperties": {"type": "number"}},
+                "optional": True
+            },
+            "columns": {
+                "type": "object",
+                "description": "Alternative to rows: variable name -> list of values (equal lengths).",
+                "additionalProperties": {"type": "array", "items": {"type": "number"}},
+                "optional": True
+            },
+            "precision": {
+                "type": ["integer", "string"],
+                "description": "Significant digits for every row (default 34), or 'float64' for fast "
+                               "vectorized double-precision evaluation of large batches.",
+                "optional": True
+            }
+        },
+        "examples": [
+            {"expr": "m*g*h", "columns": {"m": [1, 2], "g": [9.8, 9.8], "h": [10, 5]},
+             "result": "[{\"result\": \"98\"}, {\"result\": \"98\"}]"}
+        ],
+        "handler": _evaluate_many,
+    },
+)
+
+# Numerical solvers: one call instead of an agent-driven loop of calc.evaluate.
+_SOLVER_PARAMETERS = {
+    "variables": {
+        "type": "object",
+        "description": "Values of the other names in the expression.",
+        "schema": {"additionalProperties": {"type": "number"}},
+        "optional": True
+    },
+    "precision": {
+        "type": ["integer", "string"],
+        "description": "Significant digits (default 34).",
+        "optional": True
+    },
+}
+_BOUND = {"type": ["number", "string"]}
+
+registry.add_function(
+    "calc.solve",
+    {
+        "description": "Find a root of an expression in one variable within an interval where it changes sign "
+                       "(Brent's method, full precision). Returns JSON {\"root\", \"residual\", \"iterations\"}.",
+        "parameters": {
+            "expr": {"type": "string", "description": "Expression whose zero is wanted, e.g. 'x^3 - 2*x - 5'."},
+            "variable": {"type": "string", "description": "The unknown, e.g. 'x'."},
+            "lower": {**_BOUND, "description": "Interval start: a number or an expression such as 'pi/4'."},
+            "upper": {**_BOUND, "description": "Interval end; the expression must differ in sign at the two ends."},
+            "tol": {**_BOUND, "description": "Absolute tolerance on the root (default: full precision).", "optional": True},
+            **_SOLVER_PARAMETERS,
+        },
+        "examples": [
+            {"expr": "x^2 - 2", "variable": "x", "lower": 0, "upper": 2,
+             "result": "{\"root\": \"1.414213562373095048801688724209698\", ...}"}
+        ],
+        "handler": _solve,
+    },
+)
+
+registry.add_function(
+    "calc.integrate",
+    {
+        "description": "Definite integral over a finite interval by adaptive Gauss-Legendre quadrature, to a "
+                       "requested absolute tolerance. Returns JSON {\"value\", \"error\", \"intervals\"}.",
+        "parameters": {
+            "expr": {"type": "string", "description": "Integrand, e.g. 'exp(-x^2)'."},
+            "variable": {"type": "string", "description": "Integration variable, e.g. 'x'."},
+            "lower": {**_BOUND, "description": "Lower limit: a number or an expression such as '0'."},
+            "upper": {**_BOUND, "description": "Upper limit, e.g. 'pi'."},
+            "tol": {**_BOUND, "description": "Absolute error target (default: full precision).", "optional": True},
+            **_SOLVER_PARAMETERS,
+        },
+        "examples": [
+            {"expr": "sin(x)", "variable": "x", "lower": 0, "upper": "pi", "result": "{\"value\": \"2\", ...}"}
+        ],
+        "handler": _integrate,
+    },
+)
+
+registry.add_function(
+    "calc.sum",
+    {
+        "description": "Sum of a finite series: expr evaluated for variable = start, start+step, ..., end "
+                       "(inclusive, integers). Returns JSON {\"value\", \"terms\"}.",
+        "parameters": {
+            "expr": {"type": "string", "description": "Term, e.g. '1/k^2'."},
+            "variable": {"type": "string", "description": "Index variable, e.g. 'k'."},
+            "start": {"type": ["integer", "string"], "description": "First index."},
+            "end": {"type": ["integer", "string"], "description": "Last index (inclusive)."},
+            "step": {"type": ["integer", "string"], "description": "Index increment (default 1).", "optional": True},
+            **_SOLVER_PARAMETERS,
+        },
+        "examples": [
+            {"expr": "k^2", "variable": "k", "start": 1, "end": 100, "result": "{\"value\": \"3.3835E+5\", \"terms\": 100}"}
+        ],
+        "handler": _sum,
+    },
+)
+
+# Session tools keep state in the server process: "stateful" tells the
+# dispatcher never to run them in a process pool worker.
+_SESSION_OUTCOMES = ("{\"session\": id, \"updated\": {name: {\"result\"} or {\"error\"}}} "
+                     "for every formula that was recomputed, in dependency order.")
+
+registry.add_function(
+    "calc.session.define",
+    {
+        "description": "Define a named formula in a calculation session; formulas may refer to each other by name. "
+                       "Omit 'session' to start a new session. Returns " + _SESSION_OUTCOMES,
+        "parameters": {
+            "name": {"type": "string", "description": "Formula name, e.g. 'total'."},
+            "expr": {"type": "string", "description": "Expression over numbers and other formula names, e.g. 'price*qty'."},
+            "session": {"type": "string", "description": "Session id returned by an earlier call.", "optional": True},
+            "precision": {
+                "type": ["integer", "string"],
+                "description": "Significant digits for the whole session (default 34), set when it is created.",
+                "optional": True
+            }
+        },
+        "examples": [
+            {"name": "price", "expr": "2.5",
+             "result": "{\"session\": \"3f9c...\", \"updated\": {\"price\": {\"result\": \"2.5\"}}}"}
+        ],
+        "handler": _session_define,
+        "stateful": True,
+    },
+)
+
+registry.add_function(
+    "calc.session.update",
+    {
+        "description": "Change a formula of a session and recompute only the formulas that depend on it "
+                       "(stopping where a value comes out unchanged). Returns " + _SESSION_OUTCOMES,
+        "parameters": {
+            "session": {"type": "string", "description": "Session id."},
+            "name": {"type": "string", "description": "Name of a defined formula."},
+            "expr": {"type": "string", "description": "New expression."}
+        },
+        "handler": _session_update,
+        "stateful": True,
+    },
+)
+
+registry.add_function(
+    "calc.session.get",
+    {
+        "description": "Read formulas of a session: {\"session\", \"precision\", \"formulas\": "
+                       "{name: {\"expr\", \"result\" or \"error\"}}}. Values are cached, not recomputed.",
+        "parameters": {
+            "session": {"type": "string", "description": "Session id."},
+            "names": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Formulas to return (default: all).",
+                "optional": True
+            }
+        },
+        "handler": _session_get,
+        "stateful": True,
+    },
+)
+
+registry.add_function(
+    "calc.session.drop",
+    {
+        "description": "Remove a formula from a session (formulas using it are recomputed and fail), "
+                       "or the whole session if 'name' is omitted.",
+        "parameters": {
+            "session": {"type": "string", "description": "Session id."},
+            "name": {"type": "string", "description": "Formula to remove.", "optional": True}
+        },
+        "handler": _session_drop,
+        "stateful": True,
+    },
+)
@@ -1,116 +1,249 @@
 from __future__ import annotations
 
-"""A lightweight, stdio-based MCP server for local tool integration."""
+"""A lightweight, stdio-based MCP server for local tool integration.
 
+Requests are read as ``Content-Length`` framed JSON from the binary stdin
+buffer and dispatched concurrently; each response is written as soon as it
+is ready (possibly out of order, correlated by id) by a single writer task.
+A ``$/cancelRequest`` notification (``{"params": {"id": ...}}``) answers the
+named in-flight request with a ``Request cancelled`` error.
+
+``--blocking`` runs the previous one-request-at-a-time loop, kept for
+comparison benchmarks (see ``benchmarks/stdio_throughput.py``).
+
+Agents start a fresh process per session, so startup is kept short: the
+calculator is not imported until the first response (usually ``initialize``)
+has been written, and is then loaded in a background thread while the
+client continues its handshake.  ``benchmarks/stdio_startup.py`` measures
+time to first response.  For the same reason, requests are only counted in
+the metrics (the ``metrics/get`` method) from the moment the calculator has
+loaded: usually everything after the handshake.
+"""
+
+import asyncio
 import json
 import logging
 import sys
-from typing import Any, Dict
+import threading
+from time import perf_counter_ns
+from typing import Any, BinaryIO, Dict, List, Optional
 
 # Assuming the script is run from the project root, we can import from the server module.
-from server.registry import registry, CalcError
+from server.jsonrpc import INTERNAL_ERROR, PARSE_ERROR, Dispatcher, json_rpc_error
+from server.logs import configure_logging, log_body, sample
 
 # Configure logging to write to stderr to avoid interfering with the stdio communication channel.
-logging.basicConfig(
-    level=logging.INFO,
-    stream=sys.stderr,
-    format="%(asctime)s - stdio-server - %(levelname)s - %(message)s",
-)
+configure_logging(stream=sys.stderr, fmt="%(asctime)s - stdio-server - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
+REQUEST_CANCELLED = -32800
 
-def create_json_rpc_response(request_id: int | str, result: Any) -> Dict[str, Any]:
-    """Constructs a successful JSON-RPC response dictionary."""
-    return {"jsonrpc": "2.0", "id": request_id, "result": result}
+dispatcher = Dispatcher(
+    server_info={"name": "Calculator Stdio MCP Server", "version": "1.0.0"},
+    capabilities={"tools": {"listChanged": False}},
+)
 
 
-def create_json_rpc_error(
-    request_id: int | str | None,
-    code: int,
-    message: str,
-) -> Dict[str, Any]:
-    """Constructs a JSON-RPC error response dictionary."""
-    return {
-        "jsonrpc": "2.0",
-        "id": request_id,
-        "error": {"code": code, "message": message},
-    }
+def encode_frame(response: Dict[str, Any] | List[Dict[str, Any]]) -> bytes:
+    """Serialize *response* with Content-Length framing."""
+    body = json.dumps(response).encode("utf-8")
+    # Use Content-Length framing to delineate messages, as required by some clients.
+    return f"Content-Length: {len(body)}\r\n\r\n".encode("ascii") + body
 
 
-def send_response(response: Dict[str, Any]):
+def send_response(response: Dict[str, Any] | List[Dict[str, Any]]):
     """Serializes a response dictionary to JSON and sends it to stdout with framing."""
     message_body = json.dumps(response)
-    # Use Content-Length framing to delineate messages, as required by some clients.
     header = f"Content-Length: {len(message_body.encode('utf-8'))}\r\n\r\n"
     sys.stdout.write(header)
     sys.stdout.write(message_body)
     sys.stdout.flush()
-    logger.info(f"Sent response: {message_body}")
+    log_body(logger, "Sent response", response)
 
 
-def handle_request(body: Dict[str, Any]):
-    """Processes a single JSON-RPC request and sends a response."""
-    request_id = body.get("id")
-    method = body.get("method")
-    params = body.get("params", {})
+def handle_request(body: Any):
+    """Processes a JSON-RPC request or batch array and sends the response, if any."""
+    reply = asyncio.run(dispatcher.handle_payload(body))
+    # Notifications (and batches of only notifications) get no response.
+    if reply.body is not None:
+        send_response(reply.body)
 
-    # Handle notifications (requests without an ID)
-    if request_id is None:
-        if method == "notifications/initialized":
-            logger.info("Client initialized successfully.")
-        else:
-            logger.warning(f"Received unsupported notification: {method}")
-        return  # Do not send a response for notifications
-
-    if method == "initialize":
-        response_payload = {
-            "protocolVersion": "2025-06-18",
-            "serverInfo": {"name": "Calculator Stdio MCP Server", "version": "1.0.0"},
-            "capabilities": {"tools": {"listChanged": False}},
-        }
-        send_response(create_json_rpc_response(request_id, response_payload))
-
-    elif method == "tools/list":
-        all_funcs = registry.list_functions()
-        tools_list = [
-            {
-                "name": name,
-                "description": meta.get("description", ""),
-                "inputSchema": {
-                    "type": "object",
-                    "properties": meta.get("parameters", {}),
-                },
-            }
-            for name, meta in all_funcs.items()
-        ]
-        send_response(create_json_rpc_response(request_id, {"tools": tools_list}))
-
-    elif method == "tools/call":
-        tool_name = params.get("name")
-        arguments = params.get("arguments", {})
-        func_meta = registry.get_function(tool_name)
-
-        if not func_meta:
-            send_response(create_json_rpc_error(request_id, -32601, "Method not found"))
+
+# ---------------------------------------------------------------------------
+# asyncio transport
+# ---------------------------------------------------------------------------
+
+async def read_frame(reader: asyncio.StreamReader) -> Optional[bytes]:
+    """Return the next message body, or None at end of input.
+
+    Header lines other than Content-Length are ignored, as is anything
+    before the first header.
+    """
+    content_length = None
+    while True:
+        line = await reader.readline()
+        if not line:
+            return None
+        line = line.strip()
+        if not line:
+            if content_length is not None:
+                try:
+                    return await reader.readexactly(content_length)
+                except asyncio.IncompleteReadError:
+                    logger.error("Input ended inside a message body.")
+                    return None
+            continue
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"content-length":
+            try:
+                content_length = int(value.strip())
+            except ValueError:
+                logger.error("Invalid Content-Length header: %r", line)
+                content_length = None
+
+
+async def _open_reader(stream: BinaryIO) -> asyncio.StreamReader:
+    """Wrap *stream* in a StreamReader (pipes natively, files via a thread)."""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    try:
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), stream)
+    except (OSError, ValueError):
+        # Regular files and some terminals cannot be registered with the loop.
+        def pump() -> None:
+            while chunk := stream.read1(65536):
+                loop.call_soon_threadsafe(reader.feed_data, chunk)
+            loop.call_soon_threadsafe(reader.feed_eof)
+
+        threading.Thread(target=pump, name="stdin-reader", daemon=True).start()
+    return reader
+
+
+class StdioServer:
+    """Concurrent JSON-RPC over framed byte streams."""
+
+    def __init__(self, output: BinaryIO, dispatcher: Dispatcher = dispatcher, preload: bool = True) -> None:
+        self.output = output
+        self.dispatcher = dispatcher
+        self.preload = preload
+        self._outbox: asyncio.Queue[Optional[bytes]] = asyncio.Queue()
+        self._in_flight: Dict[Any, asyncio.Task] = {}
+        self._tasks: set[asyncio.Task] = set()
+        # calc_core.metrics once the calculator is loaded (see _preload).
+        self.metrics: Any = None
+        if not preload:
+            from calc_core import metrics
+
+            self.metrics = metrics
+
+    async def _writer(self) -> None:
+        """The only coroutine that touches the output stream."""
+        while (frame := await self._outbox.get()) is not None:
+            self.output.write(frame)
+            self.output.flush()
+            if self.preload:
+                self.preload = False
+                threading.Thread(target=self._preload, name="preload", daemon=True).start()
+
+    def _preload(self) -> None:
+        self.dispatcher.preload()
+        from calc_core import metrics
+
+        self.metrics = metrics
+
+    def send(self, response: Dict[str, Any] | List[Dict[str, Any]], sampled: bool = True) -> None:
+        if sampled:
+            log_body(logger, "Sent response", response)
+        metrics = self.metrics
+        if metrics is None:
+            self._outbox.put_nowait(encode_frame(response))
             return
+        start = perf_counter_ns()
+        frame = encode_frame(response)
+        metrics.SERIALIZE.observe_ns(perf_counter_ns() - start)
+        self._outbox.put_nowait(frame)
 
+    async def serve(self, reader: asyncio.StreamReader) -> None:
+        """Read requests until end of input, then wait for in-flight ones."""
+        writer = asyncio.create_task(self._writer())
+        while (body := await read_frame(reader)) is not None:
+            try:
+                message = json.loads(body)
+            except (ValueError, UnicodeDecodeError) as e:
+                logger.error("Failed to parse request: %s", e)
+                self.send(json_rpc_error(None, PARSE_ERROR, "Parse error"))
+                continue
+            self.dispatch(message)
+        logger.info("Input stream closed. Shutting down.")
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._outbox.put_nowait(None)
+        await writer
+
+    def dispatch(self, message: Any) -> None:
+        if isinstance(message, dict) and message.get("method") == "$/cancelRequest":
+            params = message.get("params")
+            request_id = params.get("id") if isinstance(params, dict) else None
+            # Malformed cancellations are ignored, like unknown ids.
+            if isinstance(request_id, (str, int)):
+                self.cancel(request_id)
+            return
+        sampled = sample()
+        if sampled:
+            log_body(logger, "Received request", message)
+        request_id = message.get("id") if isinstance(message, dict) else None
+        metrics = self.metrics
+        if metrics is not None:
+            metrics.IN_FLIGHT.inc()
+        task = asyncio.create_task(self._respond(message, sampled, metrics, perf_counter_ns()))
+        self._tasks.add(task)
+        task.add_done_callback(lambda t: self._finished(t, request_id, metrics))
+        if isinstance(request_id, (str, int)):
+            self._in_flight[request_id] = task
+
+    async def _respond(self, message: Any, sampled: bool, metrics: Any = None, start: int = 0) -> None:
         try:
-            result = func_meta["handler"](**arguments)
-            # The result for a tool call must be wrapped correctly.
-            response_content = {"content": [{"type": "text", "text": str(result)}]}
-            send_response(create_json_rpc_response(request_id, response_content))
-        except CalcError as e:
-            send_response(create_json_rpc_error(request_id, -32000, f"Calculation Error: {e}"))
-        except Exception as e:
-            logger.error(f"Error during tool call: {e}", exc_info=True)
-            send_response(create_json_rpc_error(request_id, -32000, f"Server Error: {e}"))
+            reply = await self.dispatcher.handle_payload(message)
+        except Exception:
+            # Answer anyway, or the client would wait for this id forever.
+            logger.exception("Error while handling request")
+            if not (isinstance(message, dict) and message.get("id") is None):  # notifications get no reply
+                request_id = message.get("id") if isinstance(message, dict) else None
+                self.send(json_rpc_error(request_id, INTERNAL_ERROR, "Internal error"))
+        else:
+            if reply.body is not None:
+                self.send(reply.body, sampled)
+        if metrics is not None:
+            metrics.TOTAL.observe_ns(perf_counter_ns() - start)
 
-    else:
-        send_response(create_json_rpc_error(request_id, -32601, "Method not found"))
+    def _finished(self, task: asyncio.Task, request_id: Any, metrics: Any = None) -> None:
+        if metrics is not None:
+            metrics.IN_FLIGHT.dec()
+        self._tasks.discard(task)
+        if self._in_flight.get(request_id) is task:
+            del self._in_flight[request_id]
+        if task.cancelled():
+            self.send(json_rpc_error(request_id, REQUEST_CANCELLED, "Request cancelled"))
 
+    def cancel(self, request_id: Any) -> None:
+        """Cancel an in-flight request; unknown or finished ids are ignored.
 
-def main():
-    """Main loop to read from stdin, process requests, and write to stdout."""
+        The awaiting task is cancelled and answered immediately; a calculation
+        already running in a worker finishes in the background.
+        """
+        task = self._in_flight.get(request_id)
+        if task is not None:
+            logger.info("Cancelling request %r", request_id)
+            task.cancel()
+
+
+async def serve_stdio() -> None:
+    reader = await _open_reader(sys.stdin.buffer)
+    await StdioServer(sys.stdout.buffer).serve(reader)
+
+
+def main_blocking():
+    """Previous sequential loop: each request is handled to completion before the next is read."""
     logger.info("stdio_server.py is running and waiting for requests...")
     while True:
         line = sys.stdin.readline()
@@ -126,12 +259,25 @@ def main():
                 sys.stdin.readline()
                 # Read the message body
                 message_body = sys.stdin.read(content_length)
-                logger.info(f"Received request: {message_body}")
+                log_body(logger, "Received request", message_body)
                 request_data = json.loads(message_body)
                 handle_request(request_data)
             except (ValueError, json.JSONDecodeError, IndexError) as e:
-                logger.error(f"Failed to parse request: {e}", exc_info=True)
-                send_response(create_json_rpc_error(None, -32700, "Parse error"))
+                logger.error("Failed to parse request: %s", e, exc_info=True)
+                send_response(json_rpc_error(None, PARSE_ERROR, "Parse error"))
+
+
+def main():
+    """Serve MCP over stdin/stdout until the input stream closes."""
+    if "--blocking" in sys.argv[1:]:
+        main_blocking()
+        return
+    logger.info("stdio_server.py is running and waiting for requests...")
+    try:
+        asyncio.run(serve_stdio())
+    finally:
+        if "calc_core.executor" in sys.modules:
+            sys.modules["calc_core.executor"].executor.shutdown(wait=False)
 
 
 if __name__ == "__main__":
@@ -140,4 +286,4 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         logger.info("Server shut down by user.")
     except Exception as e:
-        logger.critical(f"An unhandled exception occurred: {e}", exc_info=True)
+        logger.critical("An unhandled exception occurred: %s", e, exc_info=True)
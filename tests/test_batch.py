@@ -0,0 +1,79 @@
+"""Tests for one-expression/many-rows evaluation across library, REST and MCP."""
+from __future__ import annotations
+
+import json
+from decimal import Decimal
+
+import pytest
+
+from calc_core import CalcError, calculate_many
+from server.registry import registry
+
+
+def test_rows_and_columns_agree() -> None:
+    rows = [{"m": "2", "g": "9.8", "h": str(i)} for i in range(100)]
+    columns = {"m": ["2"] * 100, "g": ["9.8"] * 100, "h": [str(i) for i in range(100)]}
+    by_rows = calculate_many("m*g*h", rows)
+    assert by_rows == calculate_many("m*g*h", columns)
+    assert by_rows[10] == Decimal("196")
+
+
+def test_row_errors_do_not_stop_the_batch() -> None:
+    results = calculate_many("1/x", [{"x": "0"}, {"x": "4"}, {}, {"x": "abc"}])
+    assert isinstance(results[0], CalcError)
+    assert results[1] == Decimal("0.25")
+    assert isinstance(results[2], CalcError)
+    assert isinstance(results[3], CalcError)
+
+
+def test_batch_level_errors_raise() -> None:
+    with pytest.raises(CalcError):
+        calculate_many("(((2+3)", [{}])
+    with pytest.raises(CalcError):
+        calculate_many("x+y", {"x": [1, 2], "y": [1]})
+
+
+def test_mcp_tool() -> None:
+    handler = registry.get_function("calc.evaluate_many")["handler"]
+    out = json.loads(handler("x^2", rows=[{"x": 3}, {"x": "1e600"}]))
+    assert out[0] == {"result": "9"}
+    assert "error" in out[1]
+
+
+def test_rest_route() -> None:
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    client = TestClient(app)
+    res = client.post("/evaluate/batch", json={"expr": "a/b", "columns": {"a": [1, 1], "b": [4, 0]}})
+    assert res.status_code == 200
+    body = res.json()
+    assert body["results"][0]["result"] == "0.25"
+    assert body["results"][1]["error"] == "Division by zero"
+
+    res = client.post("/evaluate/batch", json={"expr": "a", "rows": [], "columns": {}})
+    assert res.status_code == 400
+
+    for variables in ({"x": "abc"}, {"x": {"y": 1}}, {"x": [1, "abc"]}, 5):
+        assert client.post("/evaluate", json={"expr": "x", "variables": variables}).status_code == 422
+
+
+@pytest.mark.parametrize("payload", [
+    {"rows": [{"x": "abc"}]},
+    {"rows": [5]},
+    {"rows": {"x": 1}},
+    {"rows": [{"x": [1]}]},
+    {"columns": {"x": 5}},
+    {"columns": {"x": ["1", "nope"]}},
+    {"columns": [1]},
+])
+def test_rest_route_rejects_malformed_variables(payload) -> None:
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    client = TestClient(app)
+    assert client.post("/evaluate/batch", json={"expr": "x", **payload}).status_code == 422
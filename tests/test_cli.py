@@ -0,0 +1,83 @@
+"""Tests for the bulk-evaluation command line (calculator_cli)."""
+from __future__ import annotations
+
+import io
+import json
+
+import pytest
+
+from calc_core import calculate
+from calculator_cli import evaluate_file, main
+
+
+def test_single_expression(capsys) -> None:
+    assert main(["3*(4+5)-sqrt(16)"]) == 0
+    assert capsys.readouterr().out == "23\n"
+    assert main(["1/0"]) == 1
+    assert "Division by zero" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("workers, chunk_bytes", [(1, 1 << 20), (2, 64)])
+def test_lines_keep_input_order(tmp_path, workers, chunk_bytes) -> None:
+    exprs = [f"{i}/{i % 5}" if i % 7 else "" for i in range(300)]
+    path = tmp_path / "exprs.txt"
+    path.write_text("\n".join(exprs) + "\n")
+    out = io.BytesIO()
+    stats = evaluate_file(str(path), out, workers=workers, chunk_bytes=chunk_bytes)
+    lines = out.getvalue().decode().split("\n")[:-1]
+    assert len(lines) == len(exprs)
+    for expr, line in zip(exprs, lines):
+        if not expr:
+            assert line == ""
+        elif expr.endswith("/0"):
+            assert line == "error: Division by zero"
+        else:
+            assert line == str(calculate(expr))
+    assert (stats.rows, stats.errors) == (len([e for e in exprs if e]), len([e for e in exprs if e.endswith("/0")]))
+    assert stats.chunks > 1 or chunk_bytes > 1000
+
+
+def test_csv_with_expr_and_expr_column(tmp_path) -> None:
+    path = tmp_path / "rows.csv"
+    path.write_text("x,y\n1,4\n3,0\n2\n5,2\n")
+    out = io.BytesIO()
+    evaluate_file(str(path), out, expr="x/y", workers=2, chunk_bytes=4)
+    assert out.getvalue().decode().splitlines() == [
+        "result,error", "0.25,", ",Division by zero", ',"Invalid row: expected 2 fields, got 1"', "2.5,",
+    ]
+
+    path.write_text('expr,x\nx^2,3\n"x+1, oops",1\n')
+    out = io.BytesIO()
+    evaluate_file(str(path), out)
+    first, second = out.getvalue().decode().splitlines()[1:]
+    assert first == "9,"
+    assert second.startswith(",")
+
+
+def test_ndjson(tmp_path) -> None:
+    path = tmp_path / "reqs.ndjson"
+    path.write_text("\n".join([
+        json.dumps({"expr": "pi", "precision": 10}),
+        json.dumps({"expr": "a*b", "variables": {"a": 2, "b": "0.5"}}),
+        "[1, 2]",
+        json.dumps({"expr": "sqrt(-1)"}),
+    ]))
+    out = io.BytesIO()
+    stats = evaluate_file(str(path), out)
+    assert [json.loads(line) for line in out.getvalue().decode().splitlines()] == [
+        {"result": "3.141592654"},
+        {"result": "1"},
+        {"error": "Invalid row: expected a JSON object"},
+        {"error": "DomainError: sqrt"},
+    ]
+    assert (stats.rows, stats.errors) == (4, 2)
+
+
+def test_output_file_and_stats(tmp_path, capsys) -> None:
+    path = tmp_path / "in.txt"
+    path.write_text("1+1\n2*3\n")
+    target = tmp_path / "out.txt"
+    assert main(["-i", str(path), "-o", str(target), "-w", "1"]) == 0
+    assert target.read_text() == "2\n6\n"
+    assert "2 rows (0 errors)" in capsys.readouterr().err
+    assert main(["-i", str(tmp_path / "missing.txt"), "-q"]) == 1
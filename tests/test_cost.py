@@ -0,0 +1,65 @@
+"""Tests for the static cost estimator and evaluation budgets."""
+from __future__ import annotations
+
+from decimal import Decimal
+
+import pytest
+
+from calc_core import BudgetExceeded, CalcError, calculate, calculate_many, compile_expression, cost
+from calc_core.compiler import compile_expression as compile_uncached
+
+
+def test_structure_is_measured_on_optimized_tree() -> None:
+    measured = compile_uncached("sin(x)^2 + sin(x)^2").cost
+    # x, sin(x), 2, sin(x)^2, sum: the repeated square is counted once.
+    assert (measured.nodes, measured.depth) == (5, 4)
+
+
+def test_work_grows_with_precision() -> None:
+    measured = compile_uncached("exp(x) * log(y)").cost
+    assert measured.work(3000) > 100 * measured.work(34)
+
+
+def test_static_trig_magnitude() -> None:
+    assert compile_uncached("sin(10^900)").cost.trig_log10 == pytest.approx((900,))
+    assert compile_uncached("sin(3*pi)").cost.trig_log10 == pytest.approx((0.974,), abs=0.001)
+    assert compile_uncached("cos(x)").cost.trig_log10 == ()
+
+
+def test_uncached_pi_is_charged() -> None:
+    cold = cost.reduction_work(34, 10 ** 7)
+    assert cold > 100 * cost.reduction_work(34, 100)
+    assert cold > cost.MAX_WORK
+
+
+def test_over_budget_work_is_rejected(monkeypatch) -> None:
+    monkeypatch.setattr(cost, "MAX_WORK", 10_000)
+    assert calculate("x^y", x=2, y="0.5") == Decimal("1.414213562373095048801688724209698")
+    with pytest.raises(BudgetExceeded, match="^BudgetExceeded: estimated work"):
+        calculate("x^y", x=2, y="0.5", precision=2000)
+    with pytest.raises(BudgetExceeded):
+        calculate_many("x^y", {"x": [2], "y": [3]}, precision=2000)
+
+
+def test_large_trig_arguments(monkeypatch) -> None:
+    monkeypatch.setattr(cost, "MAX_WORK", 10_000)
+    with pytest.raises(BudgetExceeded):
+        calculate("sin(1e20000)")
+    # Variable magnitudes are only known at run time; the guard is per row.
+    results = calculate_many("sin(x)", [{"x": "1e20000"}, {"x": "1e3"}])
+    assert isinstance(results[0], BudgetExceeded)
+    assert results[1] == calculate("sin(1e3)")
+
+
+def test_structure_limits(monkeypatch) -> None:
+    monkeypatch.setattr(cost, "MAX_NODES", 50)
+    with pytest.raises(BudgetExceeded, match="nodes"):
+        compile_expression("+".join(f"x{i}" for i in range(40)))
+    monkeypatch.setattr(cost, "MAX_NODES", 10_000)
+    monkeypatch.setattr(cost, "MAX_DEPTH", 10)
+    with pytest.raises(BudgetExceeded, match="levels deep"):
+        compile_expression("(" * 12 + "x" + "+1)" * 12)
+
+
+def test_budget_error_is_a_calc_error() -> None:
+    assert issubclass(BudgetExceeded, CalcError)
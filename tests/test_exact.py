@@ -0,0 +1,143 @@
+"""Tests for the exact integer tier (calc_core.exact)."""
+from __future__ import annotations
+
+import random
+from decimal import Decimal, localcontext
+
+import pytest
+
+from calc_core import CalcError, _evaluate, _quantize, calculate, compile_expression
+from calc_core.compiler import CompiledExpression, parse
+from calc_core.exact import evaluate_exact
+from calc_core.transformer import _coerce_variables
+from test_yaml_cases import _collect_cases
+
+
+def _decimal_only(expr: str, variables, prec: int):
+    """What the Decimal closures alone return (or raise) at *prec*."""
+    with localcontext() as ctx:
+        ctx.prec = prec
+        try:
+            return str(_quantize(CompiledExpression(expr, parse(expr)).evaluate(_coerce_variables(variables))))
+        except Exception as exc:  # noqa: BLE001 - compare error text too
+            return str(exc)
+
+
+def _with_exact(expr: str, variables, prec: int):
+    with localcontext() as ctx:
+        ctx.prec = prec
+        try:
+            return str(_evaluate(compile_expression(expr), variables))
+        except Exception as exc:  # noqa: BLE001
+            return str(exc)
+
+
+def _as_ints(variables):
+    """Integral values as native ints, so the cases can take the exact tier."""
+    out = {}
+    for name, value in variables.items():
+        try:
+            d = Decimal(str(value))
+            out[name] = int(d) if d.is_finite() and d == d.to_integral_value() else value
+        except Exception:  # noqa: BLE001 - invalid values stay as they are
+            out[name] = value
+    return out
+
+
+@pytest.mark.parametrize("expr, expected, expect_error, vars_dict", _collect_cases())
+def test_yaml_cases_match_decimal(expr, expected, expect_error, vars_dict) -> None:
+    try:
+        compile_expression(expr)
+    except CalcError:
+        return
+    variables = _as_ints(vars_dict)
+    for prec in (34, 5):
+        assert _with_exact(expr, variables, prec) == _decimal_only(expr, variables, prec)
+
+
+@pytest.mark.parametrize(
+    "expr, variables, prec",
+    [
+        ("0*(0-3)", {}, 34),  # -0
+        ("x*(0-2)", {"x": 0}, 34),
+        ("x*0", {"x": -4}, 34),
+        ("0-x*y", {"x": 0, "y": -1}, 34),
+        ("x/(0-5)", {"x": 0}, 34),
+        ("-x", {"x": 0}, 34),
+        ("99999+x", {"x": 1}, 5),  # rounded by Decimal
+        ("(x+1)-x", {"x": 10 ** 34 - 1}, 34),
+        ("x^3", {"x": 10 ** 12}, 34),
+        ("x^y", {"x": 2, "y": 200}, 34),
+        ("x^y", {"x": 0, "y": 0}, 34),
+        ("x^y", {"x": 2, "y": -2}, 34),
+        ("x^y", {"x": -1, "y": 10 ** 30}, 34),
+        ("x/y", {"x": 7, "y": 2}, 34),
+        ("x/y", {"x": 7, "y": 0}, 34),
+        ("abs(x-y)*1000", {"x": 3, "y": 10}, 34),
+        ("x+z", {"x": 1}, 34),
+        ("x+1", {"x": 10 ** 40}, 34),
+        ("x+1", {"x": 10 ** 5000}, 34),
+        ("x*2^10", {"x": 3}, 2),
+    ],
+)
+def test_edge_cases_match_decimal(expr, variables, prec) -> None:
+    assert _with_exact(expr, variables, prec) == _decimal_only(expr, variables, prec)
+
+
+def test_random_expressions_match_decimal() -> None:
+    rng = random.Random(19)
+    leaves = ["x", "y", "0", "1", "2", "3", "7", "10", "(0-3)", "123456789012345", "99999999999999999999"]
+
+    def gen(depth: int) -> str:
+        if depth == 0 or rng.random() < 0.3:
+            return rng.choice(leaves)
+        op = rng.choice("+-*/^na")
+        if op == "n":
+            return f"-({gen(depth - 1)})"
+        if op == "a":
+            return f"abs({gen(depth - 1)})"
+        if op == "^":
+            return f"({gen(depth - 1)})^{rng.choice(['2', '3', '0', 'y', '40'])}"
+        return f"({gen(depth - 1)}){op}({gen(depth - 1)})"
+
+    for _ in range(1500):
+        expr = gen(4)
+        variables = {"x": rng.choice([0, 1, -1, 2, -3, 12, 10 ** 30]), "y": rng.choice([0, 1, 2, -2, 3, 5])}
+        prec = rng.choice([1, 3, 34, 50])
+        assert _with_exact(expr, variables, prec) == _decimal_only(expr, variables, prec), (expr, variables, prec)
+
+
+def test_which_calls_take_the_exact_tier() -> None:
+    poly = compile_expression("x^3 + 2*x^2 - 5*x + 7")
+    assert evaluate_exact(poly, {"x": 12}) == calculate("x^3 + 2*x^2 - 5*x + 7", x="12")
+    assert evaluate_exact(poly, {"x": "12"}) is None  # only native ints
+    assert evaluate_exact(poly, {"x": Decimal(12)}) is None
+    assert evaluate_exact(poly, {"x": True}) is None
+    assert evaluate_exact(compile_expression("x/2"), {"x": 3}) is None
+    assert str(evaluate_exact(compile_expression("2^10*100"), {})) == "1.024E+5"
+    for expr in ("pi*x", "sqrt(x)", "x*1.5", "log(x, 2)"):
+        compiled = compile_expression(expr)
+        assert evaluate_exact(compiled, {"x": 4}) is None
+        assert compiled.exact is None  # never tried again
+    # Too many digits at this precision, fine at another.
+    big = compile_expression("10^40+x")
+    assert evaluate_exact(big, {"x": 1}) is None and big.exact is not None
+    with localcontext() as ctx:
+        ctx.prec = 50
+        assert evaluate_exact(big, {"x": 1}) == Decimal(10) ** 40 + 1
+
+
+def test_gives_up_on_expressions_that_keep_missing() -> None:
+    compiled = compile_expression("x/y + 0*x")
+    for x in range(300):
+        assert _evaluate(compiled, {"x": x, "y": 7}) == calculate("x/y", x=x, y=7)
+    assert compiled.exact[34] is None
+
+
+def test_errors_unchanged() -> None:
+    with pytest.raises(CalcError, match="Division by zero"):
+        calculate("x/y", x=1, y=0)
+    with pytest.raises(CalcError, match="Unknown identifier 'z'"):
+        calculate("x+z", x=1)
+    with pytest.raises(CalcError, match="Invalid variable value"):
+        calculate("2+2", x="abc")
@@ -0,0 +1,94 @@
+"""Tests for the calculation worker pool used by the async servers."""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from decimal import Decimal, getcontext
+
+import pytest
+
+from calc_core import PRECISION, calculate
+from calc_core.executor import CalcExecutor
+
+
+def _worker_precision() -> int:
+    return getcontext().prec
+
+
+def test_worker_threads_use_library_precision() -> None:
+    pool = CalcExecutor("thread", 2)
+    try:
+        assert asyncio.run(pool.run(_worker_precision)) == PRECISION
+        value = asyncio.run(pool.run(calculate, "1/3"))
+        assert len(value.as_tuple().digits) == PRECISION
+    finally:
+        pool.shutdown()
+
+
+def test_process_pool() -> None:
+    pool = CalcExecutor("process", 1)
+    try:
+        assert asyncio.run(pool.run(calculate, "x/4", x=1)) == Decimal("0.25")
+        assert asyncio.run(pool.run(_worker_precision)) == PRECISION
+    finally:
+        pool.shutdown()
+
+
+def test_slow_job_does_not_block_event_loop() -> None:
+    pool = CalcExecutor("thread", 1)
+    release = threading.Event()
+
+    async def main() -> float:
+        slow = asyncio.ensure_future(pool.run(release.wait, 5))
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)  # would not resume until release if run inline
+        elapsed = time.perf_counter() - started
+        release.set()
+        await slow
+        return elapsed
+
+    try:
+        assert asyncio.run(main()) < 1
+    finally:
+        pool.shutdown()
+
+
+def test_gauges() -> None:
+    pool = CalcExecutor("thread", 1)
+    release = threading.Event()
+
+    async def main():
+        jobs = [asyncio.ensure_future(pool.run(release.wait, 5)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        during = pool.stats()
+        release.set()
+        await asyncio.gather(*jobs)
+        return during, pool.stats()
+
+    try:
+        during, after = asyncio.run(main())
+    finally:
+        pool.shutdown()
+    assert (during.in_flight, during.queued) == (1, 2)
+    assert (after.in_flight, after.queued, after.completed) == (0, 0, 3)
+
+
+def test_invalid_configuration() -> None:
+    with pytest.raises(ValueError):
+        CalcExecutor("fiber", 1)
+    with pytest.raises(ValueError):
+        CalcExecutor("thread", -1)
+    assert CalcExecutor("thread", 0).workers >= 4
+
+
+def test_rest_reports_gauges() -> None:
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    client = TestClient(app)
+    assert client.post("/evaluate", json={"expr": "2/8"}).json()["result"] == "0.25"
+    gauges = client.get("/healthz").json()["executor"]
+    assert gauges["completed"] >= 1 and gauges["in_flight"] == 0
@@ -0,0 +1,65 @@
+"""Tests for the compiled-expression LRU cache."""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import pytest
+
+from calc_core import CalcError, ExpressionCache, calculate, compile_expression
+
+
+def test_hit_reuses_compiled_expression() -> None:
+    cache = ExpressionCache(maxsize=4)
+    first = cache.get("rate * principal * time / 100")
+    second = cache.get("rate * principal * time / 100")
+    assert first is second
+    info = cache.info()
+    assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+    assert first.names == {"rate", "principal", "time"}
+
+
+def test_lru_eviction_order() -> None:
+    cache = ExpressionCache(maxsize=2)
+    cache.get("1+1")
+    cache.get("2+2")
+    cache.get("1+1")  # refresh: "2+2" is now least recently used
+    cache.get("3+3")
+    assert "1+1" in cache and "3+3" in cache and "2+2" not in cache
+    assert cache.info().evictions == 1
+
+    cache.resize(1)
+    assert len(cache) == 1 and cache.info().evictions == 2
+
+
+def test_warm_and_clear() -> None:
+    cache = ExpressionCache(maxsize=8)
+    assert cache.warm(["m*g*h", "(((2+3)", "sin(x)"]) == 2
+    assert len(cache) == 2
+    cache.clear()
+    assert len(cache) == 0 and cache.info().misses == 0
+
+
+def test_syntax_errors_are_not_cached() -> None:
+    cache = ExpressionCache(maxsize=8)
+    with pytest.raises(Exception):
+        cache.get("1 +")
+    assert len(cache) == 0
+    with pytest.raises(CalcError):
+        compile_expression("1 +")
+
+
+def test_same_expression_different_variables() -> None:
+    results = [calculate("x * 2", x=str(i)) for i in range(5)]
+    assert results == [Decimal(i * 2) for i in range(5)]
+
+
+def test_concurrent_access() -> None:
+    cache = ExpressionCache(maxsize=16)
+    exprs = [f"x + {i % 32}" for i in range(2000)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        compiled = list(pool.map(cache.get, exprs))
+    assert all(c.evaluate({"x": Decimal(1)}) == 1 + int(e.split("+")[1]) for c, e in zip(compiled, exprs))
+    info = cache.info()
+    assert info.currsize <= 16
+    assert info.hits + info.misses == len(exprs)
@@ -0,0 +1,87 @@
+"""Tests for the high-precision functions and constants (calc_core.fixedpoint)."""
+from __future__ import annotations
+
+import random
+from decimal import Decimal, localcontext
+
+import pytest
+
+from calc_core import calculate, compile_expression, constants, cost, fixedpoint
+
+
+def _machin_pi(digits: int) -> Decimal:
+    """pi by Machin's formula on scaled ints: independent of the Chudnovsky series."""
+    scale = 10 ** (digits + 10)
+
+    def atan_inv(n: int) -> int:
+        total, term, k, sign = 0, scale // n, 1, 1
+        while term:
+            total += sign * (term // k)
+            term //= n * n
+            k += 2
+            sign = -sign
+        return total
+
+    return Decimal(4 * (4 * atan_inv(5) - atan_inv(239))).scaleb(-(digits + 10))
+
+
+def _arguments(rng: random.Random) -> list:
+    values = ["1.5", "2", "0.5", "1.0000001", "0.9999999999", "7e-30", "3e40", "123456.789"]
+    return [Decimal(v) * rng.randint(1, 10 ** 6) / rng.randint(1, 10 ** 6) for v in values]
+
+
+@pytest.mark.parametrize("prec", [fixedpoint.LN_DIGITS, 150, 400, 1200])
+def test_ln_and_sqrt_match_libmpdec(prec) -> None:
+    rng = random.Random(prec)
+    with localcontext() as ctx:
+        ctx.prec = prec
+        for x in _arguments(rng):
+            assert fixedpoint.ln(x) == x.ln(), x
+            assert fixedpoint.sqrt(x) == x.sqrt(), x
+        assert fixedpoint.sqrt(Decimal("2.25")) == Decimal("1.5")  # exact roots stay exact
+        assert fixedpoint.sqrt(Decimal(10) ** 400) == Decimal(10) ** 200
+
+
+@pytest.mark.parametrize("prec", [fixedpoint.EXP_DIGITS, 700])
+def test_exp_matches_libmpdec(prec) -> None:
+    rng = random.Random(prec)
+    with localcontext() as ctx:
+        ctx.prec = prec
+        for _ in range(12):
+            x = Decimal(rng.uniform(-3, 3)) if rng.random() < 0.5 else Decimal(rng.uniform(-2000, 2000)).quantize(Decimal("1e-20"))
+            assert fixedpoint.exp(x) == x.exp(), x
+        for x in (Decimal("1e-50"), Decimal("-1e-50"), Decimal("9999.5"), Decimal("-12000")):
+            assert fixedpoint.exp(x) == x.exp(), x
+
+
+def test_power_matches_libmpdec() -> None:
+    rng = random.Random(20)
+    with localcontext() as ctx:
+        ctx.prec = 500
+        for x in _arguments(rng):
+            for y in ("0.5", "-2.25", "12.7", "3e-20"):
+                assert fixedpoint.power(x, Decimal(y)) == x ** Decimal(y), (x, y)
+        assert fixedpoint.power(Decimal(4), Decimal("1.5")) == 8  # exact: left to libmpdec
+    assert calculate("x^y", x=2, y="0.5", precision=500) == calculate("sqrt(2)", precision=500)
+
+
+def test_constants_are_correctly_rounded() -> None:
+    with localcontext() as ctx:
+        ctx.prec = 1000
+        assert constants.e(1000) == Decimal(1).exp()
+        assert constants.ln2(1000) == Decimal(2).ln()
+        assert constants.ln10(1000) == Decimal(10).ln()
+        assert constants.pi(1000) == +_machin_pi(1000)
+    assert str(constants.pi(40)) == "3.141592653589793238462643383279502884197"
+
+
+def test_ten_thousand_digits() -> None:
+    root = calculate("sqrt(2)", precision=10_000)
+    assert len(root.as_tuple().digits) == 10_000
+    with localcontext() as ctx:
+        ctx.prec = 10_000
+        assert abs(root * root - 2) < Decimal("1e-9999")
+    with localcontext() as ctx:
+        ctx.prec = 10_000
+        assert calculate("pi", precision=10_000) == (+_machin_pi(10_000)).normalize()
+    assert compile_expression("exp(x) * log(y) + sin(z)").cost.work(10_000) < cost.MAX_WORK
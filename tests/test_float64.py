@@ -0,0 +1,68 @@
+"""Tests for the opt-in NumPy float64 evaluation tier."""
+from __future__ import annotations
+
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from calc_core import CalcError, calculate, calculate_many, compile_expression  # noqa: E402
+from calc_core.vectorized import evaluate_float64  # noqa: E402
+from test_yaml_cases import _collect_cases  # noqa: E402
+
+# Cases whose Decimal result depends on more than float64 can represent:
+# sub-1e-308 magnitudes flush to 0.0 and the compound-interest limit loses digits.
+_FLOAT64_LIMITED = {"1e-1000", "1e-9999", "1/10^100000", "sqrt(1e-1000000)", "(1+1/10^10)^10^10"}
+
+
+@pytest.mark.parametrize("expr, expected, expect_error, vars_dict", _collect_cases())
+def test_matches_decimal_tier(expr: str, expected: str | None, expect_error: bool, vars_dict: dict) -> None:
+    if expr in _FLOAT64_LIMITED:
+        pytest.skip("outside float64 range/precision")
+    try:
+        reference = calculate(expr, **vars_dict)
+    except CalcError:
+        with pytest.raises(CalcError):
+            calculate(expr, precision="float64", **vars_dict)
+        return
+    value = calculate(expr, precision="float64", **vars_dict)
+    assert math.isclose(float(reference), value, rel_tol=1e-9, abs_tol=1e-12)
+
+
+def test_per_element_errors() -> None:
+    results = calculate_many(
+        "sqrt(x) / (y - 1)",
+        {"x": [4, -4, 9, 16], "y": [3, 3, 1, "abc"]},
+        precision="float64",
+    )
+    assert results[0] == 1.0
+    assert str(results[1]) == "DomainError: sqrt"
+    assert str(results[2]) == "Division by zero"
+    assert str(results[3]).startswith("Invalid variable value")
+
+
+def test_rows_with_missing_variables() -> None:
+    results = calculate_many("a + b", [{"a": 1, "b": 2}, {"a": 1}], precision="float64")
+    assert results[0] == 3.0
+    assert str(results[1]) == "Unknown identifier 'b'"
+
+
+def test_overflow_and_indeterminate() -> None:
+    res = evaluate_float64(compile_expression("x ^ y"), {"x": [10, 0, 2], "y": [400, 0, 10]})
+    assert res.error_at(0) == "Overflow"
+    assert res.error_at(1) == "Indeterminate: 0^0"
+    assert res.error_at(2) is None and res.values[2] == 1024.0
+
+
+def test_large_columns_are_vectorized() -> None:
+    n = 200_000
+    x = np.linspace(0, 10, n)
+    res = evaluate_float64(compile_expression("sin(x)^2 + cos(x)^2 + log(8, 2)"), {"x": x})
+    assert not res.errors.any()
+    assert np.allclose(res.values, 4.0)
+
+
+def test_rejects_unknown_precision() -> None:
+    with pytest.raises(CalcError):
+        calculate("1+1", precision="float32")
@@ -0,0 +1,96 @@
+"""Tests for JSON-RPC dispatch, including batch arrays, on both MCP transports."""
+from __future__ import annotations
+
+import asyncio
+import json
+from decimal import Decimal
+
+import pytest
+
+from server.jsonrpc import Dispatcher
+
+
+def _call(request_id, expr, **arguments):
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "method": "tools/call",
+        "params": {"name": "calc.evaluate", "arguments": {"expr": expr, **arguments}},
+    }
+
+
+def _text(response):
+    return response["result"]["content"][0]["text"]
+
+
+DISPATCHER = Dispatcher(server_info={"name": "test", "version": "0"}, capabilities={})
+
+
+def test_batch_answers_in_request_order_without_notifications() -> None:
+    batch = [
+        _call(3, "x^2", variables={"x": 3}),
+        {"jsonrpc": "2.0", "method": "notifications/initialized"},
+        _call("a", "1/0"),
+        _call(1, "x^2", variables={"x": 4}),
+        {"jsonrpc": "2.0", "id": 2, "method": "no/such/method"},
+    ]
+    reply = asyncio.run(DISPATCHER.handle_payload(batch))
+    assert reply.status == 200
+    assert [r["id"] for r in reply.body] == [3, "a", 1, 2]
+    assert _text(reply.body[0]) == "9" and _text(reply.body[2]) == "16"
+    assert "Division by zero" in reply.body[1]["error"]["message"]
+    assert reply.body[3]["error"]["code"] == -32601
+
+
+def test_invalid_batches() -> None:
+    reply = asyncio.run(DISPATCHER.handle_payload([]))
+    assert reply.body["error"]["code"] == -32600
+    reply = asyncio.run(DISPATCHER.handle_payload([1, _call(7, "2+2")]))
+    assert reply.body[0] == {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "Invalid Request"}}
+    assert _text(reply.body[1]) == "4"
+    only_notifications = [{"jsonrpc": "2.0", "method": "notifications/initialized"}]
+    assert asyncio.run(DISPATCHER.handle_payload(only_notifications)).body is None
+
+
+def test_non_object_params_are_invalid() -> None:
+    batch = [
+        {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": [1]},
+        {"jsonrpc": "2.0", "id": 2, "method": "tools/call", "params": {"name": "calc.evaluate", "arguments": [1]}},
+        {"jsonrpc": "2.0", "id": 3, "method": "tools/call", "params": {"name": ["calc.evaluate"]}},
+        _call(4, "2+2"),
+    ]
+    reply = asyncio.run(DISPATCHER.handle_payload(batch))
+    assert [r.get("error", {}).get("code") for r in reply.body] == [-32602, -32602, -32602, None]
+    assert [r["id"] for r in reply.body] == [1, 2, 3, 4]
+    assert _text(reply.body[3]) == "4"
+
+
+def test_http_batch() -> None:
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from server.main import app
+
+    client = TestClient(app)
+    res = client.post("/", json=[_call(i, f"{i}*2") for i in range(12)])
+    assert res.status_code == 200
+    assert [Decimal(_text(r)) for r in res.json()] == [i * 2 for i in range(12)]
+
+    res = client.post("/", json=[{"jsonrpc": "2.0", "method": "notifications/initialized"}])
+    assert res.status_code == 204 and res.content == b""
+
+    # Single requests keep their status codes.
+    assert client.post("/", json=_call(1, "(((")).status_code == 400
+
+    res = client.post("/", json=[{"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": [1]}, _call(2, "3*3")])
+    assert res.status_code == 200
+    assert res.json()[0]["error"]["code"] == -32602 and _text(res.json()[1]) == "9"
+
+
+def test_stdio_batch(capsys) -> None:
+    import stdio_server
+
+    stdio_server.handle_request([_call(1, "sqrt(16)"), _call(2, "pi*0")])
+    header, body = capsys.readouterr().out.split("\r\n\r\n")
+    assert header == f"Content-Length: {len(body.encode())}"
+    assert [_text(r) for r in json.loads(body)] == ["4", "0"]
@@ -0,0 +1,127 @@
+"""Tests for list values (calc_core.lists): literals, broadcasting and reductions."""
+from __future__ import annotations
+
+import json
+import random
+import statistics
+from decimal import Decimal, localcontext
+from fractions import Fraction
+
+import pytest
+
+from calc_core import BudgetExceeded, CalcError, Vector, calculate, calculate_cached, calculate_many, pratt
+from calc_core.compiler import parse_lark
+from calc_core.cost import estimate
+from calc_core.sessions import SessionStore
+from server.registry import registry
+from test_pratt import _outcome, _parse
+
+
+@pytest.mark.parametrize("expr", [
+    "[1, 2, 3]", "[x]", "[-1, +2]", "-[1, 2]^2", "sum([1, 2], 3)", "[1, 2] * [3, 4]", "[1, [2]]",
+    "[]", "[1,]", "[1", "1]", "[1)", "(1]", "sin[1]", "[1][2]", "2[1]", "mean([sqrt(2), x])",
+])
+def test_parsers_agree(expr) -> None:
+    assert _parse(pratt.parse, expr) == _parse(parse_lark, expr)
+    assert _outcome(pratt.parse, expr, {"x": Decimal(3)}) == _outcome(parse_lark, expr, {"x": Decimal(3)})
+
+
+def test_random_token_strings_agree() -> None:
+    rng = random.Random(4321)
+    alphabet = ["1", "x", "sum", "(", ")", "[", "]", ",", "-", "*", " "]
+    for _ in range(3000):
+        expr = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 10)))
+        assert _parse(pratt.parse, expr) == _parse(parse_lark, expr), expr
+
+
+def test_broadcasting() -> None:
+    assert calculate("[1, 2, 3] * 2 + 1") == Vector([3, 5, 7])
+    assert str(calculate("[1, 2] / 3", precision=5)) == "[0.33333, 0.66667]"
+    assert calculate("v - [1, 1]", v=[3, "2.5"]) == Vector([2, Decimal("1.5")])
+    assert calculate("2 ^ [0, 10]") == Vector([1, 1024])
+    assert calculate("sqrt([4, 9]) + log([100, 1000], 10)") == Vector([4, 6])
+    assert calculate("-v", v=(1, -2)) == Vector([-1, 2])
+    with pytest.raises(CalcError, match="List lengths differ: 2 and 3"):
+        calculate("[1, 2] + [1, 2, 3]")
+    with pytest.raises(CalcError, match="Lists cannot be nested"):
+        calculate("[1, [2]]")
+    with pytest.raises(CalcError, match="Lists cannot be nested"):
+        calculate("[1, v]", v=[2])
+    with pytest.raises(CalcError, match="Division by zero"):
+        calculate("[1, 2] / [1, 0]")
+    with pytest.raises(CalcError, match="Invalid variable value"):
+        calculate("v", v=[1, [2]])
+
+
+def test_reductions() -> None:
+    assert calculate("sum([1, 2, 3])") == 6
+    assert calculate("sum(v, 4)", v=[1, 2]) == 7
+    assert calculate("mean([98.5, 88, 76.5])") == Decimal("87.66666666666666666666666666666667")
+    assert calculate("prod([2, 3, 4]) + min([3, -1]) + max(v)", v=[5, 7]) == 30
+    assert calculate("sum([1, 2] * 2) / mean([1, 3])") == 3
+    with pytest.raises(CalcError, match="stdev\\(\\) needs at least two values"):
+        calculate("stdev([1])")
+    with pytest.raises(CalcError, match="min\\(\\) of an empty list"):
+        calculate("min(v)", v=[])
+    assert calculate("sum(v)", v=[]) == 0 and calculate("prod(v)", v=[]) == 1
+
+
+def test_reductions_round_once() -> None:
+    tenths = ["0.1"] * 1000
+    assert calculate("sum(v)", v=tenths) == 100
+    # Naive left-to-right addition at 6 digits loses the small terms.
+    assert calculate("sum(v)", v=["1e5"] + ["0.4"] * 10, precision=6) == Decimal("100004")
+    rng = random.Random(7)
+    data = [Decimal(rng.randint(-10**6, 10**6)) / 1000 for _ in range(200)]
+    assert calculate("mean(v)", v=data, precision=50) == +_at(50, Fraction(sum(data)) / len(data))
+    for prec in (10, 34, 80):
+        with localcontext() as ctx:
+            ctx.prec = prec
+            expected = statistics.stdev(data).normalize()
+        assert calculate("stdev(v)", v=data, precision=prec) == expected
+    assert calculate("prod(v)", v=["1.1"] * 40, precision=5) == Decimal("45.259")
+
+
+def _at(prec: int, value: Fraction) -> Decimal:
+    with localcontext() as ctx:
+        ctx.prec = prec
+        return Decimal(value.numerator) / value.denominator
+
+
+def test_caching_and_batches() -> None:
+    assert calculate_cached("sum(v)", v=[1, 2]) == 3
+    assert calculate_cached("sum(v)", v=[1, 2, 3]) == 6
+    # Equal lists that print differently are cached apart.
+    assert str(calculate_cached("+v", v=["0", "-0"])) == "[0, -0]"
+    assert str(calculate_cached("+v", v=["-0", "0"])) == "[-0, 0]"
+    assert calculate_many("max(v) - min(v)", [{"v": [1, 5]}, {"v": []}])[0] == 4
+
+
+def test_sessions() -> None:
+    store = SessionStore()
+    sid = store.define("scores", "[98.5, 88, 76.5]")["session"]
+    assert store.define("avg", "mean(scores)", sid)["updated"]["avg"]["result"] == "87.66666666666666666666666666666667"
+    assert store.update(sid, "scores", "[90, 80]")["updated"]["avg"] == {"result": "85"}
+    with pytest.raises(CalcError, match="built-in name"):
+        store.define("sum", "1", sid)
+
+
+def test_float64_and_budget() -> None:
+    with pytest.raises(CalcError, match="not supported with precision 'float64'"):
+        calculate("sum([1, 2])", precision="float64")
+    with pytest.raises(CalcError, match="not supported with precision 'float64'"):
+        calculate("x", x=[1], precision="float64")
+    # Elementwise work is charged once per element.
+    assert estimate(parse_lark("exp([1, 2, 3])")).work(34) == 3 * estimate(parse_lark("exp(1)")).work(34)
+    calculate("exp(v)", v=[1] * 10, precision=1000)
+    with pytest.raises(BudgetExceeded, match="list elements"):
+        calculate("exp(v)", v=[1] * 100000, precision=1000)
+
+
+def test_mcp_tool() -> None:
+    handler = registry.get_function("calc.evaluate")["handler"]
+    assert handler("sum([0.1, 0.2]) - 0.3") == "0"
+    assert handler("v^2", variables={"v": [1, 2, 3]}) == "[1, 4, 9]"
+    assert json.loads(handler("stdev(v)", variables={"v": [2, 4, 4, 4, 5, 5, 7, 9]}, trace=True))["result"] == (
+        "2.138089935299395077476427847038028"  # sqrt(32/7)
+    )
@@ -0,0 +1,56 @@
+"""Tests for the queued, sampled MCP request logging."""
+from __future__ import annotations
+
+import io
+import json
+import logging
+
+import pytest
+
+from server import logs
+
+
+@pytest.fixture
+def stream():
+    out = io.StringIO()
+    yield out
+    logs.stop_logging()
+
+
+def _configure(stream, monkeypatch, **settings) -> None:
+    for name, value in settings.items():
+        monkeypatch.setattr(logs, name, value)
+    logs.configure_logging(stream=stream, fmt="%(levelname)s %(message)s")
+
+
+def test_body_is_formatted_by_the_writer(stream, monkeypatch) -> None:
+    _configure(stream, monkeypatch)
+    body = {"id": 1, "params": {"expr": "1+1"}}
+    logs.log_body(logging.getLogger("t"), "MCP-REQUEST-BODY", body)
+    # Mutating after the call would show up if serialization were eager.
+    body["id"] = 2
+    logs.stop_logging()
+    assert stream.getvalue() == 'INFO MCP-REQUEST-BODY: {"id": 2, "params": {"expr": "1+1"}}\n'
+
+
+def test_truncation(stream, monkeypatch) -> None:
+    _configure(stream, monkeypatch, BODY_MAX_CHARS=10)
+    logs.log_body(logging.getLogger("t"), "B", "x" * 30)
+    logs.stop_logging()
+    assert stream.getvalue() == 'INFO B: "xxxxxxxxx... (22 more chars)\n'
+
+
+def test_json_format(stream, monkeypatch) -> None:
+    _configure(stream, monkeypatch, LOG_FORMAT="json")
+    logging.getLogger("t").error("failed: %s", "boom")
+    logs.stop_logging()
+    entry = json.loads(stream.getvalue())
+    assert entry["level"] == "ERROR" and entry["logger"] == "t" and entry["msg"] == "failed: boom"
+
+
+def test_sampling(monkeypatch) -> None:
+    monkeypatch.setattr(logs, "BODY_SAMPLE_RATE", 0.0)
+    assert not any(logs.sample() for _ in range(100))
+    monkeypatch.setattr(logs, "BODY_SAMPLE_RATE", 0.25)
+    hits = sum(logs.sample() for _ in range(4000))
+    assert 700 < hits < 1300
@@ -0,0 +1,150 @@
+"""Tests for the metrics registry and its exposure on every transport."""
+from __future__ import annotations
+
+import asyncio
+import io
+import re
+
+import pytest
+
+from calc_core import BudgetExceeded, CalcError, calculate, metrics
+from calc_core.metrics import Counter, Gauge, Histogram, Registry, error_category
+
+
+def _value(text: str, sample: str) -> float:
+    """The value of *sample* (name with labels, as rendered) in *text*."""
+    match = re.search(rf"^{re.escape(sample)} (\S+)$", text, re.MULTILINE)
+    assert match, f"{sample} not in metrics"
+    return float(match.group(1))
+
+
+def test_render_format() -> None:
+    registry = Registry()
+    calls = registry.register(Counter("calls_total", "Calls.", "tool"))
+    busy = registry.register(Gauge("busy", "Busy."))
+    latency = registry.register(Histogram("latency_seconds", "Latency.", ("stage",), buckets=(0.001, 0.01)))
+    calls.inc('a "quoted"\ntool')
+    calls.inc("b")
+    calls.inc("b")
+    busy.inc()
+    stage = latency.labels("parse")
+    stage.observe_ns(1_000_000)  # on the bound: le is inclusive
+    stage.observe(0.005)
+    stage.observe(1.0)
+    registry.add_collector(lambda: [("extra", "gauge", "Extra.", [("", {}, 0.5)])])
+
+    assert registry.render() == (
+        "# HELP calls_total Calls.\n"
+        "# TYPE calls_total counter\n"
+        'calls_total{tool="a \\"quoted\\"\\ntool"} 1\n'
+        'calls_total{tool="b"} 2\n'
+        "# HELP busy Busy.\n"
+        "# TYPE busy gauge\n"
+        "busy 1\n"
+        "# HELP latency_seconds Latency.\n"
+        "# TYPE latency_seconds histogram\n"
+        'latency_seconds_bucket{stage="parse",le="0.001"} 1\n'
+        'latency_seconds_bucket{stage="parse",le="0.01"} 2\n'
+        'latency_seconds_bucket{stage="parse",le="+Inf"} 3\n'
+        'latency_seconds_sum{stage="parse"} 1.006\n'
+        'latency_seconds_count{stage="parse"} 3\n'
+        "# HELP extra Extra.\n"
+        "# TYPE extra gauge\n"
+        "extra 0.5\n"
+    )
+    with pytest.raises(ValueError):
+        registry.register(Gauge("busy", "Again."))
+
+
+@pytest.mark.parametrize("expr, category", [
+    ("2*)", "syntax"),
+    ("1/0", "division_by_zero"),
+    ("10^1000", "overflow"),
+    ("asin(2)", "domain"),
+    ("foo + 1", "unknown_name"),
+    ("nope(1)", "unknown_name"),
+    ("sin(1, 2)", "arity"),
+])
+def test_error_categories(expr, category) -> None:
+    with pytest.raises(CalcError) as info:
+        calculate(expr)
+    assert error_category(info.value) == category
+
+
+def test_error_categories_without_expression() -> None:
+    assert error_category(BudgetExceeded("Expression too expensive")) == "budget"
+    with pytest.raises(CalcError) as info:
+        calculate("1", precision=0)
+    assert error_category(info.value) == "invalid_precision"
+    assert error_category(CalcError("something new")) == "other"
+
+
+def test_core_records_parse_and_evaluate() -> None:
+    parses, evaluations = metrics.PARSE.count, metrics.EVALUATE.count
+    calculate("x*7+metrics_test", x=1, metrics_test=2)
+    calculate("x*7+metrics_test", x=3, metrics_test=2)  # compiled form is cached
+    assert metrics.PARSE.count == parses + 1
+    assert metrics.EVALUATE.count == evaluations + 2
+
+
+def test_rest_metrics_endpoint() -> None:
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    client = TestClient(app)
+    calls = metrics.TOOL_CALLS.value("calc.evaluate")
+    assert client.post("/evaluate", json={"expr": "2+2"}).json()["result"] == "4"
+    assert client.post("/evaluate", json={"expr": "1/0"}).status_code == 400
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    after = response.text
+    assert _value(after, 'calc_tool_calls_total{tool="calc.evaluate"}') == calls + 2
+    assert _value(after, 'calc_errors_total{category="division_by_zero"}') >= 1
+    assert _value(after, 'calc_stage_seconds_count{stage="total"}') >= 2
+    assert _value(after, 'calc_stage_seconds_count{stage="serialize"}') >= 1
+    assert _value(after, "calc_requests_in_flight") == 0
+    assert "calc_result_cache_hit_ratio" in after and "calc_executor_in_flight" in after
+
+
+def test_mcp_http_metrics() -> None:
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from server.main import app
+
+    client = TestClient(app)
+    call = {"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+            "params": {"name": "calc.evaluate", "arguments": {"expr": "sqrt(-1)"}}}
+    assert "error" in client.post("/", json=call).json()
+    text = client.get("/metrics").text
+    assert _value(text, 'calc_errors_total{category="domain"}') >= 1
+    assert _value(text, 'calc_tool_calls_total{tool="calc.evaluate"}') >= 1
+
+
+def test_metrics_method() -> None:
+    from server.jsonrpc import Dispatcher
+
+    dispatcher = Dispatcher(server_info={}, capabilities={})
+    reply = asyncio.run(dispatcher.handle({"jsonrpc": "2.0", "id": 7, "method": "metrics/get"}))
+    assert reply.body["result"]["contentType"] == metrics.CONTENT_TYPE
+    assert "# TYPE calc_stage_seconds histogram" in reply.body["result"]["text"]
+
+
+def test_stdio_server_records_requests() -> None:
+    from stdio_server import StdioServer, encode_frame
+
+    output = io.BytesIO()
+    total = metrics.TOTAL.count
+
+    async def main() -> None:
+        reader = asyncio.StreamReader()
+        server = StdioServer(output, preload=False)
+        reader.feed_data(encode_frame({"jsonrpc": "2.0", "id": 1, "method": "tools/list"}))
+        reader.feed_eof()
+        await server.serve(reader)
+
+    asyncio.run(main())
+    assert metrics.TOTAL.count == total + 1
+    assert metrics.IN_FLIGHT.value == 0
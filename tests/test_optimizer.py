@@ -0,0 +1,71 @@
+"""Tests for the constant-folding / common-subexpression optimizer."""
+from __future__ import annotations
+
+from decimal import Decimal, localcontext
+
+import pytest
+
+from calc_core import CalcError, calculate, compile_expression
+from calc_core.compiler import compile_node
+from calc_core.nodes import BinOp, Name, Pos
+from calc_core.optimizer import analyze, optimize
+from calc_core.transformer import _coerce_variables
+from test_yaml_cases import _collect_cases
+
+
+def _outcome(fn, env):
+    try:
+        return fn(env)
+    except Exception as exc:  # noqa: BLE001 - compare error text too
+        return type(exc), str(exc)
+
+
+@pytest.mark.parametrize("expr, expected, expect_error, vars_dict", _collect_cases())
+def test_matches_unoptimized(expr, expected, expect_error, vars_dict) -> None:
+    try:
+        compiled = compile_expression(expr)
+        env = _coerce_variables(vars_dict)
+    except CalcError:
+        return
+    reference = compile_node(compiled.tree)
+    for prec in (34, 12):  # folded values must not leak between precisions
+        with localcontext() as ctx:
+            ctx.prec = prec
+            assert _outcome(compiled.evaluate, env) == _outcome(reference, env)
+
+
+def test_identical_subtrees_are_shared() -> None:
+    tree = optimize(compile_expression("sin(x)^2 + sin(x)*y").tree)
+    assert tree.left.left is tree.right.left
+    refcounts = analyze(tree).refcounts
+    assert refcounts[id(tree.left.left)] == 2
+
+
+def test_identity_simplification() -> None:
+    assert optimize(compile_expression("(x*y)*1").tree) == BinOp("*", Name("x"), Name("y"))
+    assert optimize(compile_expression("x+0").tree) == Pos(Name("x"))
+    # A raw variable is not rounded yet, so x*1 must keep its multiplication.
+    assert isinstance(optimize(compile_expression("x*1").tree), BinOp)
+
+
+def test_shared_subexpression_evaluated_once(monkeypatch) -> None:
+    from calc_core import transformer
+
+    calls = []
+    real_sin = transformer._FUNCS["sin"]
+    monkeypatch.setitem(transformer._FUNCS, "sin", lambda x: calls.append(x) or real_sin(x))
+    compiled = compile_expression("sin(x)*sin(x) + sin(x)")
+    compiled.evaluate({"x": Decimal(1)})
+    assert len(calls) == 1
+
+
+def test_folded_errors_still_raise() -> None:
+    compiled = compile_expression("x + 1/0")
+    for _ in range(2):
+        with pytest.raises(CalcError, match="Division by zero"):
+            compiled.evaluate({"x": Decimal(1)})
+
+
+def test_folding_respects_precision() -> None:
+    assert str(calculate("x + 2/3", x=0, precision=5)) == "0.66667"
+    assert str(calculate("x + 2/3", x=0, precision=8)) == "0.66666667"
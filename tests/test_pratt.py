@@ -0,0 +1,94 @@
+"""Differential tests: the hand-written parser against the Lark grammar."""
+from __future__ import annotations
+
+import random
+from decimal import Decimal
+
+import pytest
+
+from calc_core import CalcError, pratt
+from calc_core.compiler import CompiledExpression, parse_lark
+from test_yaml_cases import _collect_cases
+
+
+def _parse(parser, expr):
+    """Return the tree, or "syntax" if *parser* rejects *expr*."""
+    try:
+        return parser(expr)
+    except Exception:  # noqa: BLE001 - Lark raises its own exception types
+        return "syntax"
+
+
+def _outcome(parser, expr, variables):
+    tree = _parse(parser, expr)
+    if tree == "syntax":
+        return tree
+    try:
+        return CompiledExpression(expr, tree).evaluate(variables)
+    except Exception as exc:  # noqa: BLE001 - calculate() wraps these in CalcError
+        return type(exc), str(exc)
+
+
+@pytest.mark.parametrize("expr, expected, expect_error, vars_dict", _collect_cases())
+def test_yaml_cases_agree(expr, expected, expect_error, vars_dict) -> None:
+    variables = {k: Decimal(str(v)) for k, v in vars_dict.items() if k != "dup"}
+    assert _parse(pratt.parse, expr) == _parse(parse_lark, expr)
+    assert _outcome(pratt.parse, expr, variables) == _outcome(parse_lark, expr, variables)
+
+
+@pytest.mark.parametrize("expr", [
+    "-2^2", "-2*3", "a - -b^c*d", "--x", "+-+x", "2^3^2", "2*-3", "2^-3", "2--3", "2 3",
+    "f()", "f(1,)", "f(1,2", "(1,2)", "sin (1)", "e(1)", "1e5", "1e", "1.", "2x", "",
+    "(", ")", "1)", "((1)", "log(8, 2)", "abs(-x)", "1\n+2", "1 ? 2", "_", "x__1+y2",
+])
+def test_edge_cases_agree(expr) -> None:
+    assert _parse(pratt.parse, expr) == _parse(parse_lark, expr)
+
+
+def test_random_token_strings_agree() -> None:
+    rng = random.Random(1234)
+    alphabet = ["1", "2.5", "3e2", "x", "sin", "log", "(", ")", ",", "+", "-", "*", "/", "^", " "]
+    for _ in range(4000):
+        expr = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 12)))
+        assert _parse(pratt.parse, expr) == _parse(parse_lark, expr), expr
+
+
+def _random_expr(rng: random.Random, depth: int = 0) -> str:
+    if depth > 4 or rng.random() < 0.3:
+        return rng.choice(["1", "0.5", "2", "3e-1", "x", "y", "pi"])
+    choice = rng.random()
+    if choice < 0.5:
+        op = rng.choice(["+", "-", "*", "/", "^"])
+        right = _random_expr(rng, depth + 1)
+        if op in "+-" and rng.random() < 0.3:
+            right = rng.choice(["-", "+", "--", "+-"]) + right
+        return f"{_random_expr(rng, depth + 1)} {op} {right}"
+    if choice < 0.7:
+        return f"({rng.choice(['', '-', '+-'])}{_random_expr(rng, depth + 1)})"
+    name = rng.choice(["sin", "cos", "sqrt", "exp", "abs", "log"])
+    args = [_random_expr(rng, depth + 1) for _ in range(rng.choice([1, 1, 2]))]
+    return f"{name}({', '.join(args)})"
+
+
+def test_random_expressions_agree() -> None:
+    rng = random.Random(99)
+    variables = {"x": Decimal("0.7"), "y": Decimal(-3)}
+    for _ in range(1500):
+        expr = _random_expr(rng)
+        assert _outcome(pratt.parse, expr, variables) == _outcome(parse_lark, expr, variables), expr
+
+
+def test_long_sums_and_deep_parentheses() -> None:
+    # Lark's tree transformer recurses once per term; the iterative parser does not.
+    tree = pratt.parse("+".join(["1"] * 5000))
+    assert tree.op == "+"
+    assert pratt.parse("(" * 5000 + "x" + ")" * 5000) == pratt.parse("x")
+
+
+def test_syntax_errors() -> None:
+    with pytest.raises(CalcError, match="^Syntax error at column 3: unexpected '\\)'"):
+        pratt.parse("2*)")
+    with pytest.raises(CalcError, match="^Syntax error: unexpected end"):
+        pratt.parse("2*")
+    with pytest.raises(CalcError, match="unexpected character '\\?'"):
+        pratt.parse("1 ? 2")
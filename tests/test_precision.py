@@ -0,0 +1,87 @@
+"""Tests for per-request precision and per-precision constants."""
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, getcontext
+
+import pytest
+
+from calc_core import PRECISION, CalcError, calculate, calculate_many, constants
+
+PI_60 = "3.14159265358979323846264338327950288419716939937510582097494"
+
+
+def test_precision_is_per_call() -> None:
+    assert str(calculate("2/3", precision=5)) == "0.66667"
+    assert str(calculate("pi", precision=60)) == PI_60
+    assert calculate("2/3") == Decimal("0.6666666666666666666666666666666667")
+    assert getcontext().prec == PRECISION
+
+
+def test_tan_at_low_precision() -> None:
+    assert str(calculate("tan(1)", precision=1)) == "2"
+    assert str(calculate("tan(1)", precision=2)) == "1.6"
+    assert str(calculate("tan(0.1)", precision=1)) == "0.1"
+    with pytest.raises(CalcError, match="DomainError: tan"):
+        calculate("tan(x)", x=calculate("pi/2"))
+
+
+def test_batch_precision() -> None:
+    assert calculate_many("1/x", [{"x": 3}, {"x": 0}], precision=4)[0] == Decimal("0.3333")
+
+
+@pytest.mark.parametrize("bad", [0, -1, 10**9, 3.5, True, "float32"])
+def test_invalid_precision(bad) -> None:
+    with pytest.raises(CalcError):
+        calculate("1+1", precision=bad)
+
+
+@pytest.mark.parametrize("bad", [True, 0, 10**9, "5", 3.5, "float32"])
+def test_rest_rejects_invalid_precision(bad) -> None:
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    client = TestClient(app)
+    assert client.post("/evaluate", json={"expr": "2/3", "precision": bad}).status_code == 422
+    assert client.post("/evaluate/batch", json={"expr": "x", "rows": [{"x": 1}], "precision": bad}).status_code == 422
+    assert client.post("/evaluate", json={"expr": "2/3", "precision": 5}).json()["result"] == "0.66667"
+
+
+def test_threads_do_not_interfere() -> None:
+    def run(prec: int) -> tuple[int, int]:
+        value = calculate("sin(1) + pi", precision=prec)
+        return prec, len(value.as_tuple().digits)
+
+    precisions = [5, 20, 34, 50, 80] * 40
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for prec, digits in pool.map(run, precisions):
+            assert digits <= prec
+
+
+def test_worker_threads_default_to_full_precision() -> None:
+    # New threads start from decimal.DefaultContext (28 digits).
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        value = pool.submit(calculate, "1/3").result()
+    assert len(value.as_tuple().digits) == PRECISION
+
+
+def test_asyncio_tasks_do_not_interfere() -> None:
+    async def run(prec: int) -> Decimal:
+        await asyncio.sleep(0)
+        return calculate("1/7", precision=prec)
+
+    async def main() -> list[Decimal]:
+        return await asyncio.gather(*(run(p) for p in (3, 40, 3, 40)))
+
+    results = asyncio.run(main())
+    assert [len(r.as_tuple().digits) for r in results] == [3, 40, 3, 40]
+
+
+def test_constants_are_memoized_per_precision() -> None:
+    assert constants.pi(60) is constants.pi(60)
+    assert str(constants.pi(40)) == "3.141592653589793238462643383279502884197"
+    assert str(constants.e(40)) == "2.718281828459045235360287471352662497757"
+    assert constants.ln10(34) == Decimal(10).ln()
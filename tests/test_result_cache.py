@@ -0,0 +1,88 @@
+"""Tests for the canonicalized, TTL-bounded result cache."""
+from __future__ import annotations
+
+from decimal import Decimal
+
+import pytest
+
+from calc_core import BudgetExceeded, CalcError, ResultCache, calculate, calculate_cached, cost, result_cache
+from calc_core import cache as cache_module
+from calc_core.cache import MISS, canonical_expression
+from test_yaml_cases import _collect_cases
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    result_cache.clear()
+    yield
+    result_cache.clear()
+
+
+@pytest.mark.parametrize("expr, expected, expect_error, vars_dict", _collect_cases())
+def test_canonical_form_evaluates_identically(expr, expected, expect_error, vars_dict) -> None:
+    def outcome(text):
+        try:
+            return calculate(text, **vars_dict)
+        except CalcError as ce:
+            return type(ce)
+
+    assert outcome(canonical_expression(expr)) == outcome(expr)
+
+
+def test_canonical_expression() -> None:
+    assert canonical_expression(" 1 +\t2 ") == canonical_expression("1+2")
+    assert canonical_expression("--x") == canonical_expression("+x") == canonical_expression("x")
+    assert canonical_expression("a---b") == canonical_expression("a - b")
+    assert canonical_expression("2 3") != canonical_expression("23")
+    # Not a unary position: left alone so it still fails to parse.
+    assert canonical_expression("2*--3") == "2 * - - 3"
+
+
+def test_equivalent_requests_share_an_entry() -> None:
+    assert calculate_cached("x*y + 1", x=2, y="1.50") == Decimal(4)
+    assert calculate_cached(" --x * y+1", x=Decimal("2.0"), y=1.5) == Decimal(4)
+    assert calculate_cached("x*y + 1", x=2, y="1.50", precision=10) == Decimal(4)
+    info = result_cache.info()
+    assert (info.hits, info.misses, info.currsize) == (1, 2, 2)
+
+
+def test_errors_are_cached(monkeypatch) -> None:
+    monkeypatch.setattr(cost, "MAX_WORK", 10_000)
+    for _ in range(2):
+        with pytest.raises(CalcError, match="Division by zero"):
+            calculate_cached("1 / (x - x)", x=3)
+    with pytest.raises(BudgetExceeded):
+        calculate_cached("sin(1e20000)")
+    with pytest.raises(BudgetExceeded):
+        calculate_cached("sin( 1e20000 )")
+    info = result_cache.info()
+    assert (info.hits, info.error_hits) == (2, 2)
+
+
+def test_syntax_errors_only_match_the_same_text() -> None:
+    with pytest.raises(CalcError, match="column 4"):
+        calculate_cached("1 +* 2")
+    with pytest.raises(CalcError, match="column 3"):
+        calculate_cached("1+*2")
+    with pytest.raises(CalcError, match="column 3"):
+        calculate_cached("1+*2")
+    assert result_cache.info().error_hits == 1
+
+
+def test_ttl_and_size(monkeypatch) -> None:
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = ResultCache(maxsize=2, ttl=10)
+    for i in range(3):
+        cache.store(i, Decimal(i))
+    assert cache.lookup(0, "") is MISS and cache.lookup(2, "") == 2
+    now[0] += 11
+    assert cache.lookup(2, "") is MISS
+    info = cache.info()
+    assert (info.evictions, info.expirations, info.currsize) == (1, 1, 1)
+
+
+def test_nan_values_bypass_the_cache() -> None:
+    assert ResultCache.key("x", 34, {"x": Decimal("NaN")}) is None
+    assert calculate_cached("1", x="sNaN") == 1
+    assert len(result_cache) == 0
@@ -0,0 +1,152 @@
+"""Tests for calculation sessions (calc_core.sessions) and the calc.session.* tools."""
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+
+from calc_core import CalcError
+from calc_core.executor import CalcExecutor
+from calc_core.sessions import SessionStore
+from server.jsonrpc import Dispatcher
+
+
+def _results(reply: dict) -> dict:
+    return {name: o.get("result", o.get("error")) for name, o in reply["updated"].items()}
+
+
+def test_update_recomputes_only_dependents() -> None:
+    store = SessionStore()
+    sid = store.define("price", "2.5")["session"]
+    assert _results(store.define("total", "price*qty*(1+tax)", sid)) == {"total": "Unknown identifier 'qty'"}
+    store.define("qty", "4", sid)
+    assert _results(store.define("tax", "0.2", sid)) == {"tax": "0.2", "total": "12"}
+    store.define("area", "qty^2", sid)
+
+    assert _results(store.update(sid, "price", "3")) == {"price": "3", "total": "14.4"}
+    # Same value: nothing downstream is re-evaluated.
+    assert _results(store.update(sid, "qty", "2+2")) == {"qty": "4"}
+    assert list(store.update(sid, "qty", "5")["updated"]) in (["qty", "area", "total"], ["qty", "total", "area"])
+    formulas = store.get(sid)["formulas"]
+    assert formulas["total"] == {"expr": "price*qty*(1+tax)", "result": "18"}
+    assert formulas["area"]["result"] == "25"
+
+
+def test_dependency_order_and_cutoff() -> None:
+    store = SessionStore()
+    sid = store.define("a", "1")["session"]
+    for name, expr in [("b", "a*2"), ("c", "b+1"), ("d", "abs(a)"), ("f", "d+c")]:
+        store.define(name, expr, sid)
+    updated = list(store.update(sid, "a", "-1")["updated"])
+    assert updated[0] == "a" and updated.index("b") < updated.index("c") < updated.index("f")
+    assert store.get(sid, ["f"])["formulas"]["f"]["result"] == "0"
+    errors = _results(store.update(sid, "a", "1/0"))
+    assert errors["a"] == "Division by zero" and errors["c"] == "'b' has no value"
+    assert set(errors) == {"a", "b", "c", "d", "f"}
+    assert _results(store.update(sid, "a", "2"))["f"] == "7"
+
+
+def test_cycles_and_invalid_input_leave_the_session_unchanged() -> None:
+    store = SessionStore()
+    sid = store.define("x", "1")["session"]
+    store.define("y", "x+1", sid)
+    store.define("z", "y*2", sid)
+    with pytest.raises(CalcError, match=r"Circular reference: x -> z -> y -> x"):
+        store.update(sid, "x", "z")
+    with pytest.raises(CalcError, match="Circular reference: w -> w"):
+        store.define("w", "w+1", sid)
+    with pytest.raises(CalcError):
+        store.update(sid, "x", "1+")
+    for bad in ("pi", "sqrt", "2x", ""):
+        with pytest.raises(CalcError):
+            store.define(bad, "1", sid)
+    with pytest.raises(CalcError, match="already defined"):
+        store.define("x", "2", sid)
+    with pytest.raises(CalcError, match="Unknown formula"):
+        store.update(sid, "nope", "2")
+    assert store.get(sid)["formulas"] == {
+        "x": {"expr": "1", "result": "1"},
+        "y": {"expr": "x+1", "result": "2"},
+        "z": {"expr": "y*2", "result": "4"},
+    }
+
+
+def test_failed_first_define_creates_no_session() -> None:
+    store = SessionStore(maxsize=1)
+    sid = store.define("a", "1")["session"]
+    for name, expr in [("b", "1+"), ("c", "c*2"), ("pi", "1"), ("d", "1"), ("e", "sqrt(1, 2)")]:
+        with pytest.raises(CalcError):
+            store.define(name, expr, precision=0 if name == "d" else None)
+    assert len(store) == 1 and store.evictions == 0
+    assert store.get(sid)["formulas"] == {"a": {"expr": "1", "result": "1"}}
+
+
+def test_drop_and_precision() -> None:
+    store = SessionStore()
+    sid = store.define("third", "1/3", precision=5)["session"]
+    store.define("twice", "third*2", sid)
+    assert store.get(sid)["formulas"]["twice"]["result"] == "0.66666"
+    with pytest.raises(CalcError, match="precision"):
+        store.define("other", "1", sid, precision=10)
+    assert _results(store.drop(sid, "third")) == {"twice": "Unknown identifier 'third'"}
+    assert _results(store.define("third", "1", sid)) == {"third": "1", "twice": "2"}
+    assert store.drop(sid) == {"session": sid, "dropped": True}
+    with pytest.raises(CalcError, match="Unknown or expired session"):
+        store.get(sid)
+
+
+def test_limits_and_expiry(monkeypatch) -> None:
+    store = SessionStore(maxsize=2, ttl=60)
+    first = store.define("a", "1")["session"]
+    second = store.define("a", "2")["session"]
+    store.get(first)  # now the most recently used
+    store.define("a", "3")
+    assert store.evictions == 1 and len(store) == 2
+    with pytest.raises(CalcError):
+        store.get(second)
+
+    import calc_core.sessions as sessions_module
+
+    clock = [sessions_module.time.monotonic()]
+    monkeypatch.setattr(sessions_module.time, "monotonic", lambda: clock[0])
+    store.get(first)
+    clock[0] += 61
+    with pytest.raises(CalcError, match="expired"):
+        store.get(first)
+    assert len(store) == 0 and store.expirations == 2
+
+    monkeypatch.setattr(sessions_module, "SESSION_MAX_FORMULAS", 2)
+    sid = store.define("a", "1")["session"]
+    store.define("b", "2", sid)
+    with pytest.raises(CalcError, match="full"):
+        store.define("c", "3", sid)
+    store.update(sid, "b", "a")  # replacing is always allowed
+
+
+@pytest.mark.parametrize("kind", ["thread", "process"])
+def test_mcp_tools(kind) -> None:
+    pool = CalcExecutor(kind, workers=1)
+    dispatcher = Dispatcher(server_info={"name": "test", "version": "0"}, capabilities={}, pool=pool)
+
+    def call(tool, /, **arguments):
+        message = {"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                   "params": {"name": tool, "arguments": arguments}}
+        body = asyncio.run(dispatcher.handle(message)).body
+        if "error" in body:
+            return body["error"]["message"]
+        return json.loads(body["result"]["content"][0]["text"])
+
+    try:
+        sid = call("calc.session.define", name="r", expr="2")["session"]
+        call("calc.session.define", session=sid, name="area", expr="pi*r^2")
+        assert call("calc.session.update", session=sid, name="r", expr="1")["updated"]["area"] == {
+            "result": "3.141592653589793238462643383279503"
+        }
+        assert call("calc.session.get", session=sid, names=["r"])["formulas"] == {"r": {"expr": "1", "result": "1"}}
+        assert "Circular reference" in call("calc.session.update", session=sid, name="r", expr="area")
+        for names in ("ra", ["r", 1], {"r": 1}):
+            assert "must be a list of formula names" in call("calc.session.get", session=sid, names=names)
+        assert call("calc.session.drop", session=sid)["dropped"] is True
+    finally:
+        pool.shutdown()
@@ -0,0 +1,112 @@
+"""Tests for the numerical solvers (calc_core.solvers) and the calc.solve/integrate/sum tools."""
+from __future__ import annotations
+
+import json
+import time
+from decimal import Decimal
+
+import pytest
+
+from calc_core import BudgetExceeded, CalcError, calculate
+from calc_core.solvers import gauss_legendre, integrate, solve, summation
+from server.registry import registry
+
+SQRT2_60 = "1.41421356237309504880168872420969807856967187537694807317668"
+
+
+def test_solve() -> None:
+    assert str(solve("x^2-2", "x", 0, 2).root) == "1.414213562373095048801688724209698"
+    assert str(solve("x^2-2", "x", 0, 2, precision=60).root) == SQRT2_60
+    root = solve("cos(x) - x", "x", 0, 1)
+    assert abs(root.residual) < Decimal("1e-33") and root.iterations < 20
+    # Bounds may be expressions; other names come from variables.
+    assert solve("sin(x) - a", "x", 0, "pi/2", variables={"a": "0.5"}).root == calculate("pi/6")
+    assert solve("x - 3", "x", 3, 5).root == 3
+    coarse = solve("x^2-2", "x", 0, 2, tol="1e-6")
+    assert abs(coarse.root - Decimal(SQRT2_60)) < Decimal("1e-6")
+
+
+def test_solve_errors() -> None:
+    with pytest.raises(CalcError, match="No sign change"):
+        solve("x^2+1", "x", -1, 1)
+    with pytest.raises(CalcError, match=r"Division by zero \(at x = "):
+        solve("1/x - 1", "x", 0, 2)
+    with pytest.raises(CalcError, match="Unknown identifier 'y'"):
+        solve("x - y", "x", 0, 1)
+    with pytest.raises(CalcError, match="solver variable"):
+        solve("x", "x", 0, 1, variables={"x": 1})
+    with pytest.raises(CalcError, match="float64"):
+        solve("x", "x", -1, 1, precision="float64")
+    with pytest.raises(BudgetExceeded, match="did not converge in 3 iterations"):
+        solve("x^3 - 2", "x", 0, 100, max_iter=3)
+    with pytest.raises(BudgetExceeded, match="time limit"):
+        solve("x^3 - 2", "x", 0, 100, timeout=0)
+    for tol in (-1, 0, "-1e-9"):
+        with pytest.raises(CalcError, match="tol must be positive"):
+            solve("x^2-2", "x", 0, 2, tol=tol)
+
+
+def test_gauss_legendre_rule() -> None:
+    rule = gauss_legendre(6, 40)
+    assert sum(2 * w for _, w in rule) == pytest.approx(2)
+    # Exact for polynomials of degree 2n-1: the integral of x^10 over [-1, 1] is 2/11.
+    assert abs(sum(2 * w * x ** 10 for x, w in rule) - Decimal(2) / 11) < Decimal("1e-38")
+
+
+@pytest.mark.parametrize("expr, lower, upper, expected", [
+    ("sin(x)", 0, "pi", "2"),
+    ("4/(1+x^2)", 0, 1, "3.141592653589793238462643383279503"),
+    ("sqrt(x)", 0, 1, "0.6666666666666666666666666666666667"),
+    ("exp(x)", 1, 0, "-1.718281828459045235360287471352662"),
+    ("x^3", -2, 2, "0"),
+])
+def test_integrate(expr, lower, upper, expected) -> None:
+    result = integrate(expr, "x", lower, upper)
+    assert str(result.value) == expected
+    assert result.error < Decimal("1e-33")
+
+
+def test_integrate_precision_and_limits() -> None:
+    result = integrate("4/(1+x^2)", "x", 0, 1, precision=100)
+    assert result.value == calculate("pi", precision=100)
+    coarse = integrate("exp(-x^2)", "x", -3, 3, tol="1e-8")
+    assert coarse.error <= Decimal("1e-8") and coarse.intervals < integrate("exp(-x^2)", "x", -3, 3).intervals
+    assert integrate("x", "x", 1, 1).value == 0
+    with pytest.raises(BudgetExceeded, match="2 subdivisions"):
+        integrate("1/sqrt(x)", "x", 0, 1, max_iter=2)
+    with pytest.raises(CalcError, match="finite"):
+        integrate("x", "x", 0, float("inf"))
+    for tol in (-1, 0):
+        with pytest.raises(CalcError, match="tol must be positive"):
+            integrate("x", "x", 0, 1, tol=tol)
+    # The deadline also covers building a high-precision rule.
+    start = time.monotonic()
+    with pytest.raises(BudgetExceeded, match="time limit"):
+        integrate("x", "x", 0, 1, precision=3000, timeout=0.05)
+    assert time.monotonic() - start < 2
+
+
+def test_summation() -> None:
+    assert summation("k^2", "k", 1, 100) == (Decimal(338350), 100)
+    assert summation("k", "k", 10, 1, step=-3).value == 10 + 7 + 4 + 1
+    assert summation("k", "k", 5, 1).terms == 0
+    basel = summation("1/k^2", "k", 1, 1000, precision=50).value
+    exact = sum(Decimal(1) / (k * k) for k in range(1, 1001))  # at 34 digits
+    assert abs(basel - exact) < Decimal("1e-30")
+    with pytest.raises(CalcError, match="integers"):
+        summation("k", "k", 1, "2.5")
+    with pytest.raises(CalcError, match="zero"):
+        summation("k", "k", 1, 2, step=0)
+    with pytest.raises(BudgetExceeded, match="limit of 10"):
+        summation("k", "k", 1, 11, max_terms=10)
+    with pytest.raises(CalcError, match=r"Division by zero \(at k = 0\)"):
+        summation("1/k", "k", -2, 2)
+
+
+def test_mcp_tools() -> None:
+    def call(name, **arguments):
+        return json.loads(registry.get_function(name)["handler"](**arguments))
+
+    assert call("calc.solve", expr="x^2 - 2", variable="x", lower=0, upper=2, precision=60)["root"] == SQRT2_60
+    assert call("calc.integrate", expr="sin(x)", variable="x", lower=0, upper="pi")["value"] == "2"
+    assert call("calc.sum", expr="a*k", variable="k", start=1, end=4, variables={"a": "0.5"}) == {"value": "5", "terms": 4}
@@ -0,0 +1,134 @@
+"""Tests for the concurrent asyncio stdio transport and its cold start."""
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+from calc_core.executor import CalcExecutor
+from server.jsonrpc import Dispatcher
+from server.registry import ResourceRegistry
+from stdio_server import StdioServer, encode_frame
+
+release = threading.Event()
+
+
+def _wait(seconds: float = 5) -> str:
+    release.wait(seconds)
+    return "done"
+
+
+def _echo(value: str) -> str:
+    return value
+
+
+def _server(output: io.BytesIO, pool: CalcExecutor) -> StdioServer:
+    tools = ResourceRegistry()
+    tools.add_function("wait", {"handler": _wait})
+    tools.add_function("echo", {"handler": _echo})
+    dispatcher = Dispatcher(server_info={}, capabilities={}, tools=tools, pool=pool)
+    return StdioServer(output, dispatcher, preload=False)
+
+
+def _call(request_id, name, **arguments) -> dict:
+    return {"jsonrpc": "2.0", "id": request_id, "method": "tools/call",
+            "params": {"name": name, "arguments": arguments}}
+
+
+def _responses(data: bytes) -> list:
+    out = []
+    while data:
+        header, _, rest = data.partition(b"\r\n\r\n")
+        length = int(header.split(b":")[1])
+        out.append(json.loads(rest[:length]))
+        data = rest[length:]
+    return out
+
+
+def _serve(messages, *, then=None) -> list:
+    output = io.BytesIO()
+    pool = CalcExecutor("thread", 4)
+
+    async def main() -> None:
+        reader = asyncio.StreamReader()
+        server = _server(output, pool)
+        serving = asyncio.create_task(server.serve(reader))
+        for m in messages:
+            reader.feed_data(encode_frame(m) if not isinstance(m, bytes) else m)
+        await asyncio.sleep(0.1)
+        if then:
+            then(reader)
+        reader.feed_eof()
+        await serving
+
+    try:
+        asyncio.run(main())
+    finally:
+        release.set()
+        pool.shutdown()
+    return _responses(output.getvalue())
+
+
+def test_responses_are_written_as_they_complete() -> None:
+    release.clear()
+    responses = _serve(
+        [_call(1, "wait"), _call(2, "echo", value="fast")],
+        then=lambda reader: release.set(),
+    )
+    assert [r["id"] for r in responses] == [2, 1]
+    assert responses[1]["result"]["content"][0]["text"] == "done"
+
+
+def test_cancel_request() -> None:
+    release.clear()
+    cancel = {"jsonrpc": "2.0", "method": "$/cancelRequest", "params": {"id": "slow"}}
+    responses = _serve(
+        [_call("slow", "wait"), _call(2, "echo", value="x")],
+        then=lambda reader: reader.feed_data(encode_frame(cancel)),
+    )
+    by_id = {r["id"]: r for r in responses}
+    assert by_id["slow"]["error"] == {"code": -32800, "message": "Request cancelled"}
+    assert by_id[2]["result"]["content"][0]["text"] == "x"
+
+
+def test_malformed_requests_do_not_stop_the_server(monkeypatch) -> None:
+    async def broken(self, message):
+        raise RuntimeError("boom")
+
+    bad_cancels = [{"jsonrpc": "2.0", "method": "$/cancelRequest", "params": p} for p in ([1], "x", {"id": [1]}, None)]
+    responses = _serve([*bad_cancels, _call(1, "echo", value="ok")])
+    assert [r["id"] for r in responses] == [1]
+
+    monkeypatch.setattr(Dispatcher, "handle_payload", broken)
+    responses = _serve([_call(7, "echo", value="lost")])
+    assert responses == [{"jsonrpc": "2.0", "id": 7, "error": {"code": -32603, "message": "Internal error"}}]
+
+
+def test_framing_errors() -> None:
+    responses = _serve([b"noise\r\nX-Other: 1\r\nContent-Length: 3\r\n\r\n{x}", _call(5, "echo", value="ok")])
+    assert responses[0]["error"]["code"] == -32700
+    assert responses[1]["id"] == 5
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_import_does_not_load_the_calculator() -> None:
+    code = "import sys, stdio_server; print(sorted(m for m in sys.modules if m.startswith(('calc_core', 'lark'))))"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+
+
+def test_parser_tables_are_cached(tmp_path) -> None:
+    cache = tmp_path / "parser.lark"
+    code = "from calc_core import calculate; print(calculate('1+2'))"
+    env = {**os.environ, "CALC_PARSER": "lark", "CALC_PARSER_CACHE": str(cache)}
+    for _ in range(2):
+        out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+        assert out.stdout.strip() == "3"
+        assert cache.stat().st_size > 0
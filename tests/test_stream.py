@@ -0,0 +1,89 @@
+"""Tests for the NDJSON streaming endpoint (POST /evaluate/stream)."""
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+
+from app.streaming import evaluate_lines, split_lines
+
+
+async def _chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+async def _collect(iterator) -> list:
+    return [item async for item in iterator]
+
+
+def test_split_lines_across_chunks() -> None:
+    chunks = _chunks(b'{"a"', b': 1}\n\n  \n{"b": 2}\n' + b"x" * 50, b"yz\n", b'{"c": 3}')
+    lines = asyncio.run(_collect(split_lines(chunks, max_line=20)))
+    assert lines == [
+        (1, b'{"a": 1}', None),
+        (4, b'{"b": 2}', None),
+        (5, b"", "Line too long (limit 20 bytes)"),
+        (6, b'{"c": 3}', None),
+    ]
+
+
+def test_in_flight_bound_and_backpressure() -> None:
+    read = 0
+    running = 0
+    peak = 0
+
+    async def source():
+        nonlocal read
+        for i in range(1, 101):
+            read += 1
+            yield i, b"", None
+
+    async def evaluate(number: int, line: bytes):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.001 * (number % 3))
+        running -= 1
+        return {"line": number}
+
+    async def main() -> None:
+        stream = evaluate_lines(source(), evaluate, in_flight=4)
+        first = await stream.__anext__()
+        # The consumer has not asked for more: nothing beyond the window was read.
+        assert json.loads(first)["line"] >= 1 and read <= 5
+        rest = await _collect(stream)
+        assert sorted(json.loads(line)["line"] for line in [first, *rest]) == list(range(1, 101))
+
+    asyncio.run(main())
+    assert peak <= 4
+
+
+def test_rest_route() -> None:
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    body = "\n".join([
+        json.dumps({"expr": "2+3"}),
+        json.dumps({"expr": "x*2", "variables": {"x": "1.5"}, "precision": 5}),
+        json.dumps({"expr": "1/0"}),
+        "not json",
+        "",
+        json.dumps({"expr": "pi", "precision": 50}),
+    ]) + "\n"
+    client = TestClient(app)
+    res = client.post("/evaluate/stream?in_flight=2", content=body.encode())
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    answers = {a["line"]: a for a in map(json.loads, res.text.splitlines())}
+    assert answers[1] == {"line": 1, "result": "5", "precision": 34}
+    assert answers[2] == {"line": 2, "result": "3", "precision": 5}
+    assert answers[3] == {"line": 3, "error": "Division by zero"}
+    assert answers[4]["error"].startswith("Invalid request")
+    assert answers[6]["result"].startswith("3.14159265358979323846264338327950288419716939937")
+    assert sorted(answers) == [1, 2, 3, 4, 6]
+
+    assert client.post("/evaluate/stream?in_flight=0", content=b"").status_code == 422
@@ -0,0 +1,170 @@
+"""Tests for evaluation traces and the on-demand profiler."""
+from __future__ import annotations
+
+import asyncio
+import json
+import pstats
+import time
+from pathlib import Path
+
+import pytest
+
+from calc_core import CalcError, calculate, calculate_traced, profiling
+from calc_core.executor import CalcExecutor
+from calc_core.profiling import Profiler
+from test_yaml_cases import _collect_cases
+
+
+@pytest.mark.parametrize("expr, expected, expect_error, vars_dict", _collect_cases())
+def test_traced_result_matches_calculate(expr, expected, expect_error, vars_dict) -> None:
+    def outcome(fn):
+        try:
+            return fn(expr, **vars_dict)
+        except CalcError as ce:
+            return str(ce)
+
+    traced = outcome(calculate_traced)
+    assert (traced if isinstance(traced, str) else traced[0]) == outcome(calculate)
+
+
+def test_trace_contents() -> None:
+    value, trace = calculate_traced("sqrt(sin(x)^2 + 1) + sin(x) * 2 + 1*2", x="0.5", precision=60)
+    assert value == calculate("sqrt(sin(x)^2 + 1) + sin(x) * 2 + 1*2", x="0.5", precision=60)
+    assert trace["precision"] == 60
+    assert set(trace["stages_ms"]) == {"parse", "compile", "evaluate", "quantize", "total"}
+    assert trace["nodes"] > trace["optimized_nodes"]  # sin(x) is shared, 1*2 folded
+    assert trace["depth"] >= 5 and trace["estimated_work"] > 0
+    sqrt, sin = trace["functions"]["sqrt"], trace["functions"]["sin"]
+    assert sin["calls"] == 1 and sqrt["calls"] == 1  # the shared sin(x) runs once
+    # sqrt's argument contains sin(x): it counts in sqrt's total, not its own time.
+    assert sqrt["self_ms"] <= sqrt["total_ms"]
+    assert sqrt["total_ms"] >= sin["total_ms"]
+    series = trace["trig_series"]
+    assert series["calls"] == 1 and series["terms"] == series["max_terms"] > 5
+    json.dumps(trace)
+
+
+def test_trace_reports_argument_halving() -> None:
+    _, low = calculate_traced("sin(0.7)")
+    _, high = calculate_traced("sin(0.7)", precision=800)
+    assert low["trig_series"]["halvings"] == 0
+    assert high["trig_series"]["halvings"] > 0
+
+
+def test_trace_float64_and_errors() -> None:
+    pytest.importorskip("numpy")
+    value, trace = calculate_traced("x*2", x=3, precision="float64")
+    assert value == 6.0 and "quantize" not in trace["stages_ms"]
+    with pytest.raises(CalcError, match="Division by zero"):
+        calculate_traced("1/0")
+
+
+def test_mcp_trace_flag() -> None:
+    from server.registry import registry
+
+    handler = registry.get_function("calc.evaluate")["handler"]
+    assert handler("1+1") == "2"
+    answer = json.loads(handler("cos(x)", {"x": 1}, trace=True))
+    assert answer["result"] == str(calculate("cos(x)", x=1))
+    assert answer["trace"]["functions"]["cos"]["calls"] == 1
+
+
+def test_rest_trace_flag() -> None:
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    client = TestClient(app)
+    plain = client.post("/evaluate", json={"expr": "2^10"}).json()
+    assert plain == {"result": "1024", "precision": 34}
+    traced = client.post("/evaluate", json={"expr": "2^10", "trace": True}).json()
+    assert traced["result"] == "1024" and "stages_ms" in traced["trace"]
+
+
+# --------------------------------------------------------------------------
+# Profiler
+# --------------------------------------------------------------------------
+
+def _slow(seconds: float) -> str:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+    return "done"
+
+
+def _run(profiler: Profiler, monkeypatch, calls) -> list:
+    monkeypatch.setattr("calc_core.executor.profiler", profiler)
+    pool = CalcExecutor("thread", 2)
+
+    async def main() -> list:
+        return await asyncio.gather(*(pool.run(fn, *args) for fn, *args in calls), return_exceptions=True)
+
+    try:
+        return asyncio.run(main())
+    finally:
+        pool.shutdown()
+
+
+def test_cprofile_next_requests(tmp_path, monkeypatch) -> None:
+    profiler = Profiler(str(tmp_path))
+    status = profiler.start(requests=2, kind="cprofile")
+    assert status["active"] and status["path"].endswith(".prof")
+    results = _run(profiler, monkeypatch, [(calculate, "sqrt(2)"), (calculate, "1/0"), (calculate, "3")])
+    assert results[0] == calculate("sqrt(2)") and isinstance(results[1], CalcError)
+    status = profiler.status()
+    assert status == {**status, "active": False, "profiled": 2, "remaining": 0}
+    stats = pstats.Stats(status["path"])
+    assert any(name == "calculate" for _, _, name in stats.stats)
+    assert not profiler.armed
+
+
+def test_sampling_profile(tmp_path, monkeypatch) -> None:
+    profiler = Profiler(str(tmp_path))
+    profiler.start(requests=1, kind="sampling", interval=0.001)
+    assert _run(profiler, monkeypatch, [(_slow, 0.2)]) == ["done"]
+    lines = Path(profiler.status()["path"]).read_text().splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("_slow (test_trace.py:" in line for line in lines)
+
+
+def test_stop_writes_partial_profile(tmp_path, monkeypatch) -> None:
+    profiler = Profiler(str(tmp_path))
+    profiler.start(requests=100)
+    _run(profiler, monkeypatch, [(calculate, "1+1")])
+    status = profiler.stop()
+    assert not status["active"] and status["profiled"] == 1
+    assert Path(status["path"]).exists()
+    with pytest.raises(ValueError):
+        profiler.start(requests=0)
+    with pytest.raises(ValueError):
+        profiler.start(requests=1, kind="perf")
+
+
+def test_admin_switch(tmp_path, monkeypatch) -> None:
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    import app.main
+    from calc_core import config
+    from server.jsonrpc import Dispatcher
+
+    client = TestClient(app.main.app)
+    dispatcher = Dispatcher(server_info={}, capabilities={})
+    message = {"jsonrpc": "2.0", "id": 1, "method": "admin/profile", "params": {"action": "status"}}
+    assert client.get("/admin/profile").status_code == 404
+    assert asyncio.run(dispatcher.handle(message)).status == 404
+
+    profiler = Profiler(str(tmp_path))
+    monkeypatch.setattr(app.main, "ADMIN_ENABLED", True)
+    monkeypatch.setattr(config, "ADMIN_ENABLED", True)
+    monkeypatch.setattr(app.main, "profiler", profiler)
+    monkeypatch.setattr(profiling, "profiler", profiler)
+    response = client.post("/admin/profile", json={"requests": 3, "kind": "sampling"})
+    assert response.status_code == 200 and response.json()["remaining"] == 3
+    assert client.delete("/admin/profile").json()["active"] is False
+
+    start = {**message, "params": {"action": "start", "requests": 5}}
+    assert asyncio.run(dispatcher.handle(start)).body["result"]["remaining"] == 5
+    bad = {**message, "params": {"action": "start", "requests": "many"}}
+    assert asyncio.run(dispatcher.handle(bad)).body["error"]["code"] == -32602